@@ -0,0 +1,12 @@
+'''
+    性能基准：用本地替身服务回放接口数据，测量抓取/解析/提醒各环节
+
+        python -m benchmarks.replay --cycles 500 --latency-ms 40
+        python -m benchmarks.replay_server record --count 50   # 录制真实接口数据
+        python -m benchmarks.speech --alerts 500   # 语音片段缓存
+        python -m benchmarks.gateway --subscribers 2000   # 行情网关扇出
+        python -m benchmarks.backtest --ticks 1000000   # 提醒回测
+        python -m benchmarks.export --days 30   # 行情导出
+        python -m benchmarks.startup --fonts fonts/msyh.ttc fonts/ui.ttf   # 首帧耗时（需要窗口环境）
+        python -m benchmarks.frames --cards 20 --rate 10   # 价格卡片帧耗时（需要窗口环境）
+'''
@@ -0,0 +1,96 @@
+'''
+    提醒回测基准：生成随机游走行情写入历史日志，测量回测耗时，
+    并用 AlertEngine 逐条回放前一部分行情核对结果是否一致
+
+        python -m benchmarks.backtest --ticks 2000000 --settings 9
+'''
+
+import argparse
+import json
+import random
+import tempfile
+import time
+
+from goldcore import backtest
+from goldcore.alerts import AlertEngine, band_rule
+from goldcore.ticks import TickLog, log_path
+
+def generate(path, count, seed=1, start_price=778.0, interval=1.5):
+    """随机游走行情，步长约 0.05 元，偶尔跳动"""
+    rng = random.Random(seed)
+    log = TickLog(path)
+    timestamp = 1_760_000_000.0
+    price = start_price
+    for _ in range(count):
+        timestamp += interval
+        price += rng.gauss(0, 0.05) + (rng.choice((-1, 1)) * rng.uniform(0.5, 2) if rng.random() < 0.001 else 0)
+        log.append(timestamp, round(price, 2), 0.0)
+    log.close()
+
+def engine_events(timestamps, prices, base, up, down, rearm):
+    """用 AlertEngine 逐条回放（慢，用来核对）"""
+    engine = AlertEngine(rearm_interval=rearm)
+    engine.add(band_rule("浙商", base, up, down))
+    events = []
+    for timestamp, price in zip(timestamps, prices):
+        for event in engine.update("浙商", float(price), now=float(timestamp)):
+            events.append((float(timestamp), event.direction, event.price))
+    return events
+
+def run(ticks, settings, verify_ticks, rearm):
+    with tempfile.TemporaryDirectory() as directory:
+        started = time.perf_counter()
+        generate(log_path(directory, "浙商"), ticks)
+        generated = time.perf_counter() - started
+        
+        started = time.perf_counter()
+        timestamps, prices = backtest.load_ticks(directory, "浙商")
+        loaded = time.perf_counter() - started
+        
+        amounts = [0.5, 1.0, 2.0, 3.0, 5.0][:max(1, int(settings ** 0.5))]
+        base = float(prices[0])
+        started = time.perf_counter()
+        results = backtest.sweep(timestamps, prices, base, amounts, amounts, rearm)
+        elapsed = time.perf_counter() - started
+        
+        # 核对：前 verify_ticks 条行情上与提醒引擎结果一致
+        head_t, head_p = timestamps[:verify_ticks], prices[:verify_ticks]
+        expected = engine_events(head_t, head_p, base, amounts[0], amounts[0], rearm)
+        actual = backtest.backtest_band(head_t, head_p, base, amounts[0], amounts[0], rearm)
+        
+        return {
+            "ticks": ticks,
+            "numpy": backtest.np is not None,
+            "generate_s": generated,
+            "load_s": loaded,
+            "settings": len(results),
+            "backtest_s": elapsed,
+            "ticks_per_s": ticks * len(results) / elapsed if elapsed else 0.0,
+            "alerts": {f"{r['up']:g}/{r['down']:g}": r["alerts"] for r in results},
+            "verified_ticks": len(head_p),
+            "verified": expected == actual,
+        }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='benchmarks.backtest', description='提醒回测基准')
+    parser.add_argument('--ticks', type=int, default=1_000_000)
+    parser.add_argument('--settings', type=int, default=9, help='涨/跌组合数量（取平方数）')
+    parser.add_argument('--verify-ticks', type=int, default=50_000, help='用提醒引擎核对的行情条数')
+    parser.add_argument('--rearm', type=float, default=30)
+    parser.add_argument('--json', action='store_true', help='输出 JSON')
+    args = parser.parse_args(argv)
+    
+    report = run(args.ticks, args.settings, args.verify_ticks, args.rearm)
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=1))
+    else:
+        print(f"行情 {report['ticks']}  NumPy {'是' if report['numpy'] else '否'}  "
+              f"生成 {report['generate_s']:.1f}s  读取 {report['load_s']:.3f}s")
+        print(f"回测 {report['settings']} 组设置 {report['backtest_s']:.2f}s"
+              f"（{report['ticks_per_s'] / 1e6:.1f} 百万条/秒）")
+        print("提醒次数: " + "  ".join(f"{k}={v}" for k, v in report["alerts"].items()))
+        print(f"与提醒引擎核对 {report['verified_ticks']} 条: {'一致' if report['verified'] else '不一致'}")
+    return 0 if report["verified"] else 1
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,85 @@
+'''
+    行情导出基准：生成每个数据源 N 天的 3 秒行情，测量各格式的导出耗时、文件大小，
+    以及 .ticks 文件读回 NumPy 的耗时，并核对读回的数据与日志一致
+
+        python -m benchmarks.export --days 30
+        python -m benchmarks.export --days 7 --formats ticks csv --json
+'''
+
+import argparse
+import json
+import math
+import os
+import tempfile
+import time
+
+from goldcore import export
+from goldcore.backtest import load_ticks
+from goldcore.config import BANKS
+from goldcore.ticks import log_path
+
+from .backtest import generate
+
+SUFFIXES = {"ticks": ".ticks", "parquet": ".parquet", "csv": ".csv.gz"}
+
+def available_formats():
+    return [fmt for fmt in SUFFIXES if fmt != "parquet" or export.pa is not None]
+
+def verify(directory, path):
+    """.ticks 读回后与原日志逐条比较（时间戳精度为毫秒）"""
+    loaded = export.load_export(path)
+    for source in BANKS:
+        timestamps, prices = load_ticks(directory, source)
+        columns = loaded[source]
+        if len(columns["price"]) != len(prices):
+            return False
+        for i in range(0, len(prices), max(1, len(prices) // 1000)):
+            if abs(columns["timestamp"][i] - timestamps[i]) > 6e-4 or abs(columns["price"][i] - prices[i]) > 1e-9:
+                return False
+    return True
+
+def run(days, formats):
+    ticks = int(days * 86400 / 3)
+    with tempfile.TemporaryDirectory() as directory:
+        for i, source in enumerate(BANKS):
+            generate(log_path(directory, source), ticks, seed=i + 1, interval=3)
+        raw_bytes = sum(os.path.getsize(log_path(directory, source)) for source in BANKS)
+        
+        results = {}
+        for fmt in formats:
+            path = os.path.join(directory, f"export{SUFFIXES[fmt]}")
+            result = export.export_ticks(directory, path, fmt=fmt)
+            results[fmt] = {"bytes": result["bytes"], "export_s": result["elapsed_s"],
+                            "ratio": raw_bytes / result["bytes"] if result["bytes"] else math.inf}
+            if fmt == "ticks":
+                started = time.perf_counter()
+                export.load_export(path)
+                results[fmt]["load_s"] = time.perf_counter() - started
+                results[fmt]["verified"] = verify(directory, path)
+    return {"days": days, "sources": len(BANKS), "rows": ticks * len(BANKS), "raw_bytes": raw_bytes,
+            "numpy": export.np is not None, "formats": results}
+
+def format_report(report):
+    lines = [f"{report['days']} 天  数据源 {report['sources']}  共 {report['rows']} 行  "
+             f"日志 {report['raw_bytes'] / 1e6:.1f}MB  NumPy {'有' if report['numpy'] else '无'}"]
+    for fmt, r in report["formats"].items():
+        line = f"  {fmt:<8} {r['bytes'] / 1e6:>7.2f}MB  压缩比 {r['ratio']:>5.1f}  导出 {r['export_s']:.2f}s"
+        if "load_s" in r:
+            line += f"  读回 {r['load_s']:.2f}s  核对{'一致' if r['verified'] else '不一致'}"
+        lines.append(line)
+    return '\n'.join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='benchmarks.export', description='行情导出基准')
+    parser.add_argument('--days', type=float, default=30)
+    parser.add_argument('--formats', nargs='+', choices=list(SUFFIXES), default=None,
+                        help='默认测试全部可用格式（装有 pyarrow 时包括 parquet）')
+    parser.add_argument('--json', action='store_true', help='输出 JSON')
+    args = parser.parse_args(argv)
+    
+    report = run(args.days, args.formats or available_formats())
+    print(json.dumps(report, ensure_ascii=False, indent=1) if args.json else format_report(report))
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,136 @@
+'''
+    帧耗时基准：大量价格卡片高频刷新时，对比 GlyphText（字形图集）和普通 Label
+
+        python -m benchmarks.frames --cards 20 --rate 10 --seconds 10
+        python -m benchmarks.frames --mode label --json
+        python -m benchmarks.frames --cards 200 --recycle   # 再加一组卡片列表（只创建可见卡片）
+
+    每种方式在单独的进程中运行（Kivy 应用每个进程只能运行一次），不限帧率，
+    统计相邻两帧的间隔和每次刷新全部卡片的耗时。需要能打开窗口的环境。
+'''
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODES = ('glyph', 'label')
+
+def percentiles(values):
+    """耗时（秒）列表 -> 分位数（毫秒）"""
+    values = sorted(values)
+    result = {"count": len(values)}
+    for q in (50, 95, 99):
+        index = min(len(values) - 1, int(q / 100 * (len(values) - 1)))
+        result[f"p{q}_ms"] = values[index] * 1000 if values else 0.0
+    result["max_ms"] = values[-1] * 1000 if values else 0.0
+    return result
+
+def run_mode(mode, cards, rate, seconds, recycle=False):
+    """在本进程中运行一种方式，返回统计结果
+    
+    recycle=True 时用应用里的 PriceCardList 显示 cards 个虚构品种，否则每张卡片一个 PriceDisplay
+    """
+    os.environ.setdefault('KIVY_NO_ARGS', '1')
+    from kivy.config import Config
+    Config.set('graphics', 'maxfps', '0')
+    
+    from kivy.app import App
+    from kivy.clock import Clock
+    from kivy.core.window import Window
+    from kivy.uix.gridlayout import GridLayout
+    from goldcore.config import BANKS
+    from main import PriceDisplay, PriceCardList
+    
+    rng = random.Random(1)
+    names = list(BANKS)
+    frames = []
+    updates = []
+    
+    class FramesApp(App):
+        def build(self):
+            self.displays = []
+            if recycle:
+                banks = {f"品种{i}": {"color": BANKS[names[i % len(names)]]["color"]} for i in range(cards)}
+                root = PriceCardList(banks)
+                for name in banks:
+                    self.displays.append([name, 778.0 + rng.uniform(-2, 2)])
+            else:
+                root = GridLayout(cols=2)
+                for i in range(cards):
+                    display = PriceDisplay(names[i % len(names)], glyphs=(mode == 'glyph'))
+                    self.displays.append([display, 778.0 + rng.uniform(-2, 2)])
+                    root.add_widget(display)
+            self.root_widget = root
+            self.last_flip = None
+            Window.bind(on_flip=self.on_flip)
+            Clock.schedule_interval(self.update, 1 / rate)
+            Clock.schedule_once(lambda dt: self.stop(), seconds)
+            return root
+        
+        def on_flip(self, window):
+            now = time.perf_counter()
+            if self.last_flip is not None:
+                frames.append(now - self.last_flip)
+            self.last_flip = now
+        
+        def update(self, dt):
+            start = time.perf_counter()
+            for item in self.displays:
+                item[1] += rng.choice((-0.01, 0.0, 0.01)) * rng.randint(1, 30)
+                price, change = f"{item[1]:.2f}", f"{item[1] - 778.0:+.2f}"
+                if recycle:
+                    self.root_widget.update_price(item[0], price, change)
+                else:
+                    item[0].update_price(price, change)
+            updates.append(time.perf_counter() - start)
+    
+    FramesApp().run()
+    return {"mode": "recycle" if recycle else mode, "cards": cards, "rate": rate, "seconds": seconds,
+            "frame": percentiles(frames), "update": percentiles(updates)}
+
+def run(cards, rate, seconds, recycle=False):
+    """每种方式启动一个子进程运行；recycle=True 时再加一组卡片列表"""
+    variants = [(mode, False) for mode in MODES] + ([('glyph', True)] if recycle else [])
+    results = []
+    for mode, recycled in variants:
+        output = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.frames', '--mode', mode, '--cards', str(cards),
+             '--rate', str(rate), '--seconds', str(seconds), '--json'] + (['--recycle'] if recycled else []),
+            cwd=APP_DIR, capture_output=True, check=True,
+        ).stdout.decode('utf-8')
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    return results
+
+def format_report(results):
+    lines = [f"{'方式':<8}{'帧数':>8}{'帧p50':>10}{'帧p95':>10}{'帧p99':>10}{'刷新p50':>10}{'刷新p95':>10}  (ms)"]
+    for r in results:
+        frame, update = r["frame"], r["update"]
+        lines.append(f"{r['mode']:<8}{frame['count']:>8}{frame['p50_ms']:>10.2f}{frame['p95_ms']:>10.2f}"
+                     f"{frame['p99_ms']:>10.2f}{update['p50_ms']:>10.2f}{update['p95_ms']:>10.2f}")
+    return '\n'.join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='benchmarks.frames', description='价格卡片帧耗时基准')
+    parser.add_argument('--mode', choices=MODES + ('both',), default='both')
+    parser.add_argument('--cards', type=int, default=20)
+    parser.add_argument('--rate', type=float, default=10, help='每秒刷新次数')
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--recycle', action='store_true', help='卡片列表（只创建可见卡片），与直接摆放全部卡片对比')
+    parser.add_argument('--json', action='store_true', help='输出 JSON')
+    args = parser.parse_args(argv)
+    
+    if args.mode == 'both':
+        results = run(args.cards, args.rate, args.seconds, recycle=args.recycle)
+        print(json.dumps(results, ensure_ascii=False, indent=1) if args.json else format_report(results))
+    else:
+        result = run_mode(args.mode, args.cards, args.rate, args.seconds, args.recycle)
+        print(json.dumps(result, ensure_ascii=False) if args.json else format_report([result]))
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
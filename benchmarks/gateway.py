@@ -0,0 +1,105 @@
+'''
+    行情网关扇出基准：N 个 SSE 订阅者，注入 M 条行情，测量每条行情送达全部订阅者的耗时
+
+        python -m benchmarks.gateway --subscribers 2000 --ticks 200
+
+    订阅者和网关在同一个事件循环中，结果包含订阅端的解析开销，偏保守。
+'''
+
+import argparse
+import asyncio
+import json
+import resource
+import threading
+import time
+
+from goldcore.gateway import Gateway
+from goldcore.ticks import Tick
+
+from .replay import percentile
+
+async def subscriber(port, last_seq, arrivals, ready):
+    """读到最后一条行情为止；读得慢时中间的行情会被网关合并掉"""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(b"GET /events HTTP/1.1\r\nHost: bench\r\n\r\n")
+    ready.release()
+    received = 0
+    while True:
+        line = await reader.readline()
+        if not line:
+            break
+        if line.startswith(b'data:'):
+            seq = int(json.loads(line[5:])["price"])
+            arrivals[seq] = max(arrivals.get(seq, 0.0), time.perf_counter())
+            received += 1
+            if seq == last_seq:
+                break
+    writer.close()
+    return received
+
+async def run_async(subscribers, ticks, interval):
+    gateway = Gateway({"bench": {"price_key": "price", "change_key": "change"}}, host='127.0.0.1', port=0)
+    server_task = asyncio.create_task(gateway.serve(poll=False))
+    while gateway.server is None:
+        await asyncio.sleep(0.01)
+    
+    arrivals = {}
+    ready = asyncio.Semaphore(0)
+    tasks = [asyncio.create_task(subscriber(gateway.port, ticks - 1, arrivals, ready)) for _ in range(subscribers)]
+    for _ in range(subscribers):
+        await ready.acquire()
+    while len(gateway.subscribers) < subscribers:
+        await asyncio.sleep(0.01)
+    
+    sent = {}
+    def inject():
+        # 从其他线程注入，与轮询线程的调用路径相同
+        for seq in range(ticks):
+            sent[seq] = time.perf_counter()
+            gateway._on_price(Tick("bench", seq, None, float(seq), time.time()))
+            time.sleep(interval)
+    started = time.perf_counter()
+    thread = threading.Thread(target=inject)
+    thread.start()
+    received = await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+    thread.join()
+    stats = gateway.stats()
+    gateway.close()
+    await asyncio.sleep(0.1)
+    server_task.cancel()
+    
+    # 每条行情以最后一个收到它的订阅者为准
+    latencies = sorted(arrivals[seq] - sent[seq] for seq in sent if seq in arrivals)
+    return {
+        "subscribers": subscribers,
+        "ticks": ticks,
+        "elapsed_s": elapsed,
+        "deliveries": sum(received),
+        "deliveries_per_s": sum(received) / elapsed if elapsed else 0.0,
+        "fanout_p50_ms": percentile(latencies, 50) * 1000,
+        "fanout_p99_ms": percentile(latencies, 99) * 1000,
+        "conflated": stats["conflated"],
+        "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='benchmarks.gateway', description='行情网关扇出基准')
+    parser.add_argument('--subscribers', type=int, default=1000)
+    parser.add_argument('--ticks', type=int, default=100)
+    parser.add_argument('--interval-ms', type=float, default=10, help='注入行情的间隔')
+    parser.add_argument('--json', action='store_true', help='输出 JSON')
+    args = parser.parse_args(argv)
+    
+    report = asyncio.run(run_async(args.subscribers, args.ticks, args.interval_ms / 1000))
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=1))
+    else:
+        print(f"订阅者 {report['subscribers']}  行情 {report['ticks']}  耗时 {report['elapsed_s']:.2f}s")
+        print(f"送达 {report['deliveries']} 次（{report['deliveries_per_s']:.0f} 次/秒）  合并 {report['conflated']} 条")
+        print(f"送达全部订阅者 p50 {report['fanout_p50_ms']:.1f}ms  p99 {report['fanout_p99_ms']:.1f}ms")
+        print(f"RSS 峰值 {report['max_rss_kb']} KB")
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
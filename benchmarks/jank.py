@@ -0,0 +1,92 @@
+'''
+    卡顿基准：开启帧耗时分析运行应用，定时制造弹窗 + 提醒设置 + 一批价格更新同时到达的情况，
+    输出帧耗时分位数、各回调耗时和最慢的几帧（--json 时另外输出汇总 JSON）
+
+        python -m benchmarks.jank --seconds 30 --burst 50 --out jank.json
+        python -m benchmarks.jank --headless      # 没有显示器时在 xvfb-run 下运行（Linux）
+
+    不连接行情接口，价格由本脚本模拟写入；用户数据目录换成临时目录。
+    导出的 trace 可在 chrome://tracing 或 Perfetto 中打开。
+'''
+
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def run(seconds, interval, burst, out):
+    """在本进程中运行应用，返回帧耗时汇总"""
+    os.environ.setdefault('KIVY_NO_ARGS', '1')
+    os.environ['GOLDPRICE_PROFILE'] = out
+    os.environ['GOLDPRICE_SERVICE'] = 'thread'
+    sys.path.insert(0, APP_DIR)
+    from kivy.clock import Clock
+    from goldcore.config import BANKS
+    from main import GoldPriceApp
+    
+    data_dir = tempfile.mkdtemp(prefix='goldprice-jank-')
+    rng = random.Random(1)
+    names = list(BANKS)
+    
+    class JankApp(GoldPriceApp):
+        @property
+        def user_data_dir(self):
+            return data_dir
+        
+        def start_data_thread(self):
+            Clock.schedule_interval(self.storm, interval)
+            Clock.schedule_once(lambda dt: self.stop(), seconds)
+        
+        def storm(self, dt):
+            """弹窗、打开提醒设置、轮询线程写入一批价格，同一帧内到达"""
+            self.show_popup("金价提醒", "浙商 上涨 778.50 元")
+            popup = self.show_alert_settings(None)
+            Clock.schedule_once(lambda dt: popup.dismiss(), interval / 2)
+            threading.Thread(target=self.publish_burst, daemon=True).start()
+        
+        def publish_burst(self):
+            for _ in range(burst):
+                name = rng.choice(names)
+                price = 778.0 + rng.uniform(-3, 3)
+                self.publish_price(name, f"{price:.2f}", f"{price - 778.0:.2f}")
+                time.sleep(0.001)
+    
+    try:
+        app = JankApp()
+        app.run()
+        return app.profiler.summary()
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='benchmarks.jank', description='界面卡顿基准')
+    parser.add_argument('--seconds', type=float, default=20)
+    parser.add_argument('--interval', type=float, default=2, help='每隔多少秒制造一次集中更新')
+    parser.add_argument('--burst', type=int, default=50, help='每次写入的价格条数')
+    parser.add_argument('--out', default='jank.json', help='trace 导出路径')
+    parser.add_argument('--headless', action='store_true', help='没有 DISPLAY 时在 xvfb-run 下重新运行')
+    parser.add_argument('--json', action='store_true', help='输出 JSON')
+    args = parser.parse_args(argv if argv is not None else sys.argv[1:])
+    
+    if args.headless and not os.environ.get('DISPLAY'):
+        if shutil.which('xvfb-run') is None:
+            parser.error("没有 DISPLAY，且找不到 xvfb-run（apt install xvfb）")
+        argv = [arg for arg in (argv if argv is not None else sys.argv[1:]) if arg != '--headless']
+        return subprocess.call(['xvfb-run', '-a', sys.executable, '-m', 'benchmarks.jank'] + argv, cwd=APP_DIR)
+    
+    # 退出时应用已打印汇总和 trace 路径
+    summary = run(args.seconds, args.interval, args.burst, os.path.abspath(args.out))
+    if args.json:
+        print(json.dumps(summary, ensure_ascii=False, indent=1))
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
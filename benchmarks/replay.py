@@ -0,0 +1,186 @@
+'''
+    回放基准：对本地替身服务跑完整的 抓取 -> 解析 -> 提醒 -> 写历史 流程
+
+        python -m benchmarks.replay --cycles 500
+        python -m benchmarks.replay --cycles 200 --latency-ms 40 --jitter-ms 20 --error-rate 0.05
+        python -m benchmarks.replay --rules 500 --json > bench_output.txt
+        python -m benchmarks.replay --latency-ms 20 --tail-rate 0.05 --tail-ms 500 [--no-hedge]
+
+    输出每秒处理的行情数、各环节耗时分位数和内存占用。
+'''
+
+import argparse
+import json
+import random
+import resource
+import tempfile
+import time
+import tracemalloc
+
+from goldcore.alerts import AlertEngine, UP, DOWN, band_rule, level_rule
+from goldcore.fetcher import PricePoller, build_url
+from goldcore.ticks import TickStore
+
+from .replay_server import ReplayServer
+
+STAGES = ('request', 'parse', 'alert', 'store', 'cycle')
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(q / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+class StageTimer:
+    """按环节收集耗时（秒），list.append 在多线程下是安全的"""
+    def __init__(self):
+        self.samples = {stage: [] for stage in STAGES}
+    
+    def add(self, stage, seconds):
+        self.samples[stage].append(seconds)
+    
+    def summary(self):
+        result = {}
+        for stage, values in self.samples.items():
+            values = sorted(values)
+            result[stage] = {
+                "count": len(values),
+                "p50_ms": percentile(values, 50) * 1000,
+                "p90_ms": percentile(values, 90) * 1000,
+                "p99_ms": percentile(values, 99) * 1000,
+                "max_ms": (values[-1] if values else 0.0) * 1000,
+            }
+        return result
+
+def build_rules(count, seed=1):
+    """生成 count 条随机价位规则，外加一条默认的基准/涨跌提醒"""
+    rng = random.Random(seed)
+    rules = [band_rule("浙商", 778.5, 0.5, 0.5)]
+    for _ in range(count):
+        source = rng.choice(["浙商", "民生"])
+        rules.append(level_rule(source, round(rng.uniform(775, 782), 2), rng.choice([UP, DOWN])))
+    return rules
+
+def run(cycles, latency_ms=0, jitter_ms=0, error_rate=0.0, fail_rate=0.0, rule_count=100, use_gzip=True,
+        tail_rate=0.0, tail_ms=0, hedge=True):
+    server = ReplayServer(latency_ms=latency_ms, jitter_ms=jitter_ms, error_rate=error_rate,
+                          fail_rate=fail_rate, use_gzip=use_gzip, seed=42,
+                          tail_rate=tail_rate, tail_ms=tail_ms).start()
+    banks = server.replay_banks()
+    timer = StageTimer()
+    counters = {"ticks": 0, "errors": 0, "alerts": 0}
+    
+    engine = AlertEngine()
+    for rule in build_rules(rule_count):
+        engine.add(rule)
+    store_dir = tempfile.TemporaryDirectory()
+    store = TickStore(store_dir.name, banks)
+    
+    def on_price(tick):
+        counters["ticks"] += 1
+        start = time.perf_counter()
+        counters["alerts"] += len(engine.update(tick.source, tick.value))
+        middle = time.perf_counter()
+        store.add(tick)
+        timer.add('alert', middle - start)
+        timer.add('store', time.perf_counter() - middle)
+    
+    def on_error(bank_name, message, error):
+        counters["errors"] += 1
+    
+    poller = PricePoller(banks, on_price=on_price, on_error=on_error, hedge=hedge)
+    
+    def timed_fetch(bank_name):
+        # 拆开请求和解析分别计时，其余与 PricePoller.fetch 相同
+        config = banks[bank_name]
+        start = time.perf_counter()
+        body = poller.http.get(build_url(config))
+        middle = time.perf_counter()
+        result = poller.extractors[bank_name](json.loads(body.decode('utf-8')))
+        timer.add('request', middle - start)
+        timer.add('parse', time.perf_counter() - middle)
+        return result
+    
+    poller.fetch = timed_fetch
+    
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        for _ in range(cycles):
+            cycle_start = time.perf_counter()
+            poller.poll()
+            timer.add('cycle', time.perf_counter() - cycle_start)
+    finally:
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        http_stats = poller.http.stats()
+        source_stats = poller.metrics.snapshot()["sources"]
+        poller.stop()
+        server.stop()
+        store.close()
+        store_dir.cleanup()
+    
+    return {
+        "cycles": cycles,
+        "sources": len(banks),
+        "rules": len(engine),
+        "elapsed_s": elapsed,
+        "ticks": counters["ticks"],
+        "ticks_per_s": counters["ticks"] / elapsed if elapsed else 0.0,
+        "errors": counters["errors"],
+        "alerts": counters["alerts"],
+        "suppressed": engine.suppressed,
+        "hedges": sum(s["hedges"] for s in source_stats.values()),
+        "hedge_wins": sum(s["hedge_wins"] for s in source_stats.values()),
+        "breaker_trips": sum(s["breaker_trips"] for s in source_stats.values()),
+        "stages": timer.summary(),
+        "memory": {
+            "python_peak_kb": peak / 1024,
+            "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        },
+        "http": http_stats,
+        "server_requests": server.requests,
+    }
+
+def format_report(report):
+    lines = [
+        f"轮数 {report['cycles']}  数据源 {report['sources']}  规则 {report['rules']}",
+        f"耗时 {report['elapsed_s']:.2f}s  行情 {report['ticks']}  ({report['ticks_per_s']:.1f} 条/秒)"
+        f"  失败 {report['errors']}  提醒 {report['alerts']}  压下 {report['suppressed']}",
+        f"对冲 {report['hedges']}（先返回 {report['hedge_wins']}）  熔断 {report['breaker_trips']} 次",
+        f"{'环节':<8}{'次数':>8}{'p50(ms)':>10}{'p90(ms)':>10}{'p99(ms)':>10}{'max(ms)':>10}",
+    ]
+    for stage, s in report['stages'].items():
+        lines.append(f"{stage:<8}{s['count']:>8}{s['p50_ms']:>10.3f}{s['p90_ms']:>10.3f}"
+                     f"{s['p99_ms']:>10.3f}{s['max_ms']:>10.3f}")
+    memory = report['memory']
+    http = report['http']
+    lines.append(f"内存: Python 峰值 {memory['python_peak_kb']:.0f} KB  RSS 峰值 {memory['max_rss_kb']} KB")
+    lines.append(f"连接: 握手 {http['connections_opened']}  复用 {http['handshakes_avoided']}"
+                 f"  gzip 节省 {http['bytes_saved']} 字节")
+    return '\n'.join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='benchmarks.replay', description='金价抓取回放基准')
+    parser.add_argument('--cycles', type=int, default=200)
+    parser.add_argument('--latency-ms', type=float, default=0)
+    parser.add_argument('--jitter-ms', type=float, default=0)
+    parser.add_argument('--error-rate', type=float, default=0.0, help='HTTP 500 比例')
+    parser.add_argument('--fail-rate', type=float, default=0.0, help='status: FAIL 比例')
+    parser.add_argument('--tail-rate', type=float, default=0.0, help='慢响应比例')
+    parser.add_argument('--tail-ms', type=float, default=0, help='慢响应额外延迟')
+    parser.add_argument('--no-hedge', action='store_true', help='关闭对冲请求')
+    parser.add_argument('--rules', type=int, default=100, help='随机提醒规则数量')
+    parser.add_argument('--no-gzip', action='store_true')
+    parser.add_argument('--json', action='store_true', help='输出 JSON')
+    args = parser.parse_args(argv)
+    
+    report = run(args.cycles, args.latency_ms, args.jitter_ms, args.error_rate,
+                 args.fail_rate, args.rules, not args.no_gzip, args.tail_rate, args.tail_ms,
+                 not args.no_hedge)
+    print(json.dumps(report, ensure_ascii=False, indent=1) if args.json else format_report(report))
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,206 @@
+'''
+    金价接口的本地替身服务
+
+    按顺序循环回放 payloads/ 下录制的接口返回（sku.json / product_id.json），
+    可配置响应延迟、长尾延迟、HTTP 错误率、"status: FAIL" 比例和 gzip 压缩。
+
+        python -m benchmarks.replay_server serve --port 8765 --latency-ms 50
+        python -m benchmarks.replay_server record --count 50
+'''
+
+import argparse
+import gzip
+import itertools
+import json
+import os
+import random
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from goldcore.config import BANKS
+
+PAYLOAD_DIR = os.path.join(os.path.dirname(__file__), 'payloads')
+
+# 数据源 method -> 录制文件
+PAYLOAD_FILES = {"sku": "sku.json", "product_id": "product_id.json"}
+
+FAIL_PAYLOAD = {"resultCode": 0, "resultMsg": "操作成功",
+                "resultData": {"status": "FAIL", "code": "1001", "msg": "系统繁忙"}}
+
+def load_payloads(method, directory=PAYLOAD_DIR):
+    with open(os.path.join(directory, PAYLOAD_FILES[method]), encoding='utf-8') as f:
+        return json.load(f)
+
+class ReplayServer:
+    """回放录制数据的 HTTP 服务（HTTP/1.1，支持长连接）
+    
+    每种接口（method）单独监听一个端口，模拟真实环境中两个数据源在不同主机上；
+    路径为 /<method>，replay_banks() 返回指向本服务的 BANKS 配置。
+    """
+    def __init__(self, host='127.0.0.1', port=0, latency_ms=0, jitter_ms=0,
+                 error_rate=0.0, fail_rate=0.0, use_gzip=True, payload_dir=PAYLOAD_DIR, seed=None,
+                 tail_rate=0.0, tail_ms=0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.tail_rate = tail_rate  # 该比例的请求额外延迟 tail_ms，模拟偶发的慢响应
+        self.tail_ms = tail_ms
+        self.error_rate = error_rate
+        self.fail_rate = fail_rate
+        self.use_gzip = use_gzip
+        self.random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._payloads = {
+            method: itertools.cycle(load_payloads(method, payload_dir)) for method in PAYLOAD_FILES
+        }
+        self.requests = 0
+        self.servers = {}
+        for offset, method in enumerate(PAYLOAD_FILES):
+            httpd = ThreadingHTTPServer((host, port + offset if port else 0), self._handler_class())
+            httpd.daemon_threads = True
+            self.servers[method] = httpd
+        self._threads = []
+    
+    def base_url(self, method):
+        host, port = self.servers[method].server_address[:2]
+        return f"http://{host}:{port}"
+    
+    def replay_banks(self, banks=BANKS):
+        """复制一份 BANKS 配置，把地址换成本服务"""
+        replay = {}
+        for name, config in banks.items():
+            config = dict(config)
+            method = config.get('method', 'sku')
+            config['url'] = f"{self.base_url(method)}/{method}"
+            if config.get('method') != 'product_id':
+                config['url'] += "?productSku=1961543816"
+            replay[name] = config
+        return replay
+    
+    def _next_response(self, method):
+        """返回 (HTTP 状态码, 响应对象)"""
+        with self._lock:
+            self.requests += 1
+            roll = self.random.random()
+            payload = next(self._payloads[method])
+        if roll < self.error_rate:
+            return 500, {"resultCode": 500, "resultMsg": "服务异常"}
+        if roll < self.error_rate + self.fail_rate:
+            return 200, FAIL_PAYLOAD
+        return 200, payload
+    
+    def _delay(self):
+        if self.latency_ms or self.jitter_ms or self.tail_rate:
+            delay = self.latency_ms + self.random.uniform(-self.jitter_ms, self.jitter_ms)
+            if self.random.random() < self.tail_rate:
+                delay += self.tail_ms
+            time.sleep(max(0.0, delay) / 1000)
+    
+    def _handler_class(self):
+        server = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # 响应头和响应体分两次写出，不关 Nagle 会遇到约 40ms 的延迟确认
+            disable_nagle_algorithm = True
+            
+            def do_GET(self):
+                method = self.path.lstrip('/').split('?', 1)[0]
+                if method not in PAYLOAD_FILES:
+                    self.send_error(404)
+                    return
+                server._delay()
+                status, payload = server._next_response(method)
+                body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+                gzipped = server.use_gzip and 'gzip' in self.headers.get('Accept-Encoding', '')
+                if gzipped:
+                    body = gzip.compress(body)
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json;charset=UTF-8')
+                if gzipped:
+                    self.send_header('Content-Encoding', 'gzip')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, format, *args):
+                pass
+        
+        return Handler
+    
+    def start(self):
+        for httpd in self.servers.values():
+            thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+    
+    def stop(self):
+        for httpd in self.servers.values():
+            httpd.shutdown()
+            httpd.server_close()
+
+def record(count, interval, directory=PAYLOAD_DIR):
+    """从真实接口录制 count 轮返回数据，覆盖 payloads/ 下的文件"""
+    from goldcore.fetcher import build_url
+    from goldcore.transport import HttpPool
+    
+    http = HttpPool()
+    recorded = {method: [] for method in PAYLOAD_FILES}
+    for i in range(count):
+        for name, config in BANKS.items():
+            try:
+                body = http.get(build_url(config))
+                recorded[config['method']].append(json.loads(body.decode('utf-8')))
+            except Exception as e:
+                print(f"{name} 录制失败: {e}")
+        print(f"已录制 {i + 1}/{count}")
+        time.sleep(interval)
+    http.close()
+    
+    for method, payloads in recorded.items():
+        if payloads:
+            with open(os.path.join(directory, PAYLOAD_FILES[method]), 'w', encoding='utf-8') as f:
+                json.dump(payloads, f, ensure_ascii=False, indent=1)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='replay_server', description='金价接口本地替身服务')
+    sub = parser.add_subparsers(dest='command', required=True)
+    
+    serve = sub.add_parser('serve', help='启动回放服务')
+    serve.add_argument('--port', type=int, default=8765)
+    serve.add_argument('--latency-ms', type=float, default=0)
+    serve.add_argument('--jitter-ms', type=float, default=0)
+    serve.add_argument('--error-rate', type=float, default=0.0)
+    serve.add_argument('--fail-rate', type=float, default=0.0)
+    serve.add_argument('--tail-rate', type=float, default=0.0)
+    serve.add_argument('--tail-ms', type=float, default=0)
+    serve.add_argument('--no-gzip', action='store_true')
+    
+    rec = sub.add_parser('record', help='从真实接口录制返回数据')
+    rec.add_argument('--count', type=int, default=50)
+    rec.add_argument('--interval', type=float, default=3)
+    
+    args = parser.parse_args(argv)
+    if args.command == 'record':
+        record(args.count, args.interval)
+        return 0
+    
+    server = ReplayServer(port=args.port, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                          error_rate=args.error_rate, fail_rate=args.fail_rate,
+                          use_gzip=not args.no_gzip, tail_rate=args.tail_rate, tail_ms=args.tail_ms)
+    server.start()
+    print("回放服务已启动:")
+    for name, config in server.replay_banks().items():
+        print(f"  {name}: {config['url']}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
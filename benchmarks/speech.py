@@ -0,0 +1,75 @@
+'''
+    语音缓存基准：用占位后端测量从提醒到拿到全部片段音频的耗时
+
+        python -m benchmarks.speech --alerts 500
+
+    first_alert 为空缓存时在当前线程逐个合成第一条提醒全部片段的耗时（lookup 不在调用线程
+    合成，这里直接调用 render），prewarm 为随后同步预热常用片段的耗时，warm 为预热后
+    lookup 的稳定耗时。
+'''
+
+import argparse
+import json
+import random
+import tempfile
+import time
+
+from goldcore.speech import SpeechCache, ToneBackend, speech_fragments
+
+from .replay import percentile
+
+def run(alerts, seed=1):
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory() as directory:
+        cache = SpeechCache(directory, ToneBackend())
+        
+        start = time.perf_counter()
+        for fragment in speech_fragments("涨了", "778.50"):
+            if cache.render(fragment) is None:
+                raise RuntimeError("占位后端应同步生成全部片段")
+        first_alert = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        cache.prewarm()
+        prewarm = time.perf_counter() - start
+        
+        samples = []
+        for _ in range(alerts):
+            price = f"{rng.uniform(770, 790):.2f}"
+            start = time.perf_counter()
+            paths = cache.lookup(speech_fragments(rng.choice(["涨了", "跌了"]), price))
+            samples.append(time.perf_counter() - start)
+            if not paths:
+                raise RuntimeError("占位后端应同步生成全部片段")
+        samples.sort()
+        return {
+            "alerts": alerts,
+            "first_alert_ms": first_alert * 1000,
+            "prewarm_ms": prewarm * 1000,
+            "warm": {
+                "p50_ms": percentile(samples, 50) * 1000,
+                "p99_ms": percentile(samples, 99) * 1000,
+                "max_ms": samples[-1] * 1000,
+            },
+            "cache": cache.stats(),
+        }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='benchmarks.speech', description='语音片段缓存基准')
+    parser.add_argument('--alerts', type=int, default=500)
+    parser.add_argument('--json', action='store_true', help='输出 JSON')
+    args = parser.parse_args(argv)
+    
+    report = run(args.alerts)
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=1))
+    else:
+        warm = report['warm']
+        print(f"第一条提醒（空缓存，同步合成） {report['first_alert_ms']:.2f}ms  同步预热 {report['prewarm_ms']:.2f}ms")
+        print(f"预热后 {report['alerts']} 条: p50 {warm['p50_ms']:.3f}ms  p99 {warm['p99_ms']:.3f}ms"
+              f"  max {warm['max_ms']:.3f}ms")
+        print(f"缓存命中 {report['cache']['hits']}  未命中 {report['cache']['misses']}")
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
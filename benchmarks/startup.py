@@ -0,0 +1,83 @@
+'''
+    启动基准：多次启动应用，统计首帧耗时和内存峰值，对比不同字体
+
+        python -m benchmarks.startup --fonts fonts/msyh.ttc fonts/ui.ttf --runs 5
+
+    每次启动都是新进程（GOLDPRICE_EXIT_AFTER_FIRST_FRAME=1，画出首帧即退出），
+    读取应用打印的 "startup {...}" 行，内存峰值取子进程的 ru_maxrss。需要能打开窗口的环境。
+'''
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def launch(font, timeout=60):
+    """启动一次应用，返回 startup 记录并附上 max_rss_kb"""
+    env = dict(os.environ, GOLDPRICE_EXIT_AFTER_FIRST_FRAME='1', GOLDPRICE_SERVICE='thread')
+    if font:
+        env['GOLDPRICE_FONT'] = os.path.abspath(font)
+    proc = subprocess.Popen([sys.executable, 'main.py'], cwd=APP_DIR, env=env,
+                            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    killer = threading.Timer(timeout, proc.kill)
+    killer.start()
+    try:
+        output = proc.stdout.read()
+        # 用 wait4 回收进程，顺带拿到这一个子进程的资源占用
+        _, status, usage = os.wait4(proc.pid, 0)
+    finally:
+        killer.cancel()
+        proc.stdout.close()
+    
+    record = None
+    for line in output.decode('utf-8', 'replace').splitlines():
+        if line.startswith('startup '):
+            record = json.loads(line[len('startup '):])
+    if record is None:
+        raise RuntimeError(f"应用没有输出首帧耗时（退出状态 {status}）")
+    record["max_rss_kb"] = usage.ru_maxrss
+    return record
+
+def run(fonts, runs):
+    """每种字体启动 runs 次，取中位数"""
+    results = {}
+    for font in fonts:
+        records = [launch(font) for _ in range(runs)]
+        results[font or "默认"] = {
+            "font_bytes": os.path.getsize(font) if font else None,
+            "runs": runs,
+            "first_frame_ms": statistics.median(r["first_frame_ms"] for r in records),
+            "import_ms": statistics.median(r["import_ms"] for r in records),
+            "build_ms": statistics.median(r["build_ms"] for r in records),
+            "max_rss_kb": statistics.median(r["max_rss_kb"] for r in records),
+            "registered": records[-1]["font"],
+        }
+    return results
+
+def format_report(results):
+    lines = [f"{'字体':<24}{'大小(KB)':>10}{'首帧(ms)':>10}{'导入(ms)':>10}{'构建(ms)':>10}{'RSS(KB)':>10}"]
+    for font, r in results.items():
+        size = "--" if r["font_bytes"] is None else f"{r['font_bytes'] / 1024:.0f}"
+        lines.append(f"{font:<24}{size:>10}{r['first_frame_ms']:>10.0f}{r['import_ms']:>10.0f}"
+                     f"{r['build_ms']:>10.0f}{r['max_rss_kb']:>10.0f}")
+    return '\n'.join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='benchmarks.startup', description='应用启动耗时基准')
+    parser.add_argument('--fonts', nargs='*', default=[None],
+                        help='要对比的字体文件，不给则按应用默认顺序选择')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--json', action='store_true', help='输出 JSON')
+    args = parser.parse_args(argv)
+    
+    results = run(args.fonts or [None], args.runs)
+    print(json.dumps(results, ensure_ascii=False, indent=1) if args.json else format_report(results))
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
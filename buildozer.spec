@@ -7,11 +7,17 @@ package.name = goldprice
 package.domain = org.goldmonitor
 source.dir = .
 source.include_exts = py,png,jpg,kv,atlas,ttc,ttf,otf
-source.include_patterns = fonts/*
+# 只打包裁剪过的界面字体（python -m goldcore.fonts subset 生成），完整的 .ttc 不进安装包
+source.include_patterns = fonts/ui.ttf
+source.exclude_patterns = fonts/*.ttc,fonts/*.otf
+source.exclude_dirs = benchmarks
 version = 1.0
 requirements = python3,kivy,android,pyjnius,urllib3,requests,charset_normalizer,idna,certifi
 orientation = portrait
 
+# 轮询服务独立进程运行（见 service/main.py）
+services = Poller:service/main.py:foreground
+
 [buildozer]
 
 log_level = 2
@@ -0,0 +1,54 @@
+'''
+    金价监控核心（无界面）
+    数据源配置、行情抓取与解析、轮询调度、行情历史和提醒判断，
+    不依赖 Kivy，可在脚本、测试和服务端直接使用：
+
+        python -m goldcore          # 命令行持续输出行情
+        python -m goldcore.service  # 独立进程的轮询服务
+        python -m goldcore.gateway  # 行情网关，一处轮询推送给多个订阅者
+        python -m goldcore.backtest ticks/  # 用历史行情回测提醒设置
+        python -m goldcore.export ticks/ month.ticks  # 按列压缩导出行情
+        python -m goldcore.fonts subset fonts/msyh.ttc  # 打包前裁剪界面字体
+
+    子模块按需导入，import goldcore 本身几乎没有开销。
+'''
+
+import importlib
+
+_EXPORTS = {
+    "BANKS": "config",
+    "HttpPool": "transport",
+    "PollScheduler": "scheduler",
+    "is_trading_time": "scheduler",
+    "PricePoller": "fetcher",
+    "CircuitBreaker": "breaker",
+    "fetch_bank": "fetcher",
+    "parse_response": "fetcher",
+    "build_extractor": "fetcher",
+    "TickStore": "ticks",
+    "Tick": "ticks",
+    "check_band": "alerts",
+    "AlertEngine": "alerts",
+    "AppState": "state",
+    "Analytics": "stats",
+    "CandleAggregator": "candles",
+    "SpeechCache": "speech",
+    "PriceService": "service",
+    "ServiceClient": "service",
+    "Gateway": "gateway",
+    "GatewayFeed": "gateway",
+    "backtest_band": "backtest",
+    "export_ticks": "export",
+    "load_export": "export",
+    "FrameProfiler": "profiler",
+}
+
+__all__ = list(_EXPORTS)
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
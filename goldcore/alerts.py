@@ -0,0 +1,347 @@
+'''
+    价格提醒：单条区间判断 + 多规则提醒引擎
+'''
+
+import json
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+from collections import OrderedDict, namedtuple
+
+from .config import ALERT_HYSTERESIS, ALERT_REARM_INTERVAL, ALERT_QUEUE_SIZE
+
+UP = "涨了"
+DOWN = "跌了"
+
+def check_band(current, base, up, down):
+    """价格涨到 基准+涨幅 返回 "涨了"，跌到 基准-跌幅 返回 "跌了"，否则返回 None"""
+    if current >= base + up:
+        return UP
+    if current <= base - down:
+        return DOWN
+    return None
+
+def band_distance(current, base, up, down):
+    """当前价格距离最近一条提醒线的金额"""
+    return min(base + up - current, current - (base - down))
+
+def spread_key(source_a, source_b):
+    """两个数据源价差（a - b）的索引键"""
+    return f"{source_a}-{source_b}"
+
+def zscore_key(key, window):
+    """某个序列（数据源或价差）在某个滚动窗口上的 z 分数的索引键"""
+    return f"z:{key}:{window}"
+
+class AlertRule:
+    """一条提醒规则：key 对应的价格涨到 upper 或跌到 lower 时触发
+    
+    key 为数据源名称，或 spread_key() 生成的价差键（此时 spread 为 (a, b)），
+    或 zscore_key() 生成的 z 分数键（由 Analytics 计算后通过 update_key() 送入）。
+    rebase=(涨幅, 跌幅) 时触发后以当前价格为新基准重新设置两条线；
+    repeat=True 时价格回到线内后重新生效；两者都没有则只触发一次。
+    """
+    def __init__(self, key, upper=None, lower=None, rebase=None, repeat=False, name=None, spread=None, unit="元"):
+        self.key = key
+        self.unit = unit
+        self.spread = spread
+        self.upper = upper
+        self.lower = lower
+        self.rebase = rebase
+        self.repeat = repeat
+        self.name = name  # 提醒文字前缀，None 表示默认的浙商提醒
+        self.id = None
+        self.last_fired = None  # time.monotonic()
+    
+    def __repr__(self):
+        return f"AlertRule({self.key!r}, upper={self.upper}, lower={self.lower}, name={self.name!r})"
+
+def level_rule(source, level, direction, repeat=True, name=None):
+    """价格涨到（direction=UP）或跌到（direction=DOWN）某个价位"""
+    if direction == UP:
+        return AlertRule(source, upper=level, repeat=repeat, name=name or source)
+    return AlertRule(source, lower=level, repeat=repeat, name=name or source)
+
+def percent_rule(source, base, up_percent=None, down_percent=None, name=None):
+    """相对基准价格涨跌超过一定百分比（只触发一次）"""
+    upper = base * (1 + up_percent / 100) if up_percent else None
+    lower = base * (1 - down_percent / 100) if down_percent else None
+    return AlertRule(source, upper=upper, lower=lower, name=name or source)
+
+def band_rule(source, base, up, down, name=None):
+    """原有的 基准/涨多少/跌多少 提醒：触发后以当前价格为新基准"""
+    return AlertRule(source, upper=base + up, lower=base - down, rebase=(up, down), name=name)
+
+def spread_rule(source_a, source_b, upper=None, lower=None, repeat=True, name=None):
+    """两个数据源的价差（a - b）涨到 upper 或跌到 lower"""
+    key = spread_key(source_a, source_b)
+    return AlertRule(key, upper=upper, lower=lower, repeat=repeat, name=name or f"{key}价差",
+                     spread=(source_a, source_b))
+
+def zscore_rule(key, window, upper=None, lower=None, repeat=True, name=None):
+    """序列（数据源或价差键）偏离 window 秒滚动均值超过 upper / lower 个标准差"""
+    return AlertRule(zscore_key(key, window), upper=upper, lower=lower, repeat=repeat,
+                     name=name or f"{key}偏离", unit="倍标准差")
+
+AlertEvent = namedtuple('AlertEvent', 'rule direction price')
+
+def alert_message(event, price_text=None):
+    """提醒文字，如 "涨了，现在778.5元"；price_text 为接口返回的原始价格文本"""
+    prefix = event.rule.name or ""
+    return f"{prefix}{event.direction}，现在{price_text or event.price}{event.rule.unit}"
+
+class _KeyIndex:
+    """单个价格序列上的规则索引
+    
+    已生效的上沿/下沿按价位排序，一次报价只需二分找到被穿越的那一段：
+    上沿中价位 <= 当前价的是前缀，下沿中价位 >= 当前价的是后缀。
+    已触发、等待价格回到线内的可重复规则放在 waiting 列表中，同样按价位排序。
+    """
+    def __init__(self):
+        self.armed_up = []  # [(价位, 规则id)]
+        self.armed_down = []
+        self.waiting_up = []
+        self.waiting_down = []
+    
+    @staticmethod
+    def _discard(entries, entry):
+        i = bisect_left(entries, entry)
+        if i < len(entries) and entries[i] == entry:
+            del entries[i]
+    
+    def add(self, rule):
+        if rule.upper is not None:
+            insort(self.armed_up, (rule.upper, rule.id))
+        if rule.lower is not None:
+            insort(self.armed_down, (rule.lower, rule.id))
+    
+    def remove(self, rule):
+        if rule.upper is not None:
+            self._discard(self.armed_up, (rule.upper, rule.id))
+            self._discard(self.waiting_up, (rule.upper, rule.id))
+        if rule.lower is not None:
+            self._discard(self.armed_down, (rule.lower, rule.id))
+            self._discard(self.waiting_down, (rule.lower, rule.id))
+    
+    def rearm(self, rule, direction):
+        """把刚穿越的一侧放回生效列表"""
+        if direction == UP:
+            insort(self.armed_up, (rule.upper, rule.id))
+        else:
+            insort(self.armed_down, (rule.lower, rule.id))
+    
+    def cross(self, price, hysteresis=0.0):
+        """返回本次报价穿越的 (方向, 规则id) 列表，并把它们移出生效列表"""
+        # 价格回到线内超过 hysteresis 的可重复规则重新生效，避免在线附近来回触发
+        i = bisect_right(self.waiting_up, (price + hysteresis, float('inf')))
+        for entry in self.waiting_up[i:]:
+            insort(self.armed_up, entry)
+        del self.waiting_up[i:]
+        i = bisect_left(self.waiting_down, (price - hysteresis, float('-inf')))
+        for entry in self.waiting_down[:i]:
+            insort(self.armed_down, entry)
+        del self.waiting_down[:i]
+        
+        crossed = []
+        i = bisect_right(self.armed_up, (price, float('inf')))
+        if i:
+            crossed.extend((UP, rule_id) for _, rule_id in self.armed_up[:i])
+            del self.armed_up[:i]
+        i = bisect_left(self.armed_down, (price, float('-inf')))
+        if i < len(self.armed_down):
+            crossed.extend((DOWN, rule_id) for _, rule_id in self.armed_down[i:])
+            del self.armed_down[i:]
+        return crossed
+    
+    def distance(self, price):
+        """当前价格距离最近一条生效提醒线的金额，没有规则时为 None"""
+        distances = []
+        if self.armed_up:
+            distances.append(self.armed_up[0][0] - price)
+        if self.armed_down:
+            distances.append(price - self.armed_down[-1][0])
+        return min(distances) if distances else None
+
+class AlertEngine:
+    """多规则提醒引擎
+    
+    规则按价格序列（数据源或价差）分别建立有序索引，每次报价只处理
+    被穿越的提醒线：二分查找定位 O(log n)，触发/重新生效的规则在有序列表间移动，
+    列表插入删除本身是 O(n) 的内存搬移，但没有规则被穿越时只有查找的开销。
+    update() 在轮询线程中调用，add()/remove() 可在任意线程调用。
+    
+    防抖：可重复规则要回到线内 hysteresis 以上才重新生效；同一规则距上次
+    触发不足 rearm_interval 秒时不提醒，规则保持生效，间隔过后价格仍在线外
+    就以最新价格触发一次。被压下的次数记在 suppressed 中。
+    """
+    def __init__(self, hysteresis=ALERT_HYSTERESIS, rearm_interval=ALERT_REARM_INTERVAL):
+        self._lock = threading.Lock()
+        self.hysteresis = hysteresis
+        self.rearm_interval = rearm_interval
+        self.suppressed = 0
+        self._next_id = 1
+        self._rules = {}
+        self._index = {}
+        self._spreads = {}  # 数据源 -> [(价差键, a, b)]
+        self.latest = {}  # 每个价格序列的最新值
+    
+    def __len__(self):
+        return len(self._rules)
+    
+    def add(self, rule):
+        """添加规则，返回规则 id"""
+        with self._lock:
+            rule.id = self._next_id
+            self._next_id += 1
+            self._rules[rule.id] = rule
+            self._index.setdefault(rule.key, _KeyIndex()).add(rule)
+            if rule.spread is not None:
+                source_a, source_b = rule.spread
+                for source in rule.spread:
+                    spreads = self._spreads.setdefault(source, [])
+                    if (rule.key, source_a, source_b) not in spreads:
+                        spreads.append((rule.key, source_a, source_b))
+            return rule.id
+    
+    def remove(self, rule_id):
+        with self._lock:
+            rule = self._rules.pop(rule_id, None)
+            if rule is not None:
+                self._index[rule.key].remove(rule)
+    
+    def rules(self):
+        with self._lock:
+            return list(self._rules.values())
+    
+    def _evaluate(self, key, price, now):
+        self.latest[key] = price
+        index = self._index.get(key)
+        if index is None:
+            return []
+        events = []
+        handled = set()
+        for direction, rule_id in index.cross(price, self.hysteresis):
+            rule = self._rules.get(rule_id)
+            if rule is None or rule_id in handled:
+                continue
+            handled.add(rule_id)
+            if rule.last_fired is not None and now - rule.last_fired < self.rearm_interval:
+                index.rearm(rule, direction)
+                self.suppressed += 1
+                continue
+            rule.last_fired = now
+            events.append(AlertEvent(rule, direction, price))
+            if rule.rebase is not None:
+                # 以当前价格为新基准重新设置两条线
+                index.remove(rule)
+                up, down = rule.rebase
+                rule.upper = price + up
+                rule.lower = price - down
+                index.add(rule)
+            elif rule.repeat:
+                entry = (rule.upper, rule_id) if direction == UP else (rule.lower, rule_id)
+                insort(index.waiting_up if direction == UP else index.waiting_down, entry)
+            else:
+                index.remove(rule)
+                del self._rules[rule_id]
+        return events
+    
+    def update(self, source, price, now=None):
+        """处理一条报价，返回触发的 AlertEvent 列表"""
+        if now is None:
+            now = time.monotonic()
+        with self._lock:
+            events = self._evaluate(source, price, now)
+            for key, source_a, source_b in self._spreads.get(source, ()):
+                if source_a in self.latest and source_b in self.latest:
+                    spread = round(self.latest[source_a] - self.latest[source_b], 6)
+                    events.extend(self._evaluate(key, spread, now))
+            return events
+    
+    def update_key(self, key, value, now=None):
+        """直接送入某个序列的新值（如 z 分数），只判断该序列上的规则"""
+        if key not in self._index:
+            return []
+        if now is None:
+            now = time.monotonic()
+        with self._lock:
+            return self._evaluate(key, value, now)
+    
+    def distance(self, key, price=None):
+        """价格距离该序列最近一条提醒线的金额，没有规则时为 None"""
+        with self._lock:
+            index = self._index.get(key)
+            if price is None:
+                price = self.latest.get(key)
+            if index is None or price is None:
+                return None
+            return index.distance(price)
+
+class AlertQueue:
+    """待发出的提醒（通知、语音），轮询线程放入，界面线程取出
+    
+    同一 key（通常是规则 id）还没发出的提醒只保留最新一条；
+    超过 maxlen 时丢弃最旧的，界面卡顿时不会积压。
+    """
+    def __init__(self, maxlen=ALERT_QUEUE_SIZE):
+        self._lock = threading.Lock()
+        self._items = OrderedDict()
+        self.maxlen = maxlen
+        self.collapsed = 0  # 被同规则更新的提醒替换掉的条数
+        self.dropped = 0  # 队列满时丢弃的条数
+    
+    def __len__(self):
+        return len(self._items)
+    
+    def put(self, key, item):
+        with self._lock:
+            if key in self._items:
+                del self._items[key]
+                self.collapsed += 1
+            elif len(self._items) >= self.maxlen:
+                self._items.popitem(last=False)
+                self.dropped += 1
+            self._items[key] = item
+    
+    def drain(self):
+        """取出全部待发提醒（按放入顺序）"""
+        with self._lock:
+            items = list(self._items.values())
+            self._items.clear()
+            return items
+
+def _optional_float(value):
+    return None if value is None else float(value)
+
+def rule_from_dict(data):
+    """从配置字典创建规则，例如：
+        {"type": "level", "source": "民生", "level": 780, "direction": "up"}
+        {"type": "percent", "source": "浙商", "base": 770, "up": 1.5, "down": 1.5}
+        {"type": "band", "source": "浙商", "base": 770, "up": 2, "down": 2}
+        {"type": "spread", "a": "浙商", "b": "民生", "upper": 3, "lower": -3}
+        {"type": "zscore", "a": "浙商", "b": "民生", "window": 300, "upper": 2, "lower": -2}
+        {"type": "zscore", "source": "浙商", "window": 60, "upper": 3}
+    """
+    kind = data.get('type')
+    name = data.get('name')
+    if kind == 'level':
+        direction = UP if data.get('direction', 'up') == 'up' else DOWN
+        return level_rule(data['source'], float(data['level']), direction, data.get('repeat', True), name)
+    if kind == 'percent':
+        return percent_rule(data['source'], float(data['base']), _optional_float(data.get('up')),
+                            _optional_float(data.get('down')), name)
+    if kind == 'band':
+        return band_rule(data['source'], float(data['base']), float(data.get('up', 0)), float(data.get('down', 0)), name)
+    if kind == 'spread':
+        return spread_rule(data['a'], data['b'], _optional_float(data.get('upper')),
+                           _optional_float(data.get('lower')), data.get('repeat', True), name)
+    if kind == 'zscore':
+        key = data['source'] if 'source' in data else spread_key(data['a'], data['b'])
+        return zscore_rule(key, int(data['window']), _optional_float(data.get('upper')),
+                           _optional_float(data.get('lower')), data.get('repeat', True), name)
+    raise ValueError(f"未知的提醒规则类型: {kind}")
+
+def load_rules(path):
+    """读取 JSON 规则文件（规则字典的列表）"""
+    with open(path, encoding='utf-8') as f:
+        return [rule_from_dict(item) for item in json.load(f)]
@@ -0,0 +1,162 @@
+'''
+    提醒回测：用记录下来的行情历史，离线评估 基准/涨多少/跌多少 设置会触发几次、在什么时候
+
+        python -m goldcore.backtest ~/.goldprice/ticks --source 浙商 --up 0.5 1 2 --down 0.5 1 2
+        python -m goldcore.backtest ticks/ --base 778 --up 1 --down 1 --events
+
+    语义与应用中的提醒相同：触发后以当前价格为新基准，同一规则两次提醒至少间隔 rearm 秒
+    （间隔内越线不提醒也不换基准，间隔过后价格仍在线外就以最新价格触发）。
+    装有 NumPy 时按块向量化查找越线位置，百万级行情几秒内完成；否则逐条计算。
+'''
+
+import argparse
+import json
+import os
+import time
+from array import array
+
+from .config import BANKS, ALERT_REARM_INTERVAL
+from .alerts import UP, DOWN
+from .ticks import TICK_RECORD, TICK_DTYPE, log_path, parse_date
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+SCAN_BLOCK = 256  # 向量化查找的初始块大小，找不到时逐块加倍
+
+def load_ticks(directory, source, start=None, end=None, banks=BANKS):
+    """读取某个数据源 [start, end) 内的行情，返回 (时间戳, 价格) 两列
+    
+    有 NumPy 时用内存映射读取，返回 ndarray；否则返回 array('d')。
+    """
+    path = log_path(directory, source, banks)
+    count = os.path.getsize(path) // TICK_RECORD.size
+    if np is not None:
+        if not count:
+            return np.empty(0), np.empty(0)
+        records = np.memmap(path, dtype=TICK_DTYPE, mode='r', shape=(count,))
+        timestamps = records['timestamp']
+        first = 0 if start is None else int(np.searchsorted(timestamps, start, 'left'))
+        last = count if end is None else int(np.searchsorted(timestamps, end, 'left'))
+        return (np.ascontiguousarray(timestamps[first:last]),
+                np.ascontiguousarray(records['price'][first:last]))
+    
+    timestamps, prices = array('d'), array('d')
+    with open(path, 'rb') as f:
+        data = f.read(count * TICK_RECORD.size)
+    for timestamp, price, _ in TICK_RECORD.iter_unpack(data):
+        if (start is None or timestamp >= start) and (end is None or timestamp < end):
+            timestamps.append(timestamp)
+            prices.append(price)
+    return timestamps, prices
+
+def _first_cross_numpy(prices, i, upper, lower):
+    """从 i 开始第一个 >= upper 或 <= lower 的位置，没有返回 -1"""
+    n = len(prices)
+    size = SCAN_BLOCK
+    while i < n:
+        chunk = prices[i:i + size]
+        hits = np.flatnonzero((chunk >= upper) | (chunk <= lower))
+        if hits.size:
+            return i + int(hits[0])
+        i += size
+        size *= 2
+    return -1
+
+def _first_cross_python(prices, i, upper, lower):
+    for j in range(i, len(prices)):
+        price = prices[j]
+        if price >= upper or price <= lower:
+            return j
+    return -1
+
+def backtest_band(timestamps, prices, base, up, down, rearm_interval=ALERT_REARM_INTERVAL):
+    """回放一组 基准/涨/跌 设置，返回触发记录 [(时间戳, 方向, 价格)]"""
+    vectorized = np is not None and isinstance(prices, np.ndarray)
+    first_cross = _first_cross_numpy if vectorized else _first_cross_python
+    events = []
+    i = 0
+    last_fired = None
+    while i < len(prices):
+        if last_fired is not None and rearm_interval:
+            # 距上次提醒不足 rearm_interval 的行情不会触发，直接跳过
+            if vectorized:
+                i = max(i, int(np.searchsorted(timestamps, last_fired + rearm_interval, 'left')))
+            else:
+                while i < len(timestamps) and timestamps[i] < last_fired + rearm_interval:
+                    i += 1
+        upper = base + up
+        lower = base - down
+        j = first_cross(prices, i, upper, lower)
+        if j < 0:
+            break
+        price = float(prices[j])
+        events.append((float(timestamps[j]), UP if price >= upper else DOWN, price))
+        base = price
+        last_fired = timestamps[j]
+        i = j + 1
+    return events
+
+def sweep(timestamps, prices, base, ups, downs, rearm_interval=ALERT_REARM_INTERVAL):
+    """对每个 (涨, 跌) 组合回测，返回结果列表"""
+    results = []
+    for up in ups:
+        for down in downs:
+            events = backtest_band(timestamps, prices, base, up, down, rearm_interval)
+            results.append({
+                "up": up,
+                "down": down,
+                "alerts": len(events),
+                "up_alerts": sum(1 for _, direction, _ in events if direction == UP),
+                "down_alerts": sum(1 for _, direction, _ in events if direction == DOWN),
+                "events": events,
+            })
+    return results
+
+def _format_time(timestamp):
+    return time.strftime('%m-%d %H:%M:%S', time.localtime(timestamp))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='goldcore.backtest', description='提醒设置回测')
+    parser.add_argument('directory', help='行情历史目录（ticks_<id>.bin 所在目录）')
+    parser.add_argument('--source', default='浙商', choices=list(BANKS))
+    parser.add_argument('--base', type=float, help='初始基准价格，默认取区间内第一条行情')
+    parser.add_argument('--up', type=float, nargs='+', default=[1.0], help='涨多少(元)提醒，可给多个')
+    parser.add_argument('--down', type=float, nargs='+', default=[1.0], help='跌多少(元)提醒，可给多个')
+    parser.add_argument('--rearm', type=float, default=ALERT_REARM_INTERVAL, help='两次提醒最短间隔（秒）')
+    parser.add_argument('--since', type=parse_date, help='开始时间，如 2026-05-01 或 "2026-05-01 09:30"')
+    parser.add_argument('--until', type=parse_date, help='结束时间（不含）')
+    parser.add_argument('--events', action='store_true', help='列出每次提醒的时间和价格')
+    parser.add_argument('--json', action='store_true', help='输出 JSON')
+    args = parser.parse_args(argv)
+    
+    started = time.perf_counter()
+    timestamps, prices = load_ticks(args.directory, args.source, args.since, args.until)
+    if not len(prices):
+        print("区间内没有行情")
+        return 1
+    base = args.base if args.base is not None else float(prices[0])
+    results = sweep(timestamps, prices, base, args.up, args.down, args.rearm)
+    elapsed = time.perf_counter() - started
+    
+    if args.json:
+        print(json.dumps({"source": args.source, "ticks": len(prices), "base": base,
+                          "elapsed_s": elapsed, "results": results}, ensure_ascii=False))
+        return 0
+    
+    print(f"{args.source} 行情 {len(prices)} 条  {_format_time(timestamps[0])} ~ {_format_time(timestamps[-1])}"
+          f"  基准 {base}  耗时 {elapsed:.2f}s{'' if np is not None else '（未安装 NumPy）'}")
+    print(f"{'涨':>6}{'跌':>6}{'提醒':>8}{'涨了':>6}{'跌了':>6}  首次提醒")
+    for result in results:
+        first = _format_time(result["events"][0][0]) if result["events"] else "--"
+        print(f"{result['up']:>6g}{result['down']:>6g}{result['alerts']:>8}"
+              f"{result['up_alerts']:>6}{result['down_alerts']:>6}  {first}")
+        if args.events:
+            for timestamp, direction, price in result["events"]:
+                print(f"      {_format_time(timestamp)}  {direction}  {price}")
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,105 @@
+'''
+    数据源熔断和对冲请求的耗时统计
+'''
+
+import threading
+import time
+from collections import deque
+
+from .config import (
+    BREAKER_FAILURES, BREAKER_COOLDOWN, BREAKER_COOLDOWN_MAX,
+    HEDGE_PERCENTILE, HEDGE_WINDOW, HEDGE_MIN_SAMPLES, HEDGE_MIN_DELAY,
+)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+STATE_NAMES = {CLOSED: "正常", OPEN: "暂停", HALF_OPEN: "探测中"}
+
+class CircuitBreaker:
+    """单个数据源的熔断器
+    
+    连续失败 failures 次后进入 open，cooldown 秒内不再请求；
+    到期后放行一个探测请求（half_open），成功则恢复，失败则暂停时长加倍。
+    """
+    def __init__(self, failures=BREAKER_FAILURES, cooldown=BREAKER_COOLDOWN, cooldown_max=BREAKER_COOLDOWN_MAX):
+        self.failures = failures
+        self.base_cooldown = cooldown
+        self.cooldown_max = cooldown_max
+        self.cooldown = cooldown
+        self.state = CLOSED
+        self.consecutive = 0
+        self.opened_at = 0.0
+        self.trips = 0  # 进入 open 的次数
+        self._lock = threading.Lock()
+    
+    def allow(self, now=None):
+        """本次是否可以请求；open 到期时转为 half_open 并只放行这一次"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and now - self.opened_at >= self.cooldown:
+                self.state = HALF_OPEN
+                return True
+            return False
+    
+    def remaining(self, now=None):
+        """距离下次探测的秒数"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if self.state != OPEN:
+                return 0.0
+            return max(0.0, self.opened_at + self.cooldown - now)
+    
+    def record_success(self):
+        """返回 True 表示从熔断中恢复"""
+        with self._lock:
+            recovered = self.state != CLOSED
+            self.state = CLOSED
+            self.consecutive = 0
+            self.cooldown = self.base_cooldown
+            return recovered
+    
+    def record_failure(self, now=None):
+        """返回 True 表示这次失败让熔断器（重新）进入 open"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self.consecutive += 1
+            if self.state == HALF_OPEN:
+                self.cooldown = min(self.cooldown_max, self.cooldown * 2)
+            elif self.state == OPEN or self.consecutive < self.failures:
+                return False
+            self.state = OPEN
+            self.opened_at = now
+            self.trips += 1
+            return True
+    
+    def snapshot(self, now=None):
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive,
+            "trips": self.trips,
+            "retry_in_s": round(self.remaining(now), 1),
+        }
+
+class RecentLatency:
+    """最近 window 次请求的耗时，用来决定何时发出对冲请求"""
+    def __init__(self, window=HEDGE_WINDOW, percentile=HEDGE_PERCENTILE,
+                 min_samples=HEDGE_MIN_SAMPLES, min_delay=HEDGE_MIN_DELAY):
+        self.samples = deque(maxlen=window)
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+    
+    def add(self, seconds):
+        self.samples.append(seconds)
+    
+    def hedge_delay(self):
+        """请求发出多少秒后仍未返回就再发一个，样本不足或已关闭时返回 None"""
+        if self.percentile is None or len(self.samples) < max(1, self.min_samples):
+            return None
+        values = sorted(self.samples)
+        index = min(len(values) - 1, int(self.percentile / 100 * (len(values) - 1)))
+        return max(self.min_delay, values[index])
@@ -0,0 +1,125 @@
+'''
+    报价缓存：各数据源最新报价、新鲜度和正在进行的请求
+'''
+
+import threading
+import time
+
+from .config import PRICE_CACHE_TTL
+
+class Quote:
+    """一条缓存的报价（价格、涨跌为 Decimal，涨跌缺失时为 None）"""
+    __slots__ = ("source", "price", "change", "fetched", "time")
+    
+    def __init__(self, source, price, change, fetched, wall_time):
+        self.source = source
+        self.price = price
+        self.change = change
+        self.fetched = fetched  # time.monotonic()
+        self.time = wall_time  # time.time()，用于显示
+    
+    def age(self, now=None):
+        return (time.monotonic() if now is None else now) - self.fetched
+    
+    def to_dict(self, ttl=PRICE_CACHE_TTL):
+        age = self.age()
+        return {"source": self.source, "price": str(self.price),
+                "change": "--" if self.change is None else str(self.change),
+                "time": self.time, "age": round(age, 3), "stale": age >= ttl}
+
+class PriceCache:
+    """各数据源的报价缓存
+    
+    轮询线程每拿到一条报价就 put()，其余读取方都从这里读：
+      - 不超过 ttl 秒的报价视为最新，直接返回，不再发请求；
+      - 过期的报价照样先返回，同时由调用方安排一次刷新（stale-while-revalidate）；
+      - 同一数据源同时只允许一个请求在路上（begin/finish），
+        期间的刷新请求都合并到这一个，需要结果的可以 wait()。
+    """
+    def __init__(self, ttl=PRICE_CACHE_TTL):
+        self.ttl = ttl
+        self._cond = threading.Condition()
+        self._quotes = {}
+        self._inflight = set()
+        self._finished = {}  # 数据源 -> 最近一次请求结束的 time.monotonic()
+        self.hits = 0  # 读到新鲜报价
+        self.stale_hits = 0  # 读到过期报价（已安排刷新）
+        self.misses = 0  # 没有报价
+        self.coalesced = 0  # 因为已有请求在路上而省掉的请求
+    
+    def put(self, tick):
+        """记下一条 ticks.Tick"""
+        with self._cond:
+            self._quotes[tick.source] = Quote(tick.source, tick.price, tick.change, time.monotonic(), tick.time)
+            self._cond.notify_all()
+    
+    def get(self, source):
+        """返回缓存的报价（可能已过期），没有时返回 None，不计入命中统计"""
+        with self._cond:
+            return self._quotes.get(source)
+    
+    def begin(self, source):
+        """登记对 source 的请求；已有请求在路上时返回 False，调用方不应再发"""
+        with self._cond:
+            if source in self._inflight:
+                self.coalesced += 1
+                return False
+            self._inflight.add(source)
+            return True
+    
+    def finish(self, source):
+        """请求结束（无论成败），唤醒等待结果的读取方"""
+        with self._cond:
+            self._inflight.discard(source)
+            self._finished[source] = time.monotonic()
+            self._cond.notify_all()
+    
+    def needs_refresh(self, source, max_age=None):
+        """报价过期且没有请求在路上时返回 True（需要安排一次请求）"""
+        with self._cond:
+            quote = self._quotes.get(source)
+            max_age = self.ttl if max_age is None else max_age
+            if quote is not None and quote.age() < max_age:
+                return False
+            if source in self._inflight:
+                self.coalesced += 1
+                return False
+            return True
+    
+    def read(self, source, max_age=None):
+        """读取报价并统计命中，返回 (报价或 None, 是否需要刷新)"""
+        with self._cond:
+            quote = self._quotes.get(source)
+            max_age = self.ttl if max_age is None else max_age
+            if quote is None:
+                self.misses += 1
+            elif quote.age() < max_age:
+                self.hits += 1
+                return quote, False
+            else:
+                self.stale_hits += 1
+            if source in self._inflight:
+                self.coalesced += 1
+                return quote, False
+            return quote, True
+    
+    def wait(self, source, after, timeout):
+        """等到 after（time.monotonic()）之后有了新报价或 source 的请求结束，返回最新报价
+        
+        请求失败或超时时返回旧报价（可能为 None）
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                quote = self._quotes.get(source)
+                if (quote is not None and quote.fetched >= after) or self._finished.get(source, 0.0) >= after:
+                    return quote
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return quote
+                self._cond.wait(remaining)
+    
+    def stats(self):
+        with self._cond:
+            return {"hits": self.hits, "stale_hits": self.stale_hits, "misses": self.misses,
+                    "coalesced": self.coalesced, "inflight": sorted(self._inflight)}
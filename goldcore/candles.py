@@ -0,0 +1,145 @@
+'''
+    K 线：各数据源多个周期的 OHLC，随行情逐条增量更新
+'''
+
+from array import array
+
+from .config import CANDLE_RESOLUTIONS, CANDLE_CAPACITY, CANDLE_DAY_OFFSET
+
+CANDLE_FIELDS = ("start", "open", "high", "low", "close", "count")
+
+class CandleSeries:
+    """单个周期的 K 线：当前未收盘的一根 + 定长环形缓冲中的已收盘 K 线
+    
+    已收盘的 K 线按列存放在 array 中（同 TickRing），写满后覆盖最旧的；
+    每条行情只更新当前 K 线，跨周期时把它写入缓冲，单条行情 O(1)。
+    周期按 (时间戳 + offset) 对齐，offset 为 8 小时时日线按北京时间零点切分。
+    没有行情的周期不补 K 线。
+    """
+    def __init__(self, resolution, capacity=CANDLE_CAPACITY, offset=CANDLE_DAY_OFFSET):
+        self.resolution = resolution
+        self.capacity = capacity
+        self.offset = offset
+        self.starts = array('d', [0.0]) * capacity
+        self.opens = array('d', [0.0]) * capacity
+        self.highs = array('d', [0.0]) * capacity
+        self.lows = array('d', [0.0]) * capacity
+        self.closes = array('d', [0.0]) * capacity
+        self.counts = array('l', [0]) * capacity
+        self.head = 0  # 下一条写入位置
+        self.count = 0
+        # 当前 K 线
+        self.bucket = None  # 周期序号，用整数比较避免浮点误差
+        self.open = self.high = self.low = self.close = 0.0
+        self.ticks = 0
+    
+    def __len__(self):
+        """已收盘的 K 线数"""
+        return self.count
+    
+    def start_of(self, bucket):
+        return float(bucket * self.resolution - self.offset)
+    
+    def update(self, timestamp, price):
+        """计入一条行情，返回刚收盘的 K 线（没有收盘时返回 None）
+        
+        早于当前 K 线的行情（时间回退）直接丢弃。
+        """
+        bucket = int((timestamp + self.offset) // self.resolution)
+        if bucket == self.bucket:
+            if price > self.high:
+                self.high = price
+            elif price < self.low:
+                self.low = price
+            self.close = price
+            self.ticks += 1
+            return None
+        closed = None
+        if self.bucket is not None:
+            if bucket < self.bucket:
+                return None
+            closed = self.current()
+            self._push()
+        self.bucket = bucket
+        self.open = self.high = self.low = self.close = price
+        self.ticks = 1
+        return closed
+    
+    def _push(self):
+        i = self.head
+        self.starts[i] = self.start_of(self.bucket)
+        self.opens[i] = self.open
+        self.highs[i] = self.high
+        self.lows[i] = self.low
+        self.closes[i] = self.close
+        self.counts[i] = self.ticks
+        self.head = (i + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+    
+    def __getitem__(self, index):
+        """已收盘的第 index 根 K 线（0 为最旧），字段顺序见 CANDLE_FIELDS"""
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        i = (self.head - self.count + index) % self.capacity
+        return (self.starts[i], self.opens[i], self.highs[i], self.lows[i], self.closes[i], self.counts[i])
+    
+    def current(self):
+        """当前未收盘的 K 线，还没有行情时返回 None"""
+        if self.bucket is None:
+            return None
+        return (self.start_of(self.bucket), self.open, self.high, self.low, self.close, self.ticks)
+    
+    def candles(self, count=None, include_current=True):
+        """最近 count 根 K 线（旧的在前），include_current 时最后一根为未收盘的当前 K 线"""
+        current = self.current() if include_current else None
+        total = self.count + (current is not None)
+        count = total if count is None else max(0, min(count, total))
+        first = self.count - count + (current is not None)
+        result = [self[i] for i in range(max(0, first), self.count)]
+        if current is not None and count:
+            result.append(current)
+        return result
+
+class CandleAggregator:
+    """各数据源、各周期的 K 线，界面和提醒直接查询，不必从原始行情重新计算
+    
+    update() 返回本次收盘的 {周期: K 线}，多数行情不会让任何 K 线收盘。
+    """
+    def __init__(self, sources, resolutions=CANDLE_RESOLUTIONS, capacity=CANDLE_CAPACITY):
+        self.resolutions = tuple(resolutions)
+        self.series = {name: {resolution: CandleSeries(resolution, capacity) for resolution in self.resolutions}
+                       for name in sources}
+    
+    def update(self, source, price, timestamp):
+        series = self.series.get(source)
+        if series is None:
+            return {}
+        closed = {}
+        for resolution, candles in series.items():
+            candle = candles.update(timestamp, price)
+            if candle is not None:
+                closed[resolution] = candle
+        return closed
+    
+    def warm(self, source, records):
+        """用历史行情 [(时间戳, 价格, ...)] 预热（按时间顺序）"""
+        for record in records:
+            self.update(source, record[1], record[0])
+    
+    def get(self, source, resolution):
+        """数据源某个周期的 CandleSeries，数据源或周期不存在时抛出 KeyError"""
+        return self.series[source][resolution]
+    
+    def candles(self, source, resolution, count=None, include_current=True):
+        return self.get(source, resolution).candles(count, include_current)
+    
+    def current(self, source, resolution):
+        return self.get(source, resolution).current()
+    
+    def snapshot(self):
+        """{数据源: {周期: 当前 K 线}}"""
+        return {source: {resolution: candles.current() for resolution, candles in series.items()}
+                for source, series in self.series.items()}
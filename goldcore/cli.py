@@ -0,0 +1,81 @@
+'''
+    命令行模式：不启动界面，持续把行情输出到 stdout
+
+        python -m goldcore                    # 每条行情一行
+        python -m goldcore --json             # JSON Lines
+        python -m goldcore --once             # 只请求一轮
+        python -m goldcore --base 780 --up 2 --down 2   # 同时检查浙商价格提醒
+        python -m goldcore --rules alert_rules.json     # 按规则文件检查提醒
+'''
+
+import argparse
+import json
+import sys
+import time
+
+from .config import BANKS
+from .alerts import AlertEngine, band_rule, load_rules, alert_message
+
+def format_tick(bank_name, price, change, timestamp, as_json=False):
+    if as_json:
+        return json.dumps(
+            {"ts": round(timestamp, 3), "source": bank_name, "price": price, "change": change},
+            ensure_ascii=False
+        )
+    return f"{time.strftime('%H:%M:%S', time.localtime(timestamp))} {bank_name} {price} {change}"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='goldcore', description='金价监控（命令行）')
+    parser.add_argument('--json', action='store_true', help='以 JSON Lines 格式输出')
+    parser.add_argument('--once', action='store_true', help='只请求一轮后退出')
+    parser.add_argument('--source', action='append', choices=list(BANKS), help='只请求指定数据源，可重复')
+    parser.add_argument('--record', metavar='DIR', help='把行情写入该目录下的历史日志')
+    parser.add_argument('--base', type=float, help='提醒基准价格（浙商）')
+    parser.add_argument('--up', type=float, default=0, help='涨多少(元)提醒')
+    parser.add_argument('--down', type=float, default=0, help='跌多少(元)提醒')
+    parser.add_argument('--rules', metavar='FILE', help='提醒规则文件（JSON）')
+    args = parser.parse_args(argv)
+    
+    # 只在真正需要时才导入网络和存储模块
+    from .fetcher import PricePoller
+    
+    banks = {name: BANKS[name] for name in args.source} if args.source else BANKS
+    store = None
+    if args.record:
+        from .ticks import TickStore
+        store = TickStore(args.record, banks)
+    
+    engine = AlertEngine()
+    if args.base is not None:
+        engine.add(band_rule("浙商", args.base, args.up, args.down))
+    if args.rules:
+        for rule in load_rules(args.rules):
+            engine.add(rule)
+    
+    def on_price(tick):
+        bank_name = tick.source
+        print(format_tick(bank_name, tick.price_text, tick.change_text, tick.time, args.json), flush=True)
+        if store is not None:
+            store.add(tick)
+        for event in engine.update(bank_name, tick.value):
+            price_text = tick.price_text if event.rule.key == bank_name else None
+            print(f"[提醒] {alert_message(event, price_text)}", flush=True)
+    
+    def on_error(bank_name, message, error):
+        print(f"{message}: {error}" if error else message, file=sys.stderr, flush=True)
+    
+    poller = PricePoller(banks, on_price=on_price, on_error=on_error)
+    try:
+        if args.once:
+            poller.poll()
+        else:
+            thread = poller.start()
+            while thread.is_alive():
+                thread.join(0.5)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        poller.stop()
+        if store is not None:
+            store.close()
+    return 0
@@ -0,0 +1,105 @@
+'''
+    金价监控核心配置：数据源与轮询参数
+    不依赖 Kivy，可在脚本、服务端直接使用
+'''
+
+# URL配置
+BANKS = {
+    "浙商": {
+        "id": "zs",  # 数据源标识（用于文件名等）
+        "title": "浙商银行",  # 界面卡片标题，缺省时用数据源名称
+        "url": "https://api.jdjygold.com/gw2/generic/jrm/h5/m/stdLatestPrice?productSku=1961543816",
+        "color": [1, 0.843, 0, 1],  # 金色 #FFD700
+        "method": "sku",
+        "price_key": "price",
+        "change_key": "upAndDownAmt"
+    },
+    "民生": {
+        "id": "ms",
+        "title": "民生银行",
+        "url": "https://ms.jr.jd.com/gw2/generic/CreatorSer/newh5/m/getFirstRelatedProductInfo",
+        "params": {"circleId": "13245", "invokeSource": 5, "productId": "21001001000001"},
+        "color": [0.29, 0.565, 0.886, 1],  # 蓝色 #4A90E2
+        "method": "product_id",
+        "price_key": "minimumPriceValue",
+        "change_key": "dayFluctuateNum"
+    }
+}
+
+# 请求配置
+REQUEST_TIMEOUT = 10  # 单个源默认超时（秒），可在 BANKS 中用 "timeout" 单独指定
+CYCLE_DEADLINE = 8  # 每轮刷新的总截止时间（秒）
+FETCH_WORKERS = 4  # 并发请求线程数上限
+REQUEST_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Linux; Android 10; Mobile) AppleWebKit/537.36',
+    'Accept': 'application/json',
+    'Accept-Encoding': 'gzip',
+    'Connection': 'keep-alive',
+    'Referer': 'https://jdjygold.com/'
+}
+
+# 轮询间隔配置（秒）
+POLL_INTERVAL = 3  # 正常交易时段
+POLL_INTERVAL_FAST = 1.5  # 价格波动大或接近提醒线
+POLL_INTERVAL_BACKGROUND = 15  # 应用在后台
+POLL_INTERVAL_CLOSED = 60  # 非交易时段
+POLL_BACKOFF_MAX = 120  # 出错退避上限
+PRICE_CACHE_TTL = 2  # 报价在该秒数内视为最新：手动刷新、读取当前价时不再请求
+VOLATILE_MOVE = 0.0005  # 两次报价相对变动超过该比例视为波动大
+NEAR_ALERT_DISTANCE = 1.0  # 距离提醒线不足该金额（元）时加快轮询
+
+# 熔断与对冲请求配置
+BREAKER_FAILURES = 5  # 连续失败该次数后暂停请求该数据源
+BREAKER_COOLDOWN = 30  # 暂停多久后放一个探测请求（秒），探测失败则加倍
+BREAKER_COOLDOWN_MAX = 300  # 暂停时长上限（秒）
+HEDGE_PERCENTILE = 95  # 请求耗时超过最近耗时的该分位数时再发一个请求，None 关闭
+HEDGE_WINDOW = 50  # 计算分位数用的最近请求数
+HEDGE_MIN_SAMPLES = 20  # 样本不足时不发对冲请求
+HEDGE_MIN_DELAY = 0.2  # 对冲请求最早在该秒数后发出
+
+# 行情历史配置
+TICK_RING_CAPACITY = 4096  # 每个数据源内存中保留的最近报价条数
+
+# 启动快照配置
+STATE_FILE = 'state.json'  # 位于用户数据目录
+STATE_SAVE_INTERVAL = 5  # 行情更新时最短写盘间隔（秒）
+
+# 提醒防抖配置
+ALERT_HYSTERESIS = 0.2  # 可重复提醒需回到线内超过该金额（元）才重新生效
+ALERT_REARM_INTERVAL = 30  # 同一规则两次提醒的最短间隔（秒），期间的触发被合并
+ALERT_QUEUE_SIZE = 3  # 待发出的通知/语音上限，满了丢弃最旧的
+
+# 语音缓存配置
+SPEECH_CACHE_DIR = 'speech'  # 位于用户数据目录
+SPEECH_CACHE_MAX_BYTES = 4 * 1024 * 1024  # 片段音频缓存上限
+
+# 轮询服务配置（独立进程，本地 TCP）
+SERVICE_HOST = '127.0.0.1'
+SERVICE_PORT = 8719
+SERVICE_SEND_TIMEOUT = 2  # 界面超过该秒数收不下消息就断开，等它重连
+
+# 行情网关配置（一处轮询，SSE 推送给多个订阅者）
+GATEWAY_HOST = '0.0.0.0'
+GATEWAY_PORT = 8720
+GATEWAY_HEARTBEAT = 15  # 没有行情时发送心跳的间隔（秒）
+GATEWAY_DRAIN_TIMEOUT = 10  # 订阅者超过该秒数仍收不下数据就断开
+GATEWAY_URL = None  # 设置后应用从该网关读取行情而不直接请求接口，如 "http://192.168.1.10:8720"
+
+# 流式统计配置
+STATS_WINDOWS = (60, 300, 1800)  # 滚动窗口（秒）
+STATS_SPREADS = (("浙商", "民生"),)  # 需要统计价差的数据源对（a - b）
+STATS_DISPLAY_WINDOW = 300  # 界面上显示的窗口
+
+# K 线配置
+CANDLE_RESOLUTIONS = (60, 300, 900, 3600, 86400)  # 周期（秒）：1 分钟、5 分钟、15 分钟、1 小时、1 天
+CANDLE_CAPACITY = 1440  # 每个周期保留的已收盘 K 线根数
+CANDLE_DAY_OFFSET = 8 * 3600  # 按北京时间对齐周期（日线从北京时间零点开始）
+CANDLE_WARMUP = 86400  # 启动时用最近多少秒的行情历史预热 K 线
+
+# 帧耗时分析配置（设置 GOLDPRICE_PROFILE 时开启）
+PROFILE_FRAMES = 3600  # 保留最近的帧数（60fps 约 1 分钟）
+PROFILE_EVENTS = 20000  # 保留最近的回调记录数
+PROFILE_FRAME_BUDGET = 1 / 60  # 每帧预算（秒），超过两倍记为卡顿
+
+# 字体配置
+FONT_SUBSET = 'fonts/ui.ttf'  # 打包前用 python -m goldcore.fonts subset 生成，只含界面用到的字符
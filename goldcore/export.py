@@ -0,0 +1,297 @@
+'''
+    行情导出：把磁盘上的行情日志按列、分块压缩写出，供离线分析
+
+        python -m goldcore.export ~/.goldprice/ticks month.ticks --since 2026-05-01
+        python -m goldcore.export ticks/ month.parquet          # 需要 pyarrow
+        python -m goldcore.export ticks/ month.csv.gz
+
+    默认格式（.ticks）：每块最多 CHUNK_ROWS 行、单个数据源，时间戳（毫秒）、价格、涨跌
+    按 PRICE_SCALE 换算成整数后做差分，每列单独 zlib 压缩。一次只处理一块，内存占用固定。
+    读取：
+        columns = load_export("month.ticks")        # {数据源: {"timestamp": ..., "price": ..., "change": ...}}
+        frame = load_frame("month.ticks")           # pandas.DataFrame（需要 pandas）
+    Parquet / CSV 可直接用 pandas.read_parquet / read_csv 读取。
+'''
+
+import argparse
+import csv
+import gzip
+import json
+import os
+import struct
+import time
+import zlib
+from array import array
+
+from .config import BANKS
+from .ticks import TICK_RECORD, TICK_DTYPE, log_path, parse_date
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+MAGIC = b'GTIK'
+VERSION = 1
+FILE_HEADER = struct.Struct('<4sHI')  # 标识、版本、JSON 头长度
+CHUNK_HEADER = struct.Struct('<HIIII')  # 数据源序号、行数、三列压缩后的字节数
+CHUNK_ROWS = 65536
+TIME_SCALE = 1000  # 时间戳精确到毫秒
+PRICE_SCALE = 10000  # 价格、涨跌保留 4 位小数
+MISSING = -(1 << 62)  # 涨跌缺失（NaN）
+COLUMNS = ('timestamp', 'price', 'change')
+
+def iter_chunks(path, start=None, end=None, rows=CHUNK_ROWS):
+    """按块读取行情日志中 [start, end) 的记录，每块为 (时间戳, 价格, 涨跌) 三列"""
+    if not os.path.exists(path):
+        return
+    count = os.path.getsize(path) // TICK_RECORD.size
+    if not count:
+        return
+    if np is not None:
+        records = np.memmap(path, dtype=TICK_DTYPE, mode='r', shape=(count,))
+        timestamps = records['timestamp']
+        first = 0 if start is None else int(np.searchsorted(timestamps, start, 'left'))
+        last = count if end is None else int(np.searchsorted(timestamps, end, 'left'))
+        for i in range(first, last, rows):
+            block = records[i:min(last, i + rows)]
+            yield block['timestamp'], block['price'], block['change']
+        return
+    
+    with open(path, 'rb') as f:
+        while True:
+            data = f.read(rows * TICK_RECORD.size)
+            data = data[:len(data) - len(data) % TICK_RECORD.size]
+            if not data:
+                return
+            columns = (array('d'), array('d'), array('d'))
+            for record in TICK_RECORD.iter_unpack(data):
+                if end is not None and record[0] >= end:
+                    break
+                if start is None or record[0] >= start:
+                    for column, value in zip(columns, record):
+                        column.append(value)
+            if len(columns[0]):
+                yield columns
+            if end is not None and TICK_RECORD.unpack_from(data, len(data) - TICK_RECORD.size)[0] >= end:
+                return
+
+def _encode(values, scale, missing=False):
+    """浮点列 -> 换算成整数后的差分 -> zlib"""
+    if np is not None:
+        values = np.asarray(values, dtype='<f8')
+        scaled = np.round(values * scale)
+        if missing:
+            scaled[np.isnan(values)] = MISSING
+        scaled = scaled.astype('<i8')
+        deltas = np.diff(scaled, prepend=np.int64(0))
+        return zlib.compress(deltas.tobytes())
+    deltas = array('q')
+    previous = 0
+    for value in values:
+        if value != value:  # NaN
+            value = MISSING
+        else:
+            value = int(round(value * scale))
+        deltas.append(value - previous)
+        previous = value
+    if struct.pack('=q', 1) != struct.pack('<q', 1):
+        deltas.byteswap()
+    return zlib.compress(deltas.tobytes())
+
+def _decode(data, rows, scale, missing=False):
+    raw = zlib.decompress(data)
+    if np is not None:
+        scaled = np.cumsum(np.frombuffer(raw, dtype='<i8', count=rows))
+        values = scaled / scale
+        if missing:
+            values[scaled == MISSING] = np.nan
+        return values
+    deltas = array('q')
+    deltas.frombytes(raw)
+    if struct.pack('=q', 1) != struct.pack('<q', 1):
+        deltas.byteswap()
+    values = array('d')
+    current = 0
+    for delta in deltas:
+        current += delta
+        values.append(float('nan') if missing and current == MISSING else current / scale)
+    return values
+
+class BinaryWriter:
+    """默认格式（.ticks）"""
+    def __init__(self, path, sources):
+        self.sources = list(sources)
+        self._file = open(path, 'wb')
+        header = json.dumps({"sources": self.sources, "columns": list(COLUMNS),
+                             "time_scale": TIME_SCALE, "price_scale": PRICE_SCALE}).encode('utf-8')
+        self._file.write(FILE_HEADER.pack(MAGIC, VERSION, len(header)))
+        self._file.write(header)
+    
+    def write(self, source, timestamps, prices, changes):
+        columns = (_encode(timestamps, TIME_SCALE), _encode(prices, PRICE_SCALE),
+                   _encode(changes, PRICE_SCALE, missing=True))
+        self._file.write(CHUNK_HEADER.pack(self.sources.index(source), len(timestamps),
+                                           *(len(c) for c in columns)))
+        for column in columns:
+            self._file.write(column)
+    
+    def close(self):
+        self._file.close()
+
+class ParquetWriter:
+    """Parquet（需要 pyarrow），每块一个 row group，时间戳列用差分编码"""
+    def __init__(self, path, sources):
+        if pa is None:
+            raise RuntimeError("导出 Parquet 需要 pyarrow：pip install pyarrow")
+        self.schema = pa.schema([
+            ('source', pa.dictionary(pa.int8(), pa.string())),
+            ('timestamp', pa.timestamp('ms')),
+            ('price', pa.float64()),
+            ('change', pa.float64()),
+        ])
+        self._writer = pq.ParquetWriter(
+            path, self.schema, compression='zstd',
+            use_dictionary=['source'],
+            column_encoding={'timestamp': 'DELTA_BINARY_PACKED'},
+        )
+    
+    def write(self, source, timestamps, prices, changes):
+        if np is not None:
+            millis = np.round(np.asarray(timestamps) * TIME_SCALE).astype('int64')
+        else:
+            millis = [int(round(t * TIME_SCALE)) for t in timestamps]
+        table = pa.table({
+            'source': pa.DictionaryArray.from_arrays(pa.array([0] * len(timestamps), pa.int8()), [source]),
+            'timestamp': pa.array(millis, pa.timestamp('ms')),
+            'price': pa.array(prices, pa.float64()),
+            'change': pa.array(changes, pa.float64(), from_pandas=True),
+        }, schema=self.schema)
+        self._writer.write_table(table)
+    
+    def close(self):
+        self._writer.close()
+
+class CsvWriter:
+    """CSV（.csv.gz 时 gzip 压缩），没有其他依赖时的兜底格式"""
+    def __init__(self, path, sources):
+        self._file = gzip.open(path, 'wt', compresslevel=6, encoding='utf-8', newline='') \
+            if path.endswith('.gz') else open(path, 'w', encoding='utf-8', newline='')
+        self._csv = csv.writer(self._file)
+        self._csv.writerow(('source',) + COLUMNS)
+    
+    def write(self, source, timestamps, prices, changes):
+        if np is not None:
+            # 逐个格式化 NumPy 标量很慢，先转成 Python 列表
+            timestamps, prices, changes = (np.asarray(c).tolist() for c in (timestamps, prices, changes))
+        self._csv.writerows(
+            (source, f"{t:.3f}", f"{p:.4f}", "" if c != c else f"{c:.4f}")
+            for t, p, c in zip(timestamps, prices, changes)
+        )
+    
+    def close(self):
+        self._file.close()
+
+WRITERS = {"ticks": BinaryWriter, "parquet": ParquetWriter, "csv": CsvWriter}
+
+def guess_format(path):
+    name = path.lower()
+    if name.endswith('.parquet'):
+        return "parquet"
+    if name.endswith(('.csv', '.csv.gz')):
+        return "csv"
+    return "ticks"
+
+def export_ticks(directory, out, sources=None, start=None, end=None, fmt=None, banks=BANKS):
+    """导出行情日志目录中各数据源 [start, end) 的记录，返回行数、文件大小和耗时"""
+    started = time.perf_counter()
+    sources = list(sources or banks)
+    fmt = fmt or guess_format(out)
+    writer = WRITERS[fmt](out, sources)
+    rows = {}
+    try:
+        for source in sources:
+            rows[source] = 0
+            for timestamps, prices, changes in iter_chunks(log_path(directory, source, banks), start, end):
+                writer.write(source, timestamps, prices, changes)
+                rows[source] += len(timestamps)
+    finally:
+        writer.close()
+    return {"format": fmt, "rows": rows, "bytes": os.path.getsize(out),
+            "elapsed_s": time.perf_counter() - started}
+
+def load_export(path):
+    """读取 .ticks 文件，返回 {数据源: {"timestamp": 秒, "price": ..., "change": ...}}
+    
+    有 NumPy 时各列为 ndarray，否则为 array('d')；涨跌缺失为 NaN。
+    """
+    with open(path, 'rb') as f:
+        magic, version, header_size = FILE_HEADER.unpack(f.read(FILE_HEADER.size))
+        if magic != MAGIC or version > VERSION:
+            raise ValueError(f"不是可识别的行情导出文件: {path}")
+        header = json.loads(f.read(header_size).decode('utf-8'))
+        time_scale, price_scale = header["time_scale"], header["price_scale"]
+        parts = {source: ([], [], []) for source in header["sources"]}
+        while True:
+            chunk_header = f.read(CHUNK_HEADER.size)
+            if len(chunk_header) < CHUNK_HEADER.size:
+                break
+            index, rows, *sizes = CHUNK_HEADER.unpack(chunk_header)
+            data = [f.read(size) for size in sizes]
+            columns = parts[header["sources"][index]]
+            columns[0].append(_decode(data[0], rows, time_scale))
+            columns[1].append(_decode(data[1], rows, price_scale))
+            columns[2].append(_decode(data[2], rows, price_scale, missing=True))
+    
+    result = {}
+    for source, columns in parts.items():
+        if np is not None:
+            merged = [np.concatenate(column) if column else np.empty(0) for column in columns]
+        else:
+            merged = []
+            for column in columns:
+                values = array('d')
+                for part in column:
+                    values.extend(part)
+                merged.append(values)
+        result[source] = dict(zip(COLUMNS, merged))
+    return result
+
+def load_frame(path):
+    """读取 .ticks 文件为 pandas.DataFrame（列：source, timestamp, price, change）"""
+    import pandas as pd
+    frames = []
+    for source, columns in load_export(path).items():
+        frame = pd.DataFrame(columns)
+        frame.insert(0, 'source', source)
+        frames.append(frame)
+    frame = pd.concat(frames, ignore_index=True)
+    frame['timestamp'] = pd.to_datetime(frame['timestamp'], unit='s')
+    return frame
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='goldcore.export', description='行情导出')
+    parser.add_argument('directory', help='行情历史目录（ticks_<id>.bin 所在目录）')
+    parser.add_argument('out', help='输出文件：.ticks（默认格式）/ .parquet / .csv / .csv.gz')
+    parser.add_argument('--format', choices=list(WRITERS), help='默认按扩展名判断')
+    parser.add_argument('--source', nargs='+', choices=list(BANKS), help='只导出这些数据源')
+    parser.add_argument('--since', type=parse_date, help='开始时间，如 2026-05-01 或 "2026-05-01 09:30"')
+    parser.add_argument('--until', type=parse_date, help='结束时间（不含）')
+    args = parser.parse_args(argv)
+    
+    result = export_ticks(args.directory, args.out, args.source, args.since, args.until, args.format)
+    total = sum(result["rows"].values())
+    print(f"{args.out}: {result['format']}  {total} 行  {result['bytes'] / 1024:.1f}KB  "
+          f"耗时 {result['elapsed_s']:.2f}s")
+    for source, rows in result["rows"].items():
+        print(f"  {source}: {rows} 行")
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,285 @@
+'''
+    行情抓取：请求、解析各银行接口，并发轮询
+'''
+
+import json
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from .config import BANKS, REQUEST_TIMEOUT, CYCLE_DEADLINE, FETCH_WORKERS, POLL_INTERVAL_FAST
+from .transport import HttpPool
+from .scheduler import PollScheduler
+from .metrics import Metrics
+from .breaker import CircuitBreaker, RecentLatency, CLOSED
+from .cache import PriceCache
+from .ticks import Tick
+
+def build_url(config):
+    """拼出数据源的请求地址"""
+    if config.get('method') == 'product_id':
+        req_data = json.dumps(config['params'])
+        encoded_data = urllib.parse.quote(req_data)
+        return f"{config['url']}?reqData={encoded_data}"
+    return config['url']
+
+def build_extractor(source, config):
+    """按数据源配置（method / price_key / change_key）生成解析函数
+    
+    extract(data, received=None) 从接口返回的 JSON 中取出 Tick，接口返回 FAIL 时返回 None，
+    价格无效时抛出 ValueError。轮询器为每个数据源生成一次，解析时不再查配置。
+    """
+    price_key, change_key = config['price_key'], config['change_key']
+    if config.get('method') == 'product_id':
+        container, check_status = 'data', False
+    else:
+        container, check_status = 'datas', True
+    parse = Tick.parse
+    
+    def extract(data, received=None):
+        result_data = data.get('resultData') or {}
+        if check_status and result_data.get('status') == 'FAIL':
+            return None
+        values = result_data.get(container) or {}
+        return parse(source, values.get(price_key), values.get(change_key), received)
+    return extract
+
+def parse_response(config, data, source=None):
+    """从接口返回的 JSON 中取出 Tick，接口返回 FAIL 时返回 None，价格无效时抛出 ValueError"""
+    return build_extractor(source or config.get('id', ''), config)(data)
+
+def fetch_bank(http, config, source=None):
+    """请求单个银行接口，返回 Tick，接口返回 FAIL 时返回 None"""
+    timeout = config.get('timeout', REQUEST_TIMEOUT)
+    body = http.get(build_url(config), timeout=timeout)
+    return parse_response(config, json.loads(body.decode('utf-8')), source)
+
+class PricePoller:
+    """并发轮询各数据源
+    
+    每轮把到期的数据源同时提交到线程池，哪个先返回就先回调 on_price，
+    超过本轮截止时间仍未返回的记为失败。请求耗时超过该源最近的 p95 时
+    再发一个相同请求，取先返回的结果（hedge=False 关闭）；连续失败的源
+    由熔断器暂停请求，只定期放一个探测请求。最新报价记在 cache 中，
+    同一数据源同时只有一个请求在路上（超时放弃的请求执行完之前也不发新的），
+    手动刷新和读取当前价都经过它。回调在轮询线程中执行：
+        on_price(tick)  # ticks.Tick
+        on_error(bank_name, message, error)
+    """
+    def __init__(self, banks=BANKS, on_price=None, on_error=None, http=None, deadline=CYCLE_DEADLINE, hedge=True):
+        self.banks = banks
+        self.on_price = on_price
+        self.on_error = on_error
+        self.deadline = deadline
+        self.http = http or HttpPool()
+        self.scheduler = PollScheduler(banks)
+        self.metrics = Metrics(banks)
+        self.breakers = {name: CircuitBreaker() for name in banks}
+        self.latency = {name: RecentLatency() for name in banks}
+        self.hedge = hedge
+        self.cache = PriceCache()
+        self.extractors = {name: build_extractor(name, config) for name, config in banks.items()}
+        # 并发请求线程池（有上限，超时的请求不会无限堆积线程）
+        self.pool = ThreadPoolExecutor(
+            max_workers=max(FETCH_WORKERS, len(banks)),
+            thread_name_prefix='fetch'
+        )
+        self.running = False
+        self._thread = None
+    
+    def fetch(self, bank_name):
+        """请求并解析单个数据源，同时记录耗时和流量"""
+        config = self.banks[bank_name]
+        start = time.monotonic()
+        body, size = self.http.get_with_size(build_url(config), timeout=config.get('timeout', REQUEST_TIMEOUT))
+        self.metrics.record_response(bank_name, time.monotonic() - start, size)
+        return self.extractors[bank_name](json.loads(body.decode('utf-8')))
+    
+    def _attempt(self, bank_name):
+        """线程池中执行的一次请求，记录耗时供对冲判断"""
+        start = time.monotonic()
+        result = self.fetch(bank_name)
+        self.latency[bank_name].add(time.monotonic() - start)
+        return result
+    
+    def _allow(self, bank_name):
+        """熔断中的数据源本轮跳过，并把它的下次请求推迟到探测时间"""
+        breaker = self.breakers[bank_name]
+        if breaker.allow():
+            self.metrics.record_breaker(bank_name, breaker.state)
+            return True
+        self.scheduler.defer(bank_name, breaker.remaining())
+        return False
+    
+    def _hedge_delay(self, bank_name):
+        # 熔断后的探测请求只发一个
+        if not self.hedge or self.breakers[bank_name].state != CLOSED:
+            return None
+        return self.latency[bank_name].hedge_delay()
+    
+    @staticmethod
+    def _finish(pending, hedge_at, bank_name):
+        """数据源已有结果：不再等它其余的请求，也不再对冲，返回仍在执行、无法取消的请求"""
+        running = []
+        for future, name in list(pending.items()):
+            if name == bank_name:
+                if not future.cancel() and not future.done():
+                    running.append(future)
+                del pending[future]
+        hedge_at.pop(bank_name, None)
+        return running
+    
+    def _release(self, bank_name, running):
+        """结束数据源的这次请求；还有请求在执行时等它们都结束后再放行下一个请求"""
+        if not running:
+            self.cache.finish(bank_name)
+            return
+        remaining = [len(running)]
+        lock = threading.Lock()
+        
+        def done(future):
+            with lock:
+                remaining[0] -= 1
+                last = not remaining[0]
+            if last:
+                self.cache.finish(bank_name)
+        
+        for future in running:
+            future.add_done_callback(done)
+    
+    def _report_error(self, bank_name, message, error, kind="error", running=()):
+        self._release(bank_name, running)
+        breaker = self.breakers[bank_name]
+        was_closed = breaker.state == CLOSED
+        tripped = breaker.record_failure()
+        self.scheduler.record_failure(bank_name)
+        self.metrics.record_failure(bank_name, kind, f"{message}: {error}" if error else message)
+        self.metrics.record_breaker(bank_name, breaker.state)
+        if tripped:
+            self.scheduler.defer(bank_name, breaker.remaining())
+            message = f"{message}，连续失败 {breaker.consecutive} 次，{breaker.cooldown:.0f} 秒后重试"
+        elif not was_closed:
+            # 探测失败只在熔断重新打开时提示一次，避免重复刷屏
+            return
+        if self.on_error:
+            self.on_error(bank_name, message, error)
+    
+    def _report_result(self, bank_name, tick, running=()):
+        if tick is None:
+            self._report_error(bank_name, f"{bank_name}接口返回失败", None, "fail_status", running)
+            return
+        self.cache.put(tick)
+        self._release(bank_name, running)
+        self.breakers[bank_name].record_success()
+        self.metrics.record_breaker(bank_name, CLOSED)
+        self.scheduler.record_success(bank_name, tick.value)
+        self.metrics.record_success(bank_name)
+        if self.on_price:
+            self.on_price(tick)
+    
+    def poll(self, bank_names=None):
+        """并发请求一轮（默认全部数据源），结果到达即回调"""
+        if bank_names is None:
+            bank_names = list(self.banks)
+        started = time.monotonic()
+        deadline = started + self.deadline
+        pending = {}  # future -> 数据源，同一数据源可能有原请求和对冲请求
+        hedge_at = {}  # 数据源 -> 发对冲请求的时间
+        primary = {}  # 数据源 -> 原请求
+        for bank_name in bank_names:
+            if not self.cache.begin(bank_name):
+                # 已有请求在路上（另一处调用了 poll，或上一轮超时放弃的请求还没结束），稍后再看
+                self.scheduler.defer(bank_name, POLL_INTERVAL_FAST)
+                continue
+            if not self._allow(bank_name):
+                self.cache.finish(bank_name)
+                continue
+            future = self.pool.submit(self._attempt, bank_name)
+            pending[future] = bank_name
+            primary[bank_name] = future
+            delay = self._hedge_delay(bank_name)
+            if delay is not None:
+                hedge_at[bank_name] = started + delay
+        
+        try:
+            while pending:
+                now = time.monotonic()
+                if now >= deadline:
+                    break
+                timeout = min([deadline, *hedge_at.values()]) - now
+                done, _ = wait(pending, timeout=max(0.0, timeout), return_when=FIRST_COMPLETED)
+                for future in done:
+                    bank_name = pending.pop(future, None)
+                    if bank_name is None:
+                        continue  # 同源的另一个请求已经返回
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        if bank_name in pending.values():
+                            continue  # 还有一个请求在路上，等它的结果
+                        running = self._finish(pending, hedge_at, bank_name)
+                        # ValueError：返回的不是 JSON 或价格无效
+                        problem = "数据无效" if isinstance(e, ValueError) else "连接失败"
+                        self._report_error(bank_name, f"{bank_name}{problem}", e, running=running)
+                        continue
+                    running = self._finish(pending, hedge_at, bank_name)
+                    if future is not primary[bank_name]:
+                        self.metrics.record_hedge(bank_name, won=True)
+                    self._report_result(bank_name, result, running)
+                
+                now = time.monotonic()
+                for bank_name, at in list(hedge_at.items()):
+                    if at <= now:
+                        del hedge_at[bank_name]
+                        pending[self.pool.submit(self._attempt, bank_name)] = bank_name
+                        self.metrics.record_hedge(bank_name)
+            
+            # 超过本轮截止时间仍未返回的源，本轮放弃（请求结束前不会再发新的）
+            for bank_name in set(pending.values()):
+                running = self._finish(pending, hedge_at, bank_name)
+                self._report_error(bank_name, f"{bank_name}连接超时", None, "timeout", running)
+        finally:
+            self.metrics.record_cycle(time.monotonic() - started)
+    
+    def refresh(self, bank_names=None):
+        """手动刷新：只请求报价已过期且没有请求在路上的数据源，返回安排了请求的数据源"""
+        names = [name for name in (bank_names or self.banks) if self.cache.needs_refresh(name)]
+        if names:
+            self.scheduler.request_refresh(names)
+        return names
+    
+    def quote(self, bank_name, max_age=None, wait=0):
+        """读取报价：新鲜的直接返回；过期的也先返回，同时安排一次刷新
+        
+        wait > 0 时，报价过期或没有报价就最多等 wait 秒拿新报价（不能在轮询线程中调用）。
+        返回 cache.Quote，没有报价时返回 None
+        """
+        started = time.monotonic()
+        quote, refresh = self.cache.read(bank_name, max_age)
+        if refresh:
+            self.scheduler.request_refresh([bank_name])
+        if wait and (quote is None or quote.age() >= self.cache.ttl):
+            quote = self.cache.wait(bank_name, started, wait)
+        return quote
+    
+    def run(self):
+        """轮询循环，直到 stop()（由 start() 在后台线程中调用）"""
+        while self.running:
+            due = self.scheduler.due_sources()
+            if due:
+                self.poll(due)
+            self.scheduler.wait()
+    
+    def start(self):
+        """在后台线程中启动轮询"""
+        self.running = True
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+        return self._thread
+    
+    def stop(self):
+        self.running = False
+        self.scheduler.wake()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+        self.http.close()
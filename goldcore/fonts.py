@@ -0,0 +1,120 @@
+'''
+    界面字体：按应用实际显示的字符裁剪中文字体
+
+        python -m goldcore.fonts subset fonts/msyh.ttc        # 生成 fonts/ui.ttf
+        python -m goldcore.fonts subset NotoSansCJK.ttc --font-number 2
+        python -m goldcore.fonts chars                         # 查看收集到的字符
+
+    字符取自 main.py 和 goldcore 中的全部字符串常量（标签、按钮、弹窗、语音文本、
+    银行名称），另加 ASCII 可见字符和常用全角标点。裁剪需要 fontTools，只在打包前
+    运行，应用运行时不依赖它。
+'''
+
+import argparse
+import ast
+import json
+import os
+import string
+
+try:
+    from fontTools import subset as ft_subset
+except ImportError:
+    ft_subset = None
+
+from .config import FONT_SUBSET
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 代码里拼出来、不一定以常量出现的字符
+EXTRA_CHARS = string.printable + "，。：；！？、（）【】《》“”‘’—…·¥％＋－"
+
+def source_files(app_dir=APP_DIR):
+    """界面文本所在的源码：main.py、goldcore/*.py、service/*.py"""
+    paths = [os.path.join(app_dir, 'main.py')]
+    for package in ('goldcore', 'service'):
+        directory = os.path.join(app_dir, package)
+        if os.path.isdir(directory):
+            paths.extend(os.path.join(directory, name) for name in sorted(os.listdir(directory))
+                         if name.endswith('.py'))
+    return [path for path in paths if os.path.exists(path)]
+
+def literal_chars(path):
+    """源码中全部字符串常量（含 f-string 的常量部分）用到的字符"""
+    with open(path, encoding='utf-8') as f:
+        tree = ast.parse(f.read(), path)
+    chars = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Constant) and isinstance(node.value, str):
+            chars.update(node.value)
+    return chars
+
+def collect_chars(paths=None, extra=EXTRA_CHARS):
+    """返回排好序的字符串，不含换行等控制字符"""
+    chars = set(extra)
+    for path in paths or source_files():
+        chars |= literal_chars(path)
+    return ''.join(sorted(c for c in chars if c.isprintable()))
+
+def subset_font(src, dst=FONT_SUBSET, chars=None, font_number=0):
+    """把 src（.ttf/.otf/.ttc 中的第 font_number 个字体）裁剪为只含 chars 的 dst
+    
+    同时写出 dst.json 记录来源、字符数、字体中缺少的字符和文件大小，返回该记录。
+    """
+    if ft_subset is None:
+        raise RuntimeError("裁剪字体需要 fontTools：pip install fonttools")
+    chars = chars if chars is not None else collect_chars()
+    options = ft_subset.Options()
+    options.font_number = font_number
+    options.hinting = False  # 手机屏幕像素密度高，去掉 hinting 指令可再小一截
+    options.desubroutinize = True
+    options.name_IDs = ['*']
+    options.notdef_outline = True
+    font = ft_subset.load_font(src, options, dontLoadGlyphNames=True)
+    cmap = font.getBestCmap() or {}
+    missing = ''.join(c for c in chars if ord(c) not in cmap and not c.isspace())
+    subsetter = ft_subset.Subsetter(options)
+    subsetter.populate(text=chars)
+    subsetter.subset(font)
+    os.makedirs(os.path.dirname(os.path.abspath(dst)), exist_ok=True)
+    ft_subset.save_font(font, dst, options)
+    font.close()
+    
+    manifest = {
+        "source": os.path.basename(src),
+        "font_number": font_number,
+        "chars": len(chars),
+        "missing": missing,
+        "source_bytes": os.path.getsize(src),
+        "bytes": os.path.getsize(dst),
+    }
+    with open(f"{dst}.json", 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    return manifest
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='goldcore.fonts', description='界面字体裁剪')
+    sub = parser.add_subparsers(dest='command', required=True)
+    
+    cut = sub.add_parser('subset', help='按界面用到的字符裁剪字体')
+    cut.add_argument('font', help='完整字体文件（.ttf/.otf/.ttc）')
+    cut.add_argument('--out', default=os.path.join(APP_DIR, FONT_SUBSET))
+    cut.add_argument('--font-number', type=int, default=0, help='.ttc 中使用第几个字体')
+    
+    sub.add_parser('chars', help='列出收集到的字符')
+    
+    args = parser.parse_args(argv)
+    chars = collect_chars()
+    if args.command == 'chars':
+        print(f"{len(chars)} 个字符")
+        print(chars)
+        return 0
+    
+    manifest = subset_font(args.font, args.out, chars, args.font_number)
+    print(f"{args.out}: {manifest['chars']} 个字符，"
+          f"{manifest['source_bytes'] / 1024:.0f}KB -> {manifest['bytes'] / 1024:.0f}KB")
+    if manifest["missing"]:
+        print(f"字体中缺少 {len(manifest['missing'])} 个字符: {manifest['missing']}")
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
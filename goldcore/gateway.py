@@ -0,0 +1,366 @@
+'''
+    扇出网关：每个数据源只轮询一次，行情通过 Server-Sent Events 推送给任意多个订阅者，
+    避免每台设备、每个看板各自请求上游接口。
+
+        python -m goldcore.gateway --port 8720
+
+    GET /events    SSE 行情流（连接后先推送各数据源最新价格）
+    GET /snapshot  各数据源最新价格（JSON）
+    GET /stats     网关运行统计（JSON）
+
+    客户端：GatewayFeed 读取 /events，接口与 PricePoller 的 on_price/on_error 回调相同，
+    PriceService(gateway_url=...) 用它代替直接轮询。
+'''
+
+import argparse
+import asyncio
+import http.client
+import json
+import socket
+import threading
+import time
+from urllib.parse import urlsplit
+
+from .config import BANKS, GATEWAY_HOST, GATEWAY_PORT, GATEWAY_HEARTBEAT, GATEWAY_DRAIN_TIMEOUT
+from .fetcher import PricePoller
+from .ticks import Tick
+
+def encode_event(event, message):
+    data = json.dumps(message, ensure_ascii=False)
+    return f"event: {event}\ndata: {data}\n\n".encode('utf-8')
+
+class _Subscriber:
+    """一个 SSE 连接的待发送数据
+    
+    按 key（数据源）合并：客户端读得慢时只保留每个数据源的最新一条，
+    内存占用与数据源数量成正比，不会因为慢客户端无限增长。
+    """
+    def __init__(self, writer):
+        self.writer = writer
+        self.pending = {}
+        self.ready = asyncio.Event()
+        self.conflated = 0
+        self.closed = False
+    
+    def push(self, key, data):
+        if key in self.pending:
+            self.conflated += 1
+        self.pending[key] = data
+        self.ready.set()
+
+class Gateway:
+    """轮询线程抓取行情，asyncio 事件循环负责所有订阅连接"""
+    def __init__(self, banks=BANKS, host=GATEWAY_HOST, port=GATEWAY_PORT,
+                 heartbeat=GATEWAY_HEARTBEAT, drain_timeout=GATEWAY_DRAIN_TIMEOUT):
+        self.host = host
+        self.port = port
+        self.heartbeat = heartbeat
+        self.drain_timeout = drain_timeout
+        self.poller = PricePoller(banks, on_price=self._on_price, on_error=self._on_error)
+        self.latest = {}  # 数据源 -> 已编码的 tick 事件
+        self.latest_ticks = {}  # 数据源 -> tick 消息
+        self.subscribers = set()
+        self.loop = None
+        self.server = None
+        self.started = time.time()
+        self.ticks = 0
+        self.total_subscribers = 0
+        self.conflated = 0  # 已断开连接被合并掉的条数
+        self.slow_disconnects = 0  # 超过 drain_timeout 仍写不出去而断开的连接
+    
+    # ---- 轮询线程 ----
+    
+    def _on_price(self, tick):
+        self.loop.call_soon_threadsafe(self._publish, tick.source, "tick", tick.to_message())
+    
+    def _on_error(self, source, message, error):
+        print(f"{message}: {error}" if error else message)
+        self.loop.call_soon_threadsafe(self._publish, f"error:{source}", "error",
+                                       {"source": source, "message": message})
+    
+    # ---- 事件循环 ----
+    
+    def _publish(self, key, event, message):
+        # 每条行情只编码一次，所有订阅者共用同一份字节
+        data = encode_event(event, message)
+        if event == "tick":
+            self.ticks += 1
+            self.latest[key] = data
+            self.latest_ticks[key] = message
+        for subscriber in self.subscribers:
+            subscriber.push(key, data)
+    
+    def stats(self):
+        return {
+            "uptime_s": round(time.time() - self.started, 1),
+            "subscribers": len(self.subscribers),
+            "total_subscribers": self.total_subscribers,
+            "ticks": self.ticks,
+            "conflated": self.conflated + sum(s.conflated for s in self.subscribers),
+            "slow_disconnects": self.slow_disconnects,
+            "sources": self.poller.metrics.snapshot()["sources"],
+        }
+    
+    async def _handle(self, reader, writer):
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), 10)
+            # 请求头不需要，读完即可
+            while True:
+                line = await asyncio.wait_for(reader.readline(), 10)
+                if line in (b'\r\n', b'\n', b''):
+                    break
+        except (asyncio.TimeoutError, ConnectionError):
+            writer.close()
+            return
+        
+        parts = request_line.decode('latin-1').split()
+        path = urlsplit(parts[1]).path if len(parts) >= 2 else ''
+        if len(parts) < 2 or parts[0] != 'GET':
+            await self._respond(writer, 405, {"error": "method not allowed"})
+        elif path == '/events':
+            await self._stream(writer)
+        elif path == '/snapshot':
+            await self._respond(writer, 200, self.latest_ticks)
+        elif path == '/stats':
+            await self._respond(writer, 200, self.stats())
+        else:
+            await self._respond(writer, 404, {"error": "not found"})
+    
+    async def _respond(self, writer, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        reason = http.client.responses.get(status, '')
+        writer.write(f"HTTP/1.1 {status} {reason}\r\n"
+                     "Content-Type: application/json; charset=utf-8\r\n"
+                     f"Content-Length: {len(body)}\r\n"
+                     "Connection: close\r\n\r\n".encode('latin-1') + body)
+        try:
+            await asyncio.wait_for(writer.drain(), self.drain_timeout)
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        writer.close()
+    
+    async def _stream(self, writer):
+        writer.write(b"HTTP/1.1 200 OK\r\n"
+                     b"Content-Type: text/event-stream; charset=utf-8\r\n"
+                     b"Cache-Control: no-cache\r\n"
+                     b"Connection: close\r\n\r\n"
+                     b"retry: 3000\n\n")
+        subscriber = _Subscriber(writer)
+        # 连接后先推送各数据源最新价格
+        for key, data in self.latest.items():
+            subscriber.push(key, data)
+        self.subscribers.add(subscriber)
+        self.total_subscribers += 1
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(subscriber.ready.wait(), self.heartbeat)
+                except asyncio.TimeoutError:
+                    # 心跳注释行，让客户端和中间代理知道连接还活着
+                    writer.write(b": ping\n\n")
+                else:
+                    if subscriber.closed:
+                        break
+                    subscriber.ready.clear()
+                    batch, subscriber.pending = subscriber.pending, {}
+                    writer.write(b''.join(batch.values()))
+                try:
+                    await asyncio.wait_for(writer.drain(), self.drain_timeout)
+                except asyncio.TimeoutError:
+                    self.slow_disconnects += 1
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            self.subscribers.discard(subscriber)
+            self.conflated += subscriber.conflated
+            writer.close()
+    
+    def close(self):
+        """停止接受新连接并结束所有订阅（在事件循环中调用）"""
+        self.server.close()
+        for subscriber in self.subscribers:
+            subscriber.closed = True
+            subscriber.ready.set()
+    
+    async def serve(self, poll=True):
+        """运行网关直到取消；poll=False 时不启动轮询（基准测试直接注入行情）"""
+        self.loop = asyncio.get_running_loop()
+        self.server = await asyncio.start_server(self._handle, self.host, self.port, backlog=1024)
+        self.port = self.server.sockets[0].getsockname()[1]
+        if poll:
+            self.poller.start()
+        print(f"行情网关已启动: http://{self.host}:{self.port}/events")
+        try:
+            async with self.server:
+                await self.server.serve_forever()
+        finally:
+            self.close()
+            self.poller.stop()
+
+class GatewayFeed:
+    """从网关的 /events 读取行情，在后台线程中回调 on_price(tick)
+    
+    断线后按指数退避重连；metrics 为 Metrics 时记录各数据源的成功次数和新鲜度。
+    """
+    def __init__(self, url, on_price=None, on_error=None, metrics=None, read_timeout=None):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == 'https' else 80)
+        self.https = parts.scheme == 'https'
+        path = parts.path.rstrip('/')
+        if path.endswith('/events'):
+            path = path[:-len('/events')]
+        self.path = f"{path}/events"
+        self.snapshot_path = f"{path}/snapshot"
+        self.on_price = on_price
+        self.on_error = on_error
+        self.metrics = metrics
+        # 超过三次心跳没有任何数据就认为连接已断
+        self.read_timeout = read_timeout or GATEWAY_HEARTBEAT * 3
+        self.running = False
+        self._conn = None
+        self._thread = None
+        self._last_time = {}  # 数据源 -> 已处理的最新行情时间
+        self._lock = threading.Lock()  # 行情流和手动刷新在不同线程中处理行情
+        self._refreshing = False
+        self._received = False  # 当前连接上是否收到过事件
+    
+    def _dispatch(self, event, data):
+        """处理一条事件；格式不对时抛出 ValueError / KeyError / TypeError"""
+        message = json.loads(data)
+        if not isinstance(message, dict):
+            raise ValueError(f"不是 JSON 对象: {data[:80]}")
+        source = message.get("source")
+        if event == "tick":
+            tick = Tick.parse(source, message["price"], message["change"], message.get("time"))
+            # 重连后网关会先补发各数据源的最新行情，已处理过的不再重复记录
+            with self._lock:
+                if tick.time <= self._last_time.get(source, float('-inf')):
+                    return
+                self._last_time[source] = tick.time
+            if self.metrics and source in self.metrics.sources:
+                self.metrics.record_success(source)
+            if self.on_price:
+                self.on_price(tick)
+        elif event == "error" and self.on_error:
+            self.on_error(source, message.get("message", ""), None)
+    
+    def _connect(self, timeout):
+        connection_class = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+        return connection_class(self.host, self.port, timeout=timeout)
+    
+    def _read_snapshot(self):
+        conn = self._connect(GATEWAY_HEARTBEAT)
+        try:
+            conn.request('GET', self.snapshot_path)
+            response = conn.getresponse()
+            body = response.read()
+            if response.status != 200:
+                raise OSError(f"网关返回 HTTP {response.status}")
+            snapshot = json.loads(body)
+        except (OSError, http.client.HTTPException, ValueError) as e:
+            if self.on_error:
+                self.on_error(None, "行情网关刷新失败", e)
+            return
+        finally:
+            conn.close()
+            with self._lock:
+                self._refreshing = False
+        for message in snapshot.values() if isinstance(snapshot, dict) else ():
+            try:
+                self._dispatch("tick", json.dumps(message))
+            except Exception as e:
+                print(f"行情网关快照处理失败: {e!r}")
+    
+    def refresh(self, bank_names=None):
+        """手动刷新：在后台线程中重新读取网关的 /snapshot，比已处理的更新的行情照常回调
+        
+        网关自己按计划轮询上游接口，这里只能取到它手上的最新价格。
+        返回 True 表示已发出请求（已有刷新在进行时返回 False）。
+        """
+        with self._lock:
+            if self._refreshing or not self.running:
+                return False
+            self._refreshing = True
+        threading.Thread(target=self._read_snapshot, daemon=True).start()
+        return True
+    
+    def _read_stream(self):
+        self._conn = conn = self._connect(self.read_timeout)
+        try:
+            conn.request('GET', self.path, headers={'Accept': 'text/event-stream'})
+            response = conn.getresponse()
+            if response.status != 200:
+                raise OSError(f"网关返回 HTTP {response.status}")
+            event, data = "message", []
+            while self.running:
+                line = response.readline()
+                if not line:
+                    break
+                line = line.decode('utf-8', 'replace').rstrip('\r\n')
+                if not line:
+                    if data:
+                        self._received = True
+                        try:
+                            self._dispatch(event, "\n".join(data))
+                        except Exception as e:
+                            # 单条事件出错只丢弃这一条，不中断读取
+                            print(f"行情网关事件处理失败 ({event}): {e!r}")
+                    event, data = "message", []
+                elif line.startswith(':'):
+                    continue
+                elif line.startswith('event:'):
+                    event = line[6:].strip()
+                elif line.startswith('data:'):
+                    data.append(line[5:].lstrip())
+        finally:
+            conn.close()
+    
+    def run(self):
+        delay = 1
+        while self.running:
+            self._received = False
+            try:
+                self._read_stream()
+                error = None
+            except (OSError, http.client.HTTPException) as e:
+                error = e
+            # 新连接上收到过事件才算恢复；连上就断（例如网关过载）的继续退避
+            if self._received:
+                delay = 1
+            if not self.running:
+                break
+            if error is not None and self.on_error:
+                self.on_error(None, f"行情网关连接失败，{delay}秒后重试", error)
+            time.sleep(delay)
+            delay = min(delay * 2, 30)
+    
+    def start(self):
+        self.running = True
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+        return self._thread
+    
+    def stop(self):
+        self.running = False
+        conn = self._conn
+        if conn is not None and conn.sock is not None:
+            try:
+                conn.sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='goldcore.gateway', description='金价行情网关（SSE 扇出）')
+    parser.add_argument('--host', default=GATEWAY_HOST)
+    parser.add_argument('--port', type=int, default=GATEWAY_PORT)
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(Gateway(host=args.host, port=args.port).serve())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,208 @@
+'''
+    运行指标：各数据源请求耗时分布、成功/失败计数、流量、数据新鲜度和轮询耗时
+'''
+
+import json
+import os
+import threading
+import time
+
+from .breaker import STATE_NAMES
+
+# 耗时直方图分桶上限（毫秒），最后一个桶收容所有更慢的请求
+LATENCY_BUCKETS_MS = (25, 50, 100, 200, 400, 800, 1600, 3200, 6400, float('inf'))
+
+def dump_json(path, data):
+    """写 JSON 文件（先写临时文件再替换）"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, path)
+    return path
+
+class LatencyHistogram:
+    """固定分桶的耗时直方图，内存占用固定，分位数按桶上限估算"""
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+    
+    def add(self, seconds):
+        ms = seconds * 1000
+        for i, bound in enumerate(self.buckets):
+            if ms <= bound:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+    
+    def percentile(self, q):
+        """估算第 q 百分位（毫秒），落在最后一个桶时返回最大值"""
+        if not self.count:
+            return 0.0
+        target = q / 100 * self.count
+        seen = 0
+        for bound, n in zip(self.buckets, self.counts):
+            seen += n
+            if seen >= target:
+                return min(bound, self.max_ms)
+        return self.max_ms
+    
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "mean_ms": self.total_ms / self.count if self.count else 0.0,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "max_ms": self.max_ms,
+            "buckets": {("inf" if bound == float('inf') else str(bound)): n
+                        for bound, n in zip(self.buckets, self.counts)},
+        }
+
+class SourceMetrics:
+    """单个数据源的计数器"""
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.requests = 0
+        self.successes = 0
+        self.failures = 0  # 网络错误、HTTP 错误、解析失败
+        self.fail_status = 0  # 接口返回 status: FAIL
+        self.timeouts = 0  # 超过本轮截止时间
+        self.hedges = 0  # 发出的对冲请求
+        self.hedge_wins = 0  # 对冲请求先于原请求返回
+        self.breaker = "closed"  # 熔断状态：closed / open / half_open
+        self.breaker_trips = 0
+        self.bytes_received = 0
+        self.last_success = None  # time.time()
+        self.last_error = ""
+
+class Metrics:
+    """各数据源的运行指标，轮询线程写入，界面线程读取快照"""
+    def __init__(self, sources):
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.sources = {name: SourceMetrics() for name in sources}
+        self.cycle = LatencyHistogram()
+    
+    def record_response(self, source, seconds, size):
+        """收到一次 HTTP 响应（无论内容是否有效）"""
+        with self._lock:
+            metrics = self.sources[source]
+            metrics.requests += 1
+            metrics.latency.add(seconds)
+            metrics.bytes_received += size
+    
+    def record_success(self, source):
+        with self._lock:
+            metrics = self.sources[source]
+            metrics.successes += 1
+            metrics.last_success = time.time()
+    
+    def record_failure(self, source, kind, message=""):
+        """kind: "error" / "fail_status" / "timeout" """
+        with self._lock:
+            metrics = self.sources[source]
+            if kind == "fail_status":
+                metrics.fail_status += 1
+            elif kind == "timeout":
+                metrics.timeouts += 1
+            else:
+                metrics.failures += 1
+            metrics.last_error = message
+    
+    def record_hedge(self, source, won=False):
+        """发出一次对冲请求（won=False），或对冲请求先返回（won=True）"""
+        with self._lock:
+            metrics = self.sources[source]
+            if won:
+                metrics.hedge_wins += 1
+            else:
+                metrics.hedges += 1
+    
+    def record_breaker(self, source, state):
+        with self._lock:
+            metrics = self.sources[source]
+            if state == "open" and metrics.breaker != "open":
+                metrics.breaker_trips += 1
+            metrics.breaker = state
+    
+    def record_cycle(self, seconds):
+        with self._lock:
+            self.cycle.add(seconds)
+    
+    def stale_age(self, source, now=None):
+        """距离该数据源最后一次成功更新的秒数，从未成功时为 None"""
+        last = self.sources[source].last_success
+        if last is None:
+            return None
+        return (now or time.time()) - last
+    
+    def snapshot(self):
+        """当前全部指标（可直接序列化为 JSON）"""
+        now = time.time()
+        with self._lock:
+            sources = {}
+            for name, m in self.sources.items():
+                sources[name] = {
+                    "requests": m.requests,
+                    "successes": m.successes,
+                    "failures": m.failures,
+                    "fail_status": m.fail_status,
+                    "timeouts": m.timeouts,
+                    "hedges": m.hedges,
+                    "hedge_wins": m.hedge_wins,
+                    "breaker": m.breaker,
+                    "breaker_trips": m.breaker_trips,
+                    "bytes_received": m.bytes_received,
+                    "stale_age_s": None if m.last_success is None else round(now - m.last_success, 1),
+                    "last_error": m.last_error,
+                    "latency": m.latency.snapshot(),
+                }
+            return {
+                "time": now,
+                "uptime_s": round(now - self.started, 1),
+                "sources": sources,
+                "cycle": self.cycle.snapshot(),
+            }
+    
+    def format_status(self):
+        """状态栏用的简短摘要，如 "浙商 85ms 民生 120ms" """
+        with self._lock:
+            parts = []
+            for name, m in self.sources.items():
+                if m.latency.count:
+                    parts.append(f"{name} {m.latency.percentile(50):.0f}ms")
+            return " ".join(parts)
+    
+    def format_report(self, extra=None):
+        """诊断面板用的多行文本"""
+        snapshot = self.snapshot()
+        lines = []
+        for name, s in snapshot["sources"].items():
+            latency = s["latency"]
+            age = "--" if s["stale_age_s"] is None else f"{s['stale_age_s']:.0f}s"
+            lines.append(f"[{name}] 请求 {s['requests']}  成功 {s['successes']}  "
+                         f"失败 {s['failures']}  FAIL {s['fail_status']}  超时 {s['timeouts']}")
+            lines.append(f"  耗时 p50 {latency['p50_ms']:.0f}ms  p95 {latency['p95_ms']:.0f}ms  "
+                         f"最大 {latency['max_ms']:.0f}ms")
+            lines.append(f"  流量 {s['bytes_received'] / 1024:.1f}KB  数据已 {age} 未更新")
+            if s["hedges"] or s["breaker_trips"]:
+                lines.append(f"  对冲 {s['hedges']}（先返回 {s['hedge_wins']}）  "
+                             f"熔断 {s['breaker_trips']} 次  当前{STATE_NAMES.get(s['breaker'], s['breaker'])}")
+            if s["last_error"]:
+                lines.append(f"  最近错误: {s['last_error']}")
+        cycle = snapshot["cycle"]
+        lines.append(f"每轮耗时 p50 {cycle['p50_ms']:.0f}ms  p95 {cycle['p95_ms']:.0f}ms  共 {cycle['count']} 轮")
+        for key, value in (extra or {}).items():
+            lines.append(f"{key}: {value}")
+        return "\n".join(lines)
+    
+    def dump(self, path, extra=None):
+        """把指标快照写入 JSON 文件（先写临时文件再替换）"""
+        data = self.snapshot()
+        if extra:
+            data.update(extra)
+        return dump_json(path, data)
@@ -0,0 +1,175 @@
+'''
+    帧耗时分析：界面主线程每帧的耗时和各回调占用的时间，定长缓冲，可导出
+
+    与界面框架无关：每画完一帧调用 flip()，要统计的回调用 wrap() / patch() 包一层。
+    导出的 trace 为 Chrome trace 格式，可在 chrome://tracing 或 Perfetto 中打开。
+'''
+
+import time
+from array import array
+
+from .config import PROFILE_FRAMES, PROFILE_EVENTS, PROFILE_FRAME_BUDGET
+from .metrics import dump_json
+
+class FrameProfiler:
+    """记录最近 frames 帧的耗时和最近 events 次回调（各自为环形缓冲，内存占用固定）
+    
+    帧耗时为相邻两次 flip() 的间隔，超过 budget 的两倍（至少错过一次刷新）记为卡顿。
+    回调按名称累计次数、总耗时和最大耗时，并记下所在的帧，用于列出最慢的几帧里都做了什么。
+    """
+    def __init__(self, frames=PROFILE_FRAMES, events=PROFILE_EVENTS, budget=PROFILE_FRAME_BUDGET):
+        self.budget = budget
+        self.frame_capacity = frames
+        self.frame_starts = array('d', [0.0]) * frames
+        self.frame_durations = array('d', [0.0]) * frames
+        self.frame_head = 0
+        self.frame_count = 0
+        self.frame_index = 0  # 当前帧的序号
+        self._frame_start = None
+        self.event_capacity = events
+        self.event_frames = array('q', [0]) * events
+        self.event_names = array('H', [0]) * events
+        self.event_starts = array('d', [0.0]) * events
+        self.event_durations = array('d', [0.0]) * events
+        self.event_head = 0
+        self.event_count = 0
+        self.names = []
+        self._name_ids = {}
+        self.totals = {}  # 名称 -> [次数, 总耗时, 最大耗时]（秒）
+        self.janky = 0
+        self.started = time.perf_counter()
+    
+    def flip(self, now=None):
+        """一帧画完，从这里开始计下一帧"""
+        now = time.perf_counter() if now is None else now
+        if self._frame_start is not None:
+            duration = now - self._frame_start
+            i = self.frame_head
+            self.frame_starts[i] = self._frame_start
+            self.frame_durations[i] = duration
+            self.frame_head = (i + 1) % self.frame_capacity
+            if self.frame_count < self.frame_capacity:
+                self.frame_count += 1
+            if duration > 2 * self.budget:
+                self.janky += 1
+            self.frame_index += 1
+        self._frame_start = now
+    
+    def _name_id(self, name):
+        name_id = self._name_ids.get(name)
+        if name_id is None:
+            name_id = self._name_ids[name] = len(self.names)
+            self.names.append(name)
+            self.totals[name] = [0, 0.0, 0.0]
+        return name_id
+    
+    def record(self, name, start, duration):
+        """记一次回调（开始时间为 time.perf_counter()）"""
+        name_id = self._name_id(name)
+        i = self.event_head
+        self.event_frames[i] = self.frame_index
+        self.event_names[i] = name_id
+        self.event_starts[i] = start
+        self.event_durations[i] = duration
+        self.event_head = (i + 1) % self.event_capacity
+        if self.event_count < self.event_capacity:
+            self.event_count += 1
+        total = self.totals[name]
+        total[0] += 1
+        total[1] += duration
+        if duration > total[2]:
+            total[2] = duration
+    
+    def wrap(self, name, func):
+        """返回计时版本的 func"""
+        def profiled(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.record(name, start, time.perf_counter() - start)
+        profiled.__name__ = getattr(func, '__name__', name)
+        profiled.__doc__ = getattr(func, '__doc__', None)
+        return profiled
+    
+    def patch(self, cls, attr, name=None):
+        """给类的方法计时（统计控件重建等所有实例的调用）"""
+        setattr(cls, attr, self.wrap(name or f"{cls.__name__}.{attr}", getattr(cls, attr)))
+    
+    def _frames(self):
+        """[(帧序号, 开始时间, 耗时)]，旧的在前"""
+        first = self.frame_index - self.frame_count
+        return [(first + n, self.frame_starts[i], self.frame_durations[i])
+                for n, i in enumerate((self.frame_head - self.frame_count + k) % self.frame_capacity
+                                      for k in range(self.frame_count))]
+    
+    def _events(self):
+        """[(帧序号, 名称, 开始时间, 耗时)]，旧的在前"""
+        result = []
+        for k in range(self.event_count):
+            i = (self.event_head - self.event_count + k) % self.event_capacity
+            result.append((self.event_frames[i], self.names[self.event_names[i]],
+                           self.event_starts[i], self.event_durations[i]))
+        return result
+    
+    def summary(self, worst=5):
+        """帧耗时分位数、卡顿帧数、各回调的统计，以及最慢的 worst 帧里各回调的耗时（毫秒）"""
+        frames = self._frames()
+        durations = sorted(duration for _, _, duration in frames)
+        
+        def percentile(q):
+            if not durations:
+                return 0.0
+            return durations[min(len(durations) - 1, int(q / 100 * (len(durations) - 1)))] * 1000
+        
+        slowest = sorted(frames, key=lambda frame: frame[2], reverse=True)[:worst]
+        by_frame = {index: {} for index, _, _ in slowest}
+        for index, name, _, duration in self._events():
+            calls = by_frame.get(index)
+            if calls is not None:
+                calls[name] = calls.get(name, 0.0) + duration * 1000
+        return {
+            "seconds": time.perf_counter() - self.started,
+            "frames": self.frame_index,
+            "janky": self.janky,
+            "budget_ms": self.budget * 1000,
+            "frame_ms": {"p50": percentile(50), "p95": percentile(95), "p99": percentile(99),
+                         "max": durations[-1] * 1000 if durations else 0.0},
+            "callbacks": {name: {"count": count, "total_ms": total * 1000, "max_ms": longest * 1000}
+                          for name, (count, total, longest) in self.totals.items()},
+            "worst": [{"frame": index, "ms": duration * 1000,
+                       "callbacks": dict(sorted(by_frame[index].items(), key=lambda item: -item[1]))}
+                      for index, _, duration in slowest],
+        }
+    
+    def format_summary(self, worst=5):
+        s = self.summary(worst)
+        frame = s["frame_ms"]
+        lines = [f"帧数 {s['frames']}  卡顿 {s['janky']}（>{2 * s['budget_ms']:.0f}ms）  "
+                 f"p50 {frame['p50']:.1f}ms  p95 {frame['p95']:.1f}ms  p99 {frame['p99']:.1f}ms  "
+                 f"最长 {frame['max']:.1f}ms"]
+        for name, c in sorted(s["callbacks"].items(), key=lambda item: -item[1]["total_ms"]):
+            lines.append(f"  {name:<28} {c['count']:>6} 次  共 {c['total_ms']:>8.1f}ms  最长 {c['max_ms']:>6.1f}ms")
+        if s["worst"]:
+            lines.append("最慢的帧:")
+        for w in s["worst"]:
+            calls = "  ".join(f"{name} {ms:.1f}ms" for name, ms in w["callbacks"].items()) or "（没有记录的回调）"
+            lines.append(f"  #{w['frame']} {w['ms']:.1f}ms: {calls}")
+        return '\n'.join(lines)
+    
+    def trace(self):
+        """Chrome trace 格式：帧和回调各一行（时间单位微秒）"""
+        events = [{"name": "thread_name", "ph": "M", "pid": 1, "tid": tid, "args": {"name": name}}
+                  for tid, name in ((1, "frames"), (2, "callbacks"))]
+        for index, start, duration in self._frames():
+            events.append({"name": f"frame {index}", "ph": "X", "pid": 1, "tid": 1,
+                           "ts": (start - self.started) * 1e6, "dur": duration * 1e6,
+                           "args": {"janky": duration > 2 * self.budget}})
+        for index, name, start, duration in self._events():
+            events.append({"name": name, "ph": "X", "pid": 1, "tid": 2,
+                           "ts": (start - self.started) * 1e6, "dur": duration * 1e6, "args": {"frame": index}})
+        return events
+    
+    def dump(self, path, worst=5):
+        """导出 trace 和汇总，返回文件路径"""
+        return dump_json(path, {"traceEvents": self.trace(), "summary": self.summary(worst)})
@@ -0,0 +1,132 @@
+'''
+    自适应轮询调度
+'''
+
+import threading
+import random
+import time
+
+from .config import (
+    POLL_INTERVAL, POLL_INTERVAL_FAST, POLL_INTERVAL_BACKGROUND,
+    POLL_INTERVAL_CLOSED, POLL_BACKOFF_MAX, VOLATILE_MOVE,
+)
+
+# 上海黄金交易所交易时段（北京时间），夜盘跨零点
+TRADING_SESSIONS = [((9, 0), (15, 30)), ((20, 0), (2, 30))]
+
+def is_trading_time(timestamp=None):
+    """判断是否处于交易时段（按北京时间计算，与设备时区无关）"""
+    if timestamp is None:
+        timestamp = time.time()
+    t = time.gmtime(timestamp + 8 * 3600)
+    minutes = t.tm_hour * 60 + t.tm_min
+    for (start_h, start_m), (end_h, end_m) in TRADING_SESSIONS:
+        start = start_h * 60 + start_m
+        end = end_h * 60 + end_m
+        if start < end:
+            if start <= minutes < end and t.tm_wday < 5:
+                return True
+        elif minutes >= start and t.tm_wday < 5:
+            return True
+        elif minutes < end and 0 < t.tm_wday < 6:
+            # 夜盘零点后的部分属于前一个交易日（周二~周六凌晨）
+            return True
+    return False
+
+class PollScheduler:
+    """自适应轮询调度器
+    
+    按数据源分别计算下次请求时间：波动大或接近提醒线时加快，
+    非交易时段和后台时放慢，出错时指数退避并加随机抖动。
+    手动刷新或停止时通过 wake() 立即唤醒等待中的轮询线程。
+    """
+    def __init__(self, sources):
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._state = {
+            name: {"next": 0.0, "failures": 0, "last_price": None, "volatile": False, "near_alert": False}
+            for name in sources
+        }
+        self.paused = False
+    
+    def interval(self, name):
+        """计算数据源当前的轮询间隔"""
+        state = self._state[name]
+        if state["failures"]:
+            backoff = min(POLL_BACKOFF_MAX, POLL_INTERVAL * 2 ** (state["failures"] - 1))
+            return backoff / 2 + random.uniform(0, backoff / 2)
+        if self.paused:
+            return POLL_INTERVAL_BACKGROUND
+        if not is_trading_time():
+            return POLL_INTERVAL_CLOSED
+        if state["volatile"] or state["near_alert"]:
+            return POLL_INTERVAL_FAST
+        return POLL_INTERVAL
+    
+    def record_success(self, name, price):
+        """记录一次成功请求，并据此判断价格是否在快速波动"""
+        with self._lock:
+            state = self._state[name]
+            state["failures"] = 0
+            try:
+                price = float(price)
+                last = state["last_price"]
+                state["volatile"] = bool(last) and abs(price - last) / last >= VOLATILE_MOVE
+                state["last_price"] = price
+            except (ValueError, TypeError):
+                state["volatile"] = False
+            state["next"] = time.monotonic() + self.interval(name)
+    
+    def record_failure(self, name):
+        """记录一次失败请求，按失败次数退避"""
+        with self._lock:
+            state = self._state[name]
+            state["failures"] += 1
+            state["next"] = time.monotonic() + self.interval(name)
+    
+    def defer(self, name, delay):
+        """熔断期间推迟数据源的下次请求，不计入失败次数"""
+        with self._lock:
+            state = self._state[name]
+            state["next"] = max(state["next"], time.monotonic() + delay)
+    
+    def set_near_alert(self, name, near):
+        """标记数据源价格是否接近提醒线"""
+        with self._lock:
+            self._state[name]["near_alert"] = near
+    
+    def set_paused(self, paused):
+        """应用切到后台/回到前台"""
+        with self._lock:
+            self.paused = paused
+            if not paused:
+                # 回到前台时马上刷新一次
+                for state in self._state.values():
+                    state["next"] = 0.0
+        self._wake.set()
+    
+    def request_refresh(self, names=None):
+        """手动刷新：指定（默认全部）数据源立即到期并唤醒轮询线程"""
+        with self._lock:
+            for name in (self._state if names is None else names):
+                self._state[name]["next"] = 0.0
+        self._wake.set()
+    
+    def wake(self):
+        """唤醒轮询线程（例如停止运行时）"""
+        self._wake.set()
+    
+    def due_sources(self):
+        """返回已到期需要请求的数据源"""
+        now = time.monotonic()
+        with self._lock:
+            return [name for name, state in self._state.items() if state["next"] <= now]
+    
+    def wait(self):
+        """等到最早的数据源到期，或被提前唤醒"""
+        with self._lock:
+            next_due = min(state["next"] for state in self._state.values())
+        timeout = next_due - time.monotonic()
+        if timeout > 0:
+            self._wake.wait(timeout)
+        self._wake.clear()
@@ -0,0 +1,474 @@
+'''
+    轮询服务：抓取、提醒判断、行情历史和状态快照集中在这里。
+    可以在界面进程内直接使用（PriceService），也可以作为独立进程运行，
+    通过本地 TCP 连接收发 JSON 行（ServiceServer / ServiceClient）：
+
+        python -m goldcore.service --data-dir ~/.goldprice --port 8719
+        python -m goldcore.service --gateway http://192.168.1.10:8720   # 从行情网关读取
+
+    服务 -> 界面: {"type": "tick" | "stats" | "candle" | "alert" | "error" | "alert_settings" | "metrics", ...}
+    界面 -> 服务: {"cmd": "refresh" | "quote" | "candles" | "pause" | "set_alert" | "metrics" | "shutdown", ...}
+'''
+
+import argparse
+import json
+import os
+import socket
+import socketserver
+import struct
+import subprocess
+import sys
+import threading
+import time
+
+from .config import (BANKS, NEAR_ALERT_DISTANCE, STATE_FILE, SERVICE_HOST, SERVICE_PORT, SERVICE_SEND_TIMEOUT,
+                     CANDLE_WARMUP)
+from .fetcher import PricePoller
+from .gateway import GatewayFeed
+from .ticks import TickStore
+from .alerts import AlertEngine, band_rule, load_rules, alert_message
+from .stats import Analytics
+from .candles import CandleAggregator, CANDLE_FIELDS
+from .state import AppState, ALERT_FIELDS
+
+SETTINGS_SOURCE = "浙商"  # 设置界面的基准/涨跌提醒对应的数据源
+
+def encode(message):
+    return (json.dumps(message, ensure_ascii=False) + "\n").encode('utf-8')
+
+class PriceService:
+    """抓取 + 提醒 + 历史记录，结果以消息字典推送给订阅者
+    
+    订阅回调在轮询线程中调用；界面进程内使用时与 ServiceClient 接口相同：
+    subscribe() / send() / start() / stop()。
+    指定 gateway_url 时从行情网关读取行情，不再直接请求接口。
+    """
+    def __init__(self, banks=BANKS, data_dir=None, gateway_url=None):
+        self.banks = banks
+        self.poller = PricePoller(banks, on_price=self._on_price, on_error=self._on_error)
+        self.scheduler = self.poller.scheduler
+        self.feed = self.poller
+        if gateway_url:
+            self.feed = GatewayFeed(gateway_url, on_price=self._on_price, on_error=self._on_error,
+                                    metrics=self.poller.metrics)
+        self.engine = AlertEngine()
+        self.analytics = Analytics(banks)
+        self.candles = CandleAggregator(banks)
+        self.alert_rule_id = None
+        self.alert = {key: None for key in ALERT_FIELDS}
+        self.latest = {}  # 数据源 -> 最新的 tick 消息
+        self._lock = threading.Lock()
+        self._listeners = []
+        self.tick_store = None
+        self.state = None
+        if data_dir:
+            os.makedirs(data_dir, exist_ok=True)
+            self.tick_store = TickStore(os.path.join(data_dir, 'ticks'), banks)
+            now = time.time()
+            for source in banks:
+                self.candles.warm(source, self.tick_store.range(source, now - CANDLE_WARMUP, now))
+            self.state = AppState(os.path.join(data_dir, STATE_FILE))
+            self.load_rules(os.path.join(data_dir, 'alert_rules.json'))
+            if self.state.alert:
+                self.set_alert(**self.state.alert)
+    
+    def load_rules(self, path):
+        """读取 alert_rules.json 中的其他提醒规则"""
+        if not os.path.exists(path):
+            return
+        try:
+            for rule in load_rules(path):
+                self.engine.add(rule)
+            print(f"已加载提醒规则 {len(self.engine)} 条")
+        except Exception as e:
+            print(f"提醒规则加载失败: {e}")
+    
+    def subscribe(self, callback, snapshot=True):
+        """注册消息回调，snapshot=True 时先补发当前设置和各数据源最新价格"""
+        self._listeners.append(callback)
+        if snapshot:
+            for message in self.snapshot():
+                callback(message)
+    
+    def unsubscribe(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+    
+    def snapshot(self):
+        return [self.alert_settings_message()] + list(self.latest.values())
+    
+    def _emit(self, message):
+        for callback in list(self._listeners):
+            try:
+                callback(message)
+            except Exception as e:
+                print(f"消息处理失败: {e}")
+    
+    def alert_settings_message(self):
+        with self._lock:
+            return dict(self.alert, type="alert_settings")
+    
+    def set_alert(self, alert_enabled=False, alert_base_price=None, alert_up_amount=None, alert_down_amount=None):
+        """设置界面的基准/涨跌提醒"""
+        with self._lock:
+            if self.alert_rule_id is not None:
+                self.engine.remove(self.alert_rule_id)
+                self.alert_rule_id = None
+            if alert_enabled and alert_base_price:
+                rule = band_rule(SETTINGS_SOURCE, float(alert_base_price),
+                                 float(alert_up_amount or 0), float(alert_down_amount or 0))
+                self.alert_rule_id = self.engine.add(rule)
+            self.alert = {"alert_enabled": bool(alert_enabled), "alert_base_price": alert_base_price,
+                          "alert_up_amount": alert_up_amount, "alert_down_amount": alert_down_amount}
+        if self.state:
+            self.state.set_alert(**self.alert)
+        self._emit(self.alert_settings_message())
+    
+    def _on_price(self, tick):
+        source = tick.source
+        message = tick.to_message()
+        message.update(type="tick", latency=self.poller.metrics.format_status())
+        self.latest[source] = message
+        if self.feed is not self.poller:
+            # 从网关读取行情时轮询器不工作，报价同样记进缓存供读取
+            self.poller.cache.put(tick)
+        if self.tick_store:
+            self.tick_store.add(tick)
+        if self.state:
+            self.state.record_price(source, message["price"], message["change"], tick.time)
+        self._emit(message)
+        
+        derived = self.analytics.update(source, tick.value, tick.time)
+        for resolution, candle in self.candles.update(source, tick.value, tick.time).items():
+            self._emit({"type": "candle", "source": source, "resolution": resolution, "candle": candle})
+        self._emit({"type": "stats", "series": self.analytics.snapshot(
+            [key for key in derived if key in self.analytics.series])})
+        self._check_alerts(source, tick.value, message["price"], derived)
+    
+    def _on_error(self, source, message, error):
+        print(f"{message}: {error}" if error else message)
+        self._emit({"type": "error", "source": source, "message": message})
+    
+    def _check_alerts(self, source, current, price_text, derived):
+        events = self.engine.update(source, current)
+        # 滚动统计得出的 z 分数（数据源和价差本身已由 update() 判断）
+        for key, value in derived.items():
+            if key.startswith("z:"):
+                events.extend(self.engine.update_key(key, value))
+        
+        for event in events:
+            if event.rule.key == source:
+                text = str(price_text)
+            elif event.rule.unit == "元":
+                text = str(event.price)
+            else:
+                text = f"{event.price:.2f}"
+            self._emit({"type": "alert", "rule_id": event.rule.id, "key": event.rule.key,
+                        "name": event.rule.name or "", "direction": event.direction,
+                        "price": event.price, "price_text": text, "unit": event.rule.unit,
+                        "message": alert_message(event, text)})
+            if event.rule.id == self.alert_rule_id:
+                # 基准/涨跌提醒触发后以当前价格为新基准
+                with self._lock:
+                    self.alert["alert_base_price"] = event.price
+                if self.state:
+                    self.state.set_alert(alert_base_price=event.price)
+                self._emit(self.alert_settings_message())
+        
+        # 接近提醒线时加快轮询，避免错过触发
+        distance = self.engine.distance(source)
+        self.scheduler.set_near_alert(source, distance is not None and distance <= NEAR_ALERT_DISTANCE)
+    
+    def metrics_message(self):
+        http = self.poller.http.stats()
+        extra = {
+            "连接复用": f"握手 {http['connections_opened']} 次，省掉 {http['handshakes_avoided']} 次",
+            "gzip 节省": f"{http['bytes_saved'] / 1024:.1f}KB",
+            "提醒压下": f"{self.engine.suppressed} 次",
+        }
+        cache = self.poller.cache.stats()
+        extra["报价缓存"] = (f"命中 {cache['hits']}  过期 {cache['stale_hits']}  未命中 {cache['misses']}"
+                         f"  合并请求 {cache['coalesced']}")
+        snapshot = self.poller.metrics.snapshot()
+        snapshot.update(http=http, alerts_suppressed=self.engine.suppressed, price_cache=cache)
+        return {"type": "metrics", "status": self.poller.metrics.format_status(),
+                "report": self.poller.metrics.format_report(extra), "snapshot": snapshot}
+    
+    def _command_source(self, command):
+        """命令中的数据源，默认为设置界面的数据源，未知的数据源抛出 ValueError"""
+        source = command.get("source") or SETTINGS_SOURCE
+        if source not in self.banks:
+            raise ValueError(f"未知数据源: {source}")
+        return source
+    
+    def handle_command(self, command):
+        """执行界面发来的命令，需要回复时返回消息字典，命令无效时抛出 ValueError"""
+        cmd = command.get("cmd")
+        if cmd == "refresh":
+            # 从网关读取行情时轮询器不工作，改为向网关重新要一次快照
+            self.feed.refresh()
+        elif cmd == "quote":
+            source = self._command_source(command)
+            quote = self.poller.quote(source)
+            if self.feed is not self.poller and (quote is None or quote.age() >= self.poller.cache.ttl):
+                self.feed.refresh()
+            reply = {"type": "quote", "source": source, "price": None}
+            if quote is not None:
+                reply.update(quote.to_dict(self.poller.cache.ttl))
+            return reply
+        elif cmd == "candles":
+            # {"cmd": "candles", "source": ..., "resolution": 60, "count": 120}，最后一根为未收盘的当前 K 线
+            source = self._command_source(command)
+            resolution = int(command.get("resolution") or 60)
+            try:
+                candles = self.candles.candles(source, resolution, command.get("count"))
+            except KeyError:
+                raise ValueError(f"没有 {source} 的 {resolution} 秒 K 线") from None
+            return {"type": "candles", "source": source, "resolution": resolution,
+                    "fields": CANDLE_FIELDS, "candles": candles}
+        elif cmd == "pause":
+            self.scheduler.set_paused(bool(command.get("value")))
+        elif cmd == "set_alert":
+            self.set_alert(**{key: command.get(key) for key in ALERT_FIELDS})
+        elif cmd == "metrics":
+            return self.metrics_message()
+        else:
+            raise ValueError(f"未知命令: {cmd}")
+        return None
+    
+    def send(self, command):
+        """进程内直接执行命令（与 ServiceClient.send 对应），回复推送给订阅者"""
+        reply = self.handle_command(command)
+        if reply is not None:
+            self._emit(reply)
+        return True
+    
+    def start(self):
+        self.feed.start()
+    
+    def stop(self):
+        if self.feed is not self.poller:
+            self.feed.stop()
+        self.poller.stop()
+        if self.tick_store:
+            self.tick_store.close()
+        if self.state:
+            self.state.save()
+
+class _ClientHandler(socketserver.StreamRequestHandler):
+    def setup(self):
+        super().setup()
+        # 只限制发送：界面卡住时写满缓冲区的连接直接断开，不拖住轮询线程
+        timeval = struct.pack('ll', int(SERVICE_SEND_TIMEOUT), int(SERVICE_SEND_TIMEOUT % 1 * 1e6))
+        self.request.setsockopt(socket.SOL_SOCKET, socket.SO_SNDTIMEO, timeval)
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._send_lock = threading.Lock()
+    
+    def send(self, data):
+        with self._send_lock:
+            try:
+                self.request.sendall(data)
+                return True
+            except OSError:
+                return False
+    
+    def handle(self):
+        server = self.server
+        server.add_client(self)
+        try:
+            for message in server.service.snapshot():
+                self.send(encode(message))
+            for line in self.rfile:
+                try:
+                    command = json.loads(line)
+                except ValueError:
+                    continue
+                if not isinstance(command, dict):
+                    continue
+                if command.get("cmd") == "shutdown":
+                    threading.Thread(target=server.shutdown, daemon=True).start()
+                    break
+                try:
+                    reply = server.service.handle_command(command)
+                except (ValueError, TypeError) as e:
+                    reply = {"type": "error", "source": None, "message": str(e)}
+                if reply is not None:
+                    self.send(encode(reply))
+        except OSError:
+            pass
+        finally:
+            server.remove_client(self)
+
+class ServiceServer(socketserver.ThreadingTCPServer):
+    """把 PriceService 的消息广播给所有连接的界面，并执行它们发来的命令"""
+    allow_reuse_address = True
+    daemon_threads = True
+    
+    def __init__(self, service, host=SERVICE_HOST, port=SERVICE_PORT):
+        super().__init__((host, port), _ClientHandler)
+        self.service = service
+        self._clients = set()
+        self._clients_lock = threading.Lock()
+        service.subscribe(self.broadcast, snapshot=False)
+    
+    @property
+    def client_count(self):
+        return len(self._clients)
+    
+    def add_client(self, client):
+        with self._clients_lock:
+            self._clients.add(client)
+    
+    def remove_client(self, client):
+        with self._clients_lock:
+            self._clients.discard(client)
+    
+    def broadcast(self, message):
+        data = encode(message)
+        with self._clients_lock:
+            clients = list(self._clients)
+        for client in clients:
+            if not client.send(data):
+                self.remove_client(client)
+                try:
+                    client.request.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+
+class ServiceClient:
+    """连接独立进程中的轮询服务，接口与 PriceService 相同
+    
+    断线后自动重连，服务端在连接建立时补发当前设置和最新价格；
+    断线期间发不出去的 set_alert / pause 命令在重连后补发最新一条。
+    """
+    RESEND_COMMANDS = ("set_alert", "pause")
+    
+    def __init__(self, host=SERVICE_HOST, port=SERVICE_PORT, retry_interval=1.0):
+        self.host = host
+        self.port = port
+        self.retry_interval = retry_interval
+        self.running = False
+        self.connected = False
+        self._listeners = []
+        self._sock = None
+        self._send_lock = threading.Lock()
+        self._unsent = {}
+        self._thread = None
+    
+    def subscribe(self, callback, snapshot=True):
+        self._listeners.append(callback)
+    
+    def unsubscribe(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+    
+    def _emit(self, message):
+        for callback in list(self._listeners):
+            try:
+                callback(message)
+            except Exception as e:
+                print(f"消息处理失败: {e}")
+    
+    def send(self, command):
+        """发送命令，未连接或发送失败时返回 False"""
+        data = encode(command)
+        with self._send_lock:
+            sock = self._sock
+            if sock is not None:
+                try:
+                    sock.sendall(data)
+                    self._unsent.pop(command.get("cmd"), None)
+                    return True
+                except OSError:
+                    pass
+            if command.get("cmd") in self.RESEND_COMMANDS:
+                self._unsent[command.get("cmd")] = command
+            return False
+    
+    def _run(self):
+        while self.running:
+            try:
+                sock = socket.create_connection((self.host, self.port), timeout=self.retry_interval)
+            except OSError:
+                time.sleep(self.retry_interval)
+                continue
+            sock.settimeout(None)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            with self._send_lock:
+                self._sock = sock
+                unsent, self._unsent = list(self._unsent.values()), {}
+            self.connected = True
+            self._emit({"type": "connection", "connected": True})
+            for command in unsent:
+                self.send(command)
+            try:
+                for line in sock.makefile('rb'):
+                    try:
+                        message = json.loads(line)
+                    except ValueError:
+                        continue
+                    self._emit(message)
+            except OSError:
+                pass
+            finally:
+                with self._send_lock:
+                    self._sock = None
+                sock.close()
+                self.connected = False
+                self._emit({"type": "connection", "connected": False})
+            if self.running:
+                time.sleep(self.retry_interval)
+    
+    def start(self):
+        self.running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        self.running = False
+        with self._send_lock:
+            sock = self._sock
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+def spawn_service(data_dir, port=SERVICE_PORT, gateway_url=None):
+    """以子进程启动服务（电脑上调试用），返回 subprocess.Popen"""
+    args = [sys.executable, '-m', 'goldcore.service', '--data-dir', data_dir, '--port', str(port)]
+    if gateway_url:
+        args += ['--gateway', gateway_url]
+    return subprocess.Popen(args)
+
+def run_service(data_dir=None, host=SERVICE_HOST, port=SERVICE_PORT, on_alert=None, gateway_url=None):
+    """运行服务直到收到 shutdown 命令；on_alert 在没有界面连接时处理提醒（如发系统通知）"""
+    service = PriceService(BANKS, data_dir, gateway_url)
+    server = ServiceServer(service, host, port)
+    if on_alert:
+        def notify_when_detached(message):
+            if message["type"] == "alert" and not server.client_count:
+                on_alert(message)
+        service.subscribe(notify_when_detached, snapshot=False)
+    service.start()
+    print(f"轮询服务已启动: {host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.stop()
+        server.server_close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='goldcore.service', description='金价轮询服务（本地 TCP，JSON 行）')
+    parser.add_argument('--data-dir', help='行情历史、状态快照和 alert_rules.json 所在目录')
+    parser.add_argument('--host', default=SERVICE_HOST)
+    parser.add_argument('--port', type=int, default=SERVICE_PORT)
+    parser.add_argument('--gateway', metavar='URL', help='从行情网关读取行情，如 http://192.168.1.10:8720')
+    args = parser.parse_args(argv)
+    run_service(args.data_dir, args.host, args.port, gateway_url=args.gateway)
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
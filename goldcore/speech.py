@@ -0,0 +1,215 @@
+'''
+    语音播报：把提醒拆成固定片段（"涨了"、"现在"、各个数字、"元"），
+    每个片段只合成一次并缓存为音频文件，播报时按顺序播放缓存文件。
+
+    合成后端可替换：Android 上用 TextToSpeech.synthesizeToFile，
+    其他平台用 ToneBackend 生成占位提示音，便于在电脑上测量和调试。
+'''
+
+import hashlib
+import math
+import os
+import struct
+import threading
+import time
+import wave
+
+from .config import SPEECH_CACHE_MAX_BYTES
+
+DIGIT_NAMES = {
+    '0': '零', '1': '一', '2': '二', '3': '三', '4': '四',
+    '5': '五', '6': '六', '7': '七', '8': '八', '9': '九', '.': '点', '-': '负'
+}
+
+# 启动时预先合成的片段
+COMMON_FRAGMENTS = ("涨了", "跌了", "现在", "元") + tuple(DIGIT_NAMES.values())
+
+def price_to_chinese(price_str):
+    """"778.5" -> "七七八点五" """
+    return ''.join(DIGIT_NAMES.get(c, c) for c in price_str)
+
+def speech_text(direction, price_str, unit="元"):
+    """完整播报文字，直接交给语音引擎时使用"""
+    return f"{direction}，现在{price_to_chinese(price_str)}{unit}"
+
+def speech_fragments(direction, price_str, unit="元"):
+    """播报拆成的片段列表，数字逐字成段，便于复用缓存"""
+    fragments = [direction, "现在"]
+    fragments.extend(DIGIT_NAMES.get(c, c) for c in price_str)
+    fragments.append(unit)
+    return [fragment for fragment in fragments if fragment]
+
+class ToneBackend:
+    """占位后端：按文字长度生成一段提示音（WAV），不依赖任何语音引擎"""
+    name = "tone"
+    extension = "wav"
+    sample_rate = 16000
+    
+    def render(self, text, path):
+        frames = int(self.sample_rate * 0.08 * max(1, len(text)))
+        # 不同文字用不同音高，听得出片段的切换
+        frequency = 440 + int(hashlib.md5(text.encode('utf-8')).hexdigest()[:2], 16)
+        samples = bytearray()
+        for i in range(frames):
+            value = int(8000 * math.sin(2 * math.pi * frequency * i / self.sample_rate))
+            samples += struct.pack('<h', value)
+        with wave.open(path, 'wb') as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(self.sample_rate)
+            f.writeframes(bytes(samples))
+    
+    def ready(self, path):
+        return os.path.exists(path)
+
+class AndroidTtsBackend:
+    """用 TextToSpeech.synthesizeToFile 合成片段（异步，文件稍后才写完）"""
+    name = "android"
+    extension = "wav"
+    settle_seconds = 2  # 文件最后修改超过该秒数才认为合成完成（合成后不再改动该文件）
+    
+    def __init__(self, tts_engine):
+        from jnius import autoclass
+        self.tts = tts_engine
+        self._File = autoclass('java.io.File')
+        self._Bundle = autoclass('android.os.Bundle')
+    
+    def render(self, text, path):
+        self.tts.synthesizeToFile(text, self._Bundle(), self._File(path), os.path.basename(path))
+    
+    def ready(self, path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+        return stat.st_size > 0 and time.time() - stat.st_mtime > self.settle_seconds
+
+class SpeechCache:
+    """片段音频的磁盘缓存
+    
+    文件名由后端名称和文字的哈希决定。后端确认合成完成后写一个旁边的标记文件
+    （<音频>.ok），之后只看标记，不再由后端判断；音频文件本身合成后不再改动。
+    每次使用时更新标记文件的修改时间，总大小超过 max_bytes 时删除最久未用的片段（LRU）。
+    """
+    def __init__(self, directory, backend, max_bytes=SPEECH_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.backend = backend
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._pending = set()  # 已提交合成、尚未完成的文件
+        self._ready = set()  # 已确认合成完成的文件
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+    
+    def path(self, text):
+        digest = hashlib.sha1(f"{self.backend.name}:{text}".encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.directory, f"{digest}.{self.backend.extension}")
+    
+    @staticmethod
+    def marker(path):
+        return f"{path}.ok"
+    
+    def _check_ready(self, path):
+        """片段是否已合成完成（调用方持有锁）"""
+        if path in self._ready:
+            return True
+        marker = self.marker(path)
+        if not (os.path.exists(marker) and os.path.exists(path)):
+            if not self.backend.ready(path):
+                return False
+            try:
+                with open(marker, 'wb'):
+                    pass
+            except OSError:
+                pass
+        self._ready.add(path)
+        self._pending.discard(path)
+        return True
+    
+    def cached(self, text):
+        """已合成完成时返回片段音频路径（并记为最近使用），否则返回 None，不提交合成"""
+        path = self.path(text)
+        with self._lock:
+            confirmed = path in self._ready
+            if not self._check_ready(path):
+                return None
+            self.hits += 1
+        if not confirmed:
+            self.evict()  # 异步合成的片段到这里才确认完成
+        try:
+            # 最近使用时间记在标记文件上，音频文件的修改时间留给后端判断合成是否完成
+            os.utime(self.marker(path))
+        except OSError:
+            pass
+        return path
+    
+    def render(self, text):
+        """返回片段音频路径；没有缓存时提交合成（在调用线程中执行），合成未完成返回 None"""
+        path = self.cached(text)
+        if path is not None:
+            return path
+        path = self.path(text)
+        with self._lock:
+            self.misses += 1
+            if path in self._pending:
+                return None
+            self._pending.add(path)
+        try:
+            self.backend.render(text, path)
+        except Exception as e:
+            print(f"语音片段合成失败 {text}: {e}")
+            with self._lock:
+                self._pending.discard(path)
+            return None
+        return self.cached(text)
+    
+    def lookup(self, fragments):
+        """全部片段都已缓存时返回路径列表，否则返回 None，缺少的片段在后台线程中补合成
+        
+        不在调用线程中合成，可以在界面线程调用。
+        """
+        paths = [self.cached(fragment) for fragment in fragments]
+        missing = [fragment for fragment, path in zip(fragments, paths) if path is None]
+        if not missing:
+            return paths
+        threading.Thread(target=self.prewarm, args=(list(dict.fromkeys(missing)),), daemon=True).start()
+        return None
+    
+    def prewarm(self, fragments=COMMON_FRAGMENTS):
+        for fragment in fragments:
+            self.render(fragment)
+    
+    def evict(self):
+        """总大小超过上限时按最后使用时间（标记文件的修改时间）删除旧片段"""
+        entries = []
+        total = 0
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and not entry.name.endswith('.ok'):
+                stat = entry.stat()
+                try:
+                    used = os.stat(self.marker(entry.path)).st_mtime
+                except OSError:
+                    used = stat.st_mtime
+                entries.append((used, stat.st_size, entry.path))
+                total += stat.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            with self._lock:
+                if path in self._pending:
+                    continue  # 正在合成
+                self._ready.discard(path)
+            try:
+                os.remove(self.marker(path))
+            except OSError:
+                pass
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+    
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses}
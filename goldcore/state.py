@@ -0,0 +1,79 @@
+'''
+    启动快照：最近一次的价格和提醒设置，下次启动时立即显示并恢复提醒
+'''
+
+import json
+import os
+import threading
+import time
+
+from .config import STATE_SAVE_INTERVAL
+
+ALERT_FIELDS = ('alert_enabled', 'alert_base_price', 'alert_up_amount', 'alert_down_amount')
+
+class AppState:
+    """持久化的运行状态（JSON 文件，先写临时文件再替换，写到一半被杀也不会损坏）
+    
+    prices: 数据源 -> {"price", "change", "time"}；alert: ALERT_FIELDS 对应的设置。
+    行情更新很频繁，record_price() 只在距上次写盘超过 save_interval 时落盘，
+    设置变化和退出时用 save() 立即写入。
+    """
+    def __init__(self, path, save_interval=STATE_SAVE_INTERVAL):
+        self.path = path
+        self.save_interval = save_interval
+        self._lock = threading.Lock()
+        self._last_save = 0.0
+        self._dirty = False
+        self.prices = {}
+        self.alert = {}
+        self.load()
+    
+    def load(self):
+        """读取快照，文件不存在或损坏时保持为空"""
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"状态文件读取失败: {e}")
+            return
+        self.prices = {name: dict(value) for name, value in data.get('prices', {}).items()
+                       if isinstance(value, dict)}
+        self.alert = {key: data.get('alert', {}).get(key) for key in ALERT_FIELDS}
+    
+    def record_price(self, source, price, change, timestamp=None):
+        """记录最新价格，必要时写盘（可在轮询线程中调用）"""
+        with self._lock:
+            self.prices[source] = {"price": str(price), "change": str(change),
+                                   "time": timestamp or time.time()}
+            self._dirty = True
+            if time.monotonic() - self._last_save < self.save_interval:
+                return
+        self.save()
+    
+    def set_alert(self, **settings):
+        """更新提醒设置并立即写盘"""
+        with self._lock:
+            for key in ALERT_FIELDS:
+                if key in settings:
+                    self.alert[key] = settings[key]
+            self._dirty = True
+        self.save()
+    
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {"prices": self.prices, "alert": self.alert, "saved": time.time()}
+            self._dirty = False
+            self._last_save = time.monotonic()
+            tmp_path = f"{self.path}.tmp"
+            try:
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                self._dirty = True
+                print(f"状态文件保存失败: {e}")
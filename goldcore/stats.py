@@ -0,0 +1,156 @@
+'''
+    流式统计：各数据源价格和价差的滚动均值/标准差/z 分数/最高/最低
+
+    每条行情 O(1)（均摊）更新，不回扫历史：
+    均值和方差用可删除的 Welford 算法，最高/最低用单调队列。
+'''
+
+import math
+from collections import deque
+
+from .config import STATS_WINDOWS, STATS_SPREADS
+from .alerts import spread_key, zscore_key
+
+class RollingWindow:
+    """按时间的滑动窗口（最近 seconds 秒）"""
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.values = deque()  # (时间戳, 值)
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self._max = deque()  # 值单调递减
+        self._min = deque()  # 值单调递增
+    
+    def add(self, timestamp, value):
+        self.values.append((timestamp, value))
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        
+        while self._max and self._max[-1][1] <= value:
+            self._max.pop()
+        self._max.append((timestamp, value))
+        while self._min and self._min[-1][1] >= value:
+            self._min.pop()
+        self._min.append((timestamp, value))
+        self.expire(timestamp)
+    
+    def expire(self, now):
+        """移出窗口外的值"""
+        cutoff = now - self.seconds
+        values = self.values
+        while values and values[0][0] <= cutoff:
+            _, value = values.popleft()
+            self.count -= 1
+            if not self.count:
+                self.mean = 0.0
+                self._m2 = 0.0
+            else:
+                delta = value - self.mean
+                self.mean -= delta / self.count
+                self._m2 -= delta * (value - self.mean)
+        while self._max and self._max[0][0] <= cutoff:
+            self._max.popleft()
+        while self._min and self._min[0][0] <= cutoff:
+            self._min.popleft()
+    
+    @property
+    def std(self):
+        if self.count < 2:
+            return 0.0
+        # 反复增删后 _m2 可能因舍入略小于 0
+        return math.sqrt(max(self._m2, 0.0) / (self.count - 1))
+    
+    @property
+    def max(self):
+        return self._max[0][1] if self._max else None
+    
+    @property
+    def min(self):
+        return self._min[0][1] if self._min else None
+    
+    def zscore(self, value):
+        std = self.std
+        return (value - self.mean) / std if std > 0 else 0.0
+    
+    def snapshot(self, value):
+        return {
+            "count": self.count,
+            "mean": round(self.mean, 4),
+            "std": round(self.std, 4),
+            "z": round(self.zscore(value), 3),
+            "min": self.min,
+            "max": self.max,
+        }
+
+class RollingStats:
+    """一个序列在多个窗口上的统计"""
+    def __init__(self, windows=STATS_WINDOWS):
+        self.windows = {seconds: RollingWindow(seconds) for seconds in windows}
+        self.value = None
+        self.timestamp = None
+    
+    def add(self, timestamp, value):
+        self.value = value
+        self.timestamp = timestamp
+        for window in self.windows.values():
+            window.add(timestamp, value)
+    
+    def snapshot(self):
+        if self.value is None:
+            return None
+        return {
+            "value": self.value,
+            "time": self.timestamp,
+            "windows": {str(seconds): window.snapshot(self.value) for seconds, window in self.windows.items()},
+        }
+
+class Analytics:
+    """行情分析：每条行情更新该数据源及相关价差的滚动统计
+    
+    update() 返回本次更新了的序列 {键: 值}，其中包括各窗口的 z 分数
+    （键为 zscore_key()），可直接交给 AlertEngine.update_key() 判断提醒。
+    """
+    def __init__(self, sources, spreads=STATS_SPREADS, windows=STATS_WINDOWS):
+        self.series = {name: RollingStats(windows) for name in sources}
+        self.latest = {}
+        self.spread_keys = []
+        self._spreads = {}  # 数据源 -> [(价差键, a, b)]
+        for source_a, source_b in spreads:
+            if source_a in self.series and source_b in self.series:
+                key = spread_key(source_a, source_b)
+                self.series[key] = RollingStats(windows)
+                self.spread_keys.append(key)
+                for source in (source_a, source_b):
+                    self._spreads.setdefault(source, []).append((key, source_a, source_b))
+    
+    def _add(self, key, timestamp, value, updated):
+        stats = self.series[key]
+        stats.add(timestamp, value)
+        updated[key] = value
+        for seconds, window in stats.windows.items():
+            updated[zscore_key(key, seconds)] = window.zscore(value)
+    
+    def update(self, source, price, timestamp):
+        if source not in self.series:
+            return {}
+        updated = {}
+        self.latest[source] = price
+        self._add(source, timestamp, price, updated)
+        for key, source_a, source_b in self._spreads.get(source, ()):
+            if source_a in self.latest and source_b in self.latest:
+                spread = round(self.latest[source_a] - self.latest[source_b], 6)
+                self._add(key, timestamp, spread, updated)
+        return updated
+    
+    def snapshot(self, keys=None):
+        """{序列键: 统计}，keys 为 None 时返回全部有数据的序列"""
+        result = {}
+        for key in (keys if keys is not None else self.series):
+            stats = self.series.get(key)
+            snapshot = stats.snapshot() if stats else None
+            if snapshot is not None:
+                result[key] = snapshot
+        return result
@@ -0,0 +1,271 @@
+'''
+    行情记录（Tick）和行情历史：内存环形缓冲 + 只追加的磁盘日志
+'''
+
+import argparse
+import threading
+import time
+import os
+import mmap
+import struct
+from array import array
+from decimal import Decimal, InvalidOperation
+
+from .config import BANKS, TICK_RING_CAPACITY
+
+TICK_RECORD = struct.Struct('<ddd')  # 磁盘记录：时间戳、价格、涨跌
+# 与 TICK_RECORD 对应的 NumPy 结构化类型
+TICK_DTYPE = [('timestamp', '<f8'), ('price', '<f8'), ('change', '<f8')]
+
+def log_path(directory, source, banks=BANKS):
+    """数据源的磁盘日志路径（目录下的 ticks_<id>.bin）"""
+    return os.path.join(directory, f"ticks_{banks[source]['id']}.bin")
+
+def parse_date(text):
+    """"2026-05-01" 或 "2026-05-01 09:30" -> 本地时间的时间戳（命令行的 --since / --until）"""
+    for fmt in ('%Y-%m-%d %H:%M', '%Y-%m-%d'):
+        try:
+            return time.mktime(time.strptime(text, fmt))
+        except ValueError:
+            continue
+    raise argparse.ArgumentTypeError(f"无法识别的时间: {text}")
+
+def to_decimal(value):
+    """接口返回的数值或字符串 -> Decimal，无法解析（如 "--"）时返回 None"""
+    if isinstance(value, Decimal):
+        number = value
+    elif isinstance(value, float):
+        number = Decimal(repr(value))  # 按最短表示转换，避免 778.5 变成一长串二进制小数
+    elif isinstance(value, (int, str)) and not isinstance(value, bool):
+        try:
+            number = Decimal(value.strip() if isinstance(value, str) else value)
+        except InvalidOperation:
+            return None
+    else:
+        return None
+    return number if number.is_finite() else None
+
+def change_trend(change):
+    """涨跌 -> 1 / -1 / 0，无法解析时返回 None（界面显示上次保存的价格时用）"""
+    change = to_decimal(change)
+    return None if change is None else (change > 0) - (change < 0)
+
+class Tick:
+    """一条解析好的报价
+    
+    价格、涨跌为精确的 Decimal（涨跌缺失时为 None），value 为价格的浮点数，
+    供统计、提醒和行情历史直接使用；time 为收到报价的时间（time.time()）。
+    每条响应只解析、校验一次（Tick.parse），之后各处不再转换。
+    """
+    __slots__ = ("source", "price", "change", "value", "time")
+    
+    def __init__(self, source, price, change, value, received):
+        self.source = source
+        self.price = price
+        self.change = change
+        self.value = value
+        self.time = received
+    
+    @classmethod
+    def parse(cls, source, price, change, received=None):
+        """校验接口返回的价格和涨跌，价格无效时抛出 ValueError"""
+        number = to_decimal(price)
+        if number is None or number <= 0:
+            raise ValueError(f"{source}价格无效: {price!r}")
+        return cls(source, number, to_decimal(change), float(number),
+                   time.time() if received is None else received)
+    
+    @property
+    def price_text(self):
+        return str(self.price)
+    
+    @property
+    def change_text(self):
+        return "--" if self.change is None else str(self.change)
+    
+    @property
+    def trend(self):
+        """涨 1，跌 -1，平 0，涨跌缺失时为 None"""
+        return None if self.change is None else (self.change > 0) - (self.change < 0)
+    
+    def change_value(self):
+        return float('nan') if self.change is None else float(self.change)
+    
+    def to_message(self):
+        """推送给界面/订阅者的字段（价格、涨跌为字符串，保留接口给出的小数位）"""
+        return {"source": self.source, "price": self.price_text, "change": self.change_text,
+                "trend": self.trend, "time": self.time}
+    
+    def __repr__(self):
+        return f"Tick({self.source!r}, {self.price_text}, {self.change_text}, {self.time:.3f})"
+
+class TickRing:
+    """定长环形缓冲区，按列存放 (时间戳, 价格, 涨跌)
+    
+    用 array 存储浮点数，内存占用固定，写满后覆盖最旧的记录。
+    时间戳需单调递增，按时间查询时二分查找。
+    """
+    def __init__(self, capacity=TICK_RING_CAPACITY):
+        self.capacity = capacity
+        self.timestamps = array('d', [0.0]) * capacity
+        self.prices = array('d', [0.0]) * capacity
+        self.changes = array('d', [0.0]) * capacity
+        self.head = 0  # 下一条写入位置
+        self.count = 0
+    
+    def __len__(self):
+        return self.count
+    
+    def append(self, timestamp, price, change):
+        i = self.head
+        self.timestamps[i] = timestamp
+        self.prices[i] = price
+        self.changes[i] = change
+        self.head = (i + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+    
+    def _physical(self, index):
+        """逻辑下标（0 为最旧）转换为数组下标"""
+        return (self.head - self.count + index) % self.capacity
+    
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        i = self._physical(index)
+        return self.timestamps[i], self.prices[i], self.changes[i]
+    
+    def latest(self):
+        return self[-1] if self.count else None
+    
+    def oldest_timestamp(self):
+        return self.timestamps[self._physical(0)] if self.count else None
+    
+    def _bisect(self, timestamp):
+        """第一个时间戳 >= timestamp 的逻辑下标"""
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.timestamps[self._physical(mid)] < timestamp:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+    
+    def range(self, start, end):
+        """返回时间戳在 [start, end) 内的记录"""
+        return [self[i] for i in range(self._bisect(start), self._bisect(end))]
+
+class TickLog:
+    """只追加的二进制行情日志
+    
+    每条记录定长 24 字节，写入时追加到文件末尾；
+    读取时用 mmap 映射文件，按时间戳二分查找，不需要把整个文件读进内存。
+    """
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, 'ab')
+        self._map = None
+        self._mapped_size = 0
+    
+    def append(self, timestamp, price, change):
+        with self._lock:
+            self._file.write(TICK_RECORD.pack(timestamp, price, change))
+            self._file.flush()
+    
+    def _view(self):
+        """返回覆盖当前文件内容的只读映射（文件增长后重新映射）"""
+        size = os.path.getsize(self.path)
+        size -= size % TICK_RECORD.size  # 忽略写了一半的尾部记录
+        if size != self._mapped_size:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            if size:
+                with open(self.path, 'rb') as f:
+                    self._map = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+            self._mapped_size = size
+        return self._map, size // TICK_RECORD.size
+    
+    def __len__(self):
+        with self._lock:
+            return self._view()[1]
+    
+    def _bisect(self, view, count, timestamp):
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if TICK_RECORD.unpack_from(view, mid * TICK_RECORD.size)[0] < timestamp:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+    
+    def range(self, start, end):
+        """返回时间戳在 [start, end) 内的记录"""
+        with self._lock:
+            view, count = self._view()
+            if not count:
+                return []
+            first = self._bisect(view, count, start)
+            last = self._bisect(view, count, end)
+            return [TICK_RECORD.unpack_from(view, i * TICK_RECORD.size) for i in range(first, last)]
+    
+    def tail(self, n):
+        """返回最近 n 条记录"""
+        with self._lock:
+            view, count = self._view()
+            return [TICK_RECORD.unpack_from(view, i * TICK_RECORD.size) for i in range(max(0, count - n), count)]
+    
+    def close(self):
+        with self._lock:
+            self._file.close()
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+                self._mapped_size = 0
+
+class TickStore:
+    """各数据源的行情历史：内存环形缓冲 + 磁盘日志"""
+    def __init__(self, directory, sources, capacity=TICK_RING_CAPACITY):
+        os.makedirs(directory, exist_ok=True)
+        self.rings = {}
+        self.logs = {}
+        for name, config in sources.items():
+            log = TickLog(log_path(directory, name, sources))
+            ring = TickRing(capacity)
+            # 启动时只从日志末尾预热环形缓冲，不加载全部历史
+            for record in log.tail(capacity):
+                ring.append(*record)
+            self.logs[name] = log
+            self.rings[name] = ring
+    
+    def append(self, source, timestamp, price, change):
+        ring = self.rings[source]
+        latest = ring.latest()
+        if latest is not None and timestamp < latest[0]:
+            return  # 时间戳回退（例如系统时间被调整），丢弃以保持有序
+        ring.append(timestamp, price, change)
+        self.logs[source].append(timestamp, price, change)
+    
+    def add(self, tick):
+        """写入一条已解析的报价"""
+        self.append(tick.source, tick.time, tick.value, tick.change_value())
+    
+    def latest(self, source):
+        return self.rings[source].latest()
+    
+    def range(self, source, start, end):
+        """查询 [start, end) 内的行情，内存中覆盖不到时读磁盘日志"""
+        ring = self.rings[source]
+        oldest = ring.oldest_timestamp()
+        if oldest is not None and start >= oldest:
+            return ring.range(start, end)
+        return self.logs[source].range(start, end)
+    
+    def close(self):
+        for log in self.logs.values():
+            log.close()
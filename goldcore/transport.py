@@ -0,0 +1,143 @@
+'''
+    HTTP 传输层：按主机复用的长连接池
+'''
+
+import threading
+import urllib.parse
+import urllib.error
+import http.client
+import gzip
+
+from .config import REQUEST_TIMEOUT, REQUEST_HEADERS
+
+# 服务端关闭了空闲连接时，复用旧连接会抛出这些异常，需要重连重试
+STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.BadStatusLine,
+    ConnectionResetError,
+    ConnectionAbortedError,
+    BrokenPipeError,
+)
+
+class HttpPool:
+    """按主机复用的 HTTP 长连接池
+    
+    每个主机保留一条空闲连接，轮询和手动刷新共用，
+    避免每次请求都重新做 DNS + TCP + TLS 握手。
+    """
+    def __init__(self, headers=None, max_idle_per_host=1):
+        self.headers = dict(REQUEST_HEADERS if headers is None else headers)
+        self.max_idle_per_host = max_idle_per_host
+        self._idle = {}  # (scheme, host, port) -> [空闲连接]
+        self._lock = threading.Lock()
+        self._stats = {
+            "requests": 0,
+            "connections_opened": 0,  # 实际握手次数
+            "connections_reused": 0,  # 省掉的握手次数（复用的连接上拿到了响应才算）
+            "reconnects": 0,  # 旧连接失效后的重连次数
+            "bytes_received": 0,  # 线上传输字节数（压缩后）
+            "bytes_decoded": 0,  # 解压后字节数
+        }
+    
+    def _connect(self, key):
+        """新建连接（握手在第一次请求时发生）"""
+        scheme, host, port = key
+        with self._lock:
+            self._stats["connections_opened"] += 1
+        if scheme == 'https':
+            return http.client.HTTPSConnection(host, port)
+        return http.client.HTTPConnection(host, port)
+    
+    def _acquire(self, key):
+        """取一条空闲连接，没有则新建；返回 (连接, 是否复用)"""
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                return idle.pop(), True
+        return self._connect(key), False
+    
+    def _release(self, key, conn):
+        """归还连接，超出空闲上限则直接关闭"""
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle_per_host:
+                idle.append(conn)
+                return
+        conn.close()
+    
+    def _send(self, conn, path, timeout):
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+        conn.request('GET', path, headers=self.headers)
+        return conn.getresponse()
+    
+    def get(self, url, timeout=REQUEST_TIMEOUT):
+        """GET 请求，返回解压后的响应体（bytes）"""
+        return self.get_with_size(url, timeout)[0]
+    
+    def get_with_size(self, url, timeout=REQUEST_TIMEOUT):
+        """GET 请求，返回 (解压后的响应体, 线上传输字节数)"""
+        parts = urllib.parse.urlsplit(url)
+        port = parts.port or (443 if parts.scheme == 'https' else 80)
+        key = (parts.scheme, parts.hostname, port)
+        path = parts.path or '/'
+        if parts.query:
+            path = f"{path}?{parts.query}"
+        
+        with self._lock:
+            self._stats["requests"] += 1
+        
+        conn, reused = self._acquire(key)
+        try:
+            try:
+                response = self._send(conn, path, timeout)
+                if reused:
+                    with self._lock:
+                        self._stats["connections_reused"] += 1
+            except STALE_CONNECTION_ERRORS:
+                if not reused:
+                    raise
+                # 复用的连接已被服务端关闭，换一条新连接重试一次
+                conn.close()
+                with self._lock:
+                    self._stats["reconnects"] += 1
+                conn = self._connect(key)
+                response = self._send(conn, path, timeout)
+            body = response.read()
+        except Exception:
+            conn.close()
+            raise
+        
+        if response.will_close:
+            conn.close()
+        else:
+            self._release(key, conn)
+        
+        if response.status >= 400:
+            raise urllib.error.HTTPError(url, response.status, response.reason, response.headers, None)
+        
+        wire_size = len(body)
+        if response.getheader('Content-Encoding', '').lower() == 'gzip':
+            body = gzip.decompress(body)
+        
+        with self._lock:
+            self._stats["bytes_received"] += wire_size
+            self._stats["bytes_decoded"] += len(body)
+        return body, wire_size
+    
+    def stats(self):
+        """连接复用统计（省掉的握手次数、gzip 节省的字节数）"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats["handshakes_avoided"] = stats["connections_reused"]
+        stats["bytes_saved"] = stats["bytes_decoded"] - stats["bytes_received"]
+        return stats
+    
+    def close(self):
+        """关闭所有空闲连接"""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for conn in conns:
+                conn.close()
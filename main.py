@@ -6,6 +6,9 @@
     2025年5月6日
 '''
 
+import time
+APP_START = time.perf_counter()  # 进程启动时刻，用于统计首帧耗时
+
 from kivy.app import App
 from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.gridlayout import GridLayout
@@ -18,21 +21,35 @@ from kivy.uix.switch import Switch
 from kivy.clock import Clock
 from kivy.core.window import Window
 from kivy.utils import platform
-from kivy.properties import StringProperty, BooleanProperty, ObjectProperty
-from kivy.graphics import Color, RoundedRectangle, Line
+from kivy.properties import StringProperty, BooleanProperty, ObjectProperty, ListProperty
+from kivy.graphics import Color, RoundedRectangle, Line, Rectangle
+from kivy.core.text import Label as CoreLabel
 from kivy.core.audio import SoundLoader
 from kivy.uix.widget import Widget
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleview.views import RecycleDataViewBehavior
+from kivy.uix.recycleboxlayout import RecycleBoxLayout
 from kivy.metrics import dp
 import threading
 import json
-import urllib.request
-import urllib.parse
-import time
 import os
 
+from goldcore.config import (
+    BANKS, STATE_FILE, SPEECH_CACHE_DIR, SERVICE_PORT, GATEWAY_URL, STATS_DISPLAY_WINDOW,
+    FONT_SUBSET,
+)
+from goldcore.service import PriceService, ServiceClient, spawn_service, SETTINGS_SOURCE
+from goldcore.alerts import AlertQueue
+from goldcore.state import AppState
+from goldcore.speech import SpeechCache, ToneBackend, AndroidTtsBackend, speech_fragments, speech_text
+from goldcore.metrics import LatencyHistogram, dump_json
+from goldcore.ticks import change_trend
+
 # ========== 注册中文字体 ==========
-# 尝试多个可能的路径
+# 尝试多个可能的路径，打包时只带裁剪过的 fonts/ui.ttf（几百 KB），完整字体仅在电脑上调试用
 font_paths = [
+    os.environ.get('GOLDPRICE_FONT'),  # 临时指定字体（对比不同字体的启动耗时）
+    FONT_SUBSET,  # python -m goldcore.fonts subset 生成
     'msyh.ttc',  # 同目录下
     'fonts/msyh.ttc',  # fonts子目录
     '/system/fonts/NotoSansCJK-Regular.ttc',  # 安卓系统
@@ -41,19 +58,29 @@ font_paths = [
 
 CHINESE_FONT = 'Roboto'  # 默认字体
 
-for font_path in font_paths:
-    if os.path.exists(font_path):
-        try:
-            LabelBase.register(name='ChineseFont', fn_regular=font_path)
-            CHINESE_FONT = 'ChineseFont'
-            print(f"中文字体加载成功: {font_path}")
-            break
-        except Exception as e:
-            print(f"字体加载失败 {font_path}: {e}")
-            continue
+# 帧耗时分析：设置 GOLDPRICE_PROFILE=文件路径（或 1，导出到用户数据目录）时，
+# 记录每帧耗时和下面这些回调的耗时，退出时导出 trace 并打印最慢的几帧
+PROFILED_METHODS = ('flush_ui', 'update_ui', 'update_status', 'update_spread', 'flush_alerts',
+                    'show_popup', 'show_alert_settings', 'show_diagnostics')
 
-if CHINESE_FONT == 'Roboto':
+def register_chinese_font():
+    """注册中文字体（在 build 时调用，导入模块时不再探测字体文件），返回字体路径，未找到时返回 None"""
+    global CHINESE_FONT
+    from kivy.core.text import LabelBase
+    
+    for font_path in font_paths:
+        if font_path and os.path.exists(font_path):
+            try:
+                LabelBase.register(name='ChineseFont', fn_regular=font_path)
+                CHINESE_FONT = 'ChineseFont'
+                print(f"中文字体加载成功: {font_path}")
+                return font_path
+            except Exception as e:
+                print(f"字体加载失败 {font_path}: {e}")
+                continue
+    
     print("警告：未找到中文字体，使用默认字体")
+    return None
 # ==================================
 
 # 检测是否在 Android 上运行
@@ -79,24 +106,9 @@ if IS_ANDROID:
 else:
     ANDROID_AVAILABLE = False
 
-# URL配置
-BANKS = {
-    "浙商": {
-        "url": "https://api.jdjygold.com/gw2/generic/jrm/h5/m/stdLatestPrice?productSku=1961543816",
-        "color": [1, 0.843, 0, 1],  # 金色 #FFD700
-        "method": "sku",
-        "price_key": "price",
-        "change_key": "upAndDownAmt"
-    },
-    "民生": {
-        "url": "https://ms.jr.jd.com/gw2/generic/CreatorSer/newh5/m/getFirstRelatedProductInfo",
-        "params": {"circleId": "13245", "invokeSource": 5, "productId": "21001001000001"},
-        "color": [0.29, 0.565, 0.886, 1],  # 蓝色 #4A90E2
-        "method": "product_id",
-        "price_key": "minimumPriceValue",
-        "change_key": "dayFluctuateNum"
-    }
-}
+# TextToSpeech.QUEUE_FLUSH / QUEUE_ADD
+TTS_QUEUE_FLUSH = 0
+TTS_QUEUE_ADD = 1
 
 class StyledCard(BoxLayout):
     """自定义卡片组件"""
@@ -121,33 +133,155 @@ class StyledCard(BoxLayout):
         self.rect.size = self.size
         self.border.rounded_rectangle = (self.x, self.y, self.width, self.height, dp(10))
 
+# 价格和涨跌会用到的字符，预先渲染进同一张纹理
+PRICE_GLYPHS = "0123456789.+-¥%"
+
+class GlyphAtlas:
+    """数字字形图集
+    
+    同一字体、字号的常用字符只渲染一次（一次 CoreLabel 渲染整串字符，按字符宽度切分），
+    之后显示数字只是切换矩形引用的纹理区域，不再重新栅格化文字。
+    字形按白色渲染，颜色由 Color 指令着色；图集外的字符第一次用到时单独渲染并缓存。
+    """
+    _atlases = {}
+    
+    @classmethod
+    def get(cls, font_name, font_size, bold=False):
+        key = (font_name, font_size, bold)
+        atlas = cls._atlases.get(key)
+        if atlas is None:
+            atlas = cls._atlases[key] = cls(font_name, font_size, bold)
+        return atlas
+    
+    def __init__(self, font_name, font_size, bold=False, chars=PRICE_GLYPHS):
+        self.options = {"font_name": font_name, "font_size": font_size, "bold": bold}
+        label = self._render(chars)
+        self.texture = label.texture
+        self.height = self.texture.height
+        self.glyphs = {}
+        x = 0
+        for i, ch in enumerate(chars):
+            # 按前缀宽度定位，和整串渲染时的实际位置一致
+            right = label.get_extents(chars[:i + 1])[0]
+            self.glyphs[ch] = self.texture.get_region(x, 0, right - x, self.height)
+            x = right
+        # 数字按最宽的数字等宽排列，价格变化时其余字符不用挪位置
+        self.digit_width = max(self.glyphs[d].width for d in "0123456789")
+    
+    def _render(self, text):
+        label = CoreLabel(text=text, color=(1, 1, 1, 1), **self.options)
+        label.refresh()
+        return label
+    
+    def glyph(self, ch):
+        texture = self.glyphs.get(ch)
+        if texture is None:
+            texture = self.glyphs[ch] = self._render(ch).texture
+        return texture
+    
+    def advance(self, ch):
+        return self.digit_width if ch.isdigit() else self.glyph(ch).width
+
+class GlyphText(Widget):
+    """用字形图集绘制的数字文本，可代替只显示价格的 Label
+    
+    text 变化时只替换变了的字符对应矩形的纹理；长度或非数字字符变了才重新排列，
+    改颜色只改 Color 指令，都不会重新生成文字纹理。
+    """
+    text = StringProperty("")
+    color = ListProperty([1, 1, 1, 1])
+    
+    def __init__(self, font_name='Roboto', font_size=dp(15), bold=False, **kwargs):
+        super().__init__(**kwargs)
+        self.atlas = GlyphAtlas.get(font_name, font_size, bold)
+        self._chars = ""
+        self._rects = []
+        self._slots = []  # 各字符的起始 x
+        with self.canvas:
+            self._color = Color(*self.color)
+        self.bind(text=self.update_glyphs, pos=self.layout_glyphs, size=self.layout_glyphs,
+                  color=self._update_color)
+        self.update_glyphs()
+    
+    def _update_color(self, instance, color):
+        self._color.rgba = color
+    
+    def _place(self, i):
+        rect = self._rects[i]
+        ch = self._chars[i]
+        offset = (self.atlas.digit_width - rect.size[0]) / 2 if ch.isdigit() else 0
+        rect.pos = (int(self._slots[i] + offset), int(self.center_y - self.atlas.height / 2))
+    
+    def update_glyphs(self, *args):
+        text = self.text
+        old = self._chars
+        relayout = len(text) != len(old)
+        changed = []
+        for i, ch in enumerate(text):
+            if i < len(old) and old[i] == ch:
+                continue
+            glyph = self.atlas.glyph(ch)
+            if i < len(self._rects):
+                self._rects[i].texture = glyph
+                self._rects[i].size = glyph.size
+            else:
+                rect = Rectangle(texture=glyph, size=glyph.size)
+                self.canvas.add(rect)
+                self._rects.append(rect)
+            if not (i < len(old) and ch.isdigit() and old[i].isdigit()):
+                relayout = True
+            changed.append(i)
+        for rect in self._rects[len(text):]:
+            self.canvas.remove(rect)
+        del self._rects[len(text):]
+        self._chars = text
+        
+        if relayout:
+            self.layout_glyphs()
+        else:
+            # 只是数字变了：槽位不变，只摆放变了的字符
+            for i in changed:
+                self._place(i)
+    
+    def layout_glyphs(self, *args):
+        """按当前文本重新排列全部字符（水平居中）"""
+        x = self.center_x - sum(self.atlas.advance(ch) for ch in self._chars) / 2
+        self._slots = []
+        for ch in self._chars:
+            self._slots.append(x)
+            x += self.atlas.advance(ch)
+        for i in range(len(self._chars)):
+            self._place(i)
+
 class PriceDisplay(BoxLayout):
-    """价格显示组件"""
+    """价格显示组件
+    
+    glyphs=True 时价格和涨跌用 GlyphText 绘制，行情更新不重新生成文字纹理；
+    False 时用普通 Label（对比帧耗时用，见 benchmarks/frames.py）。
+    """
     bank_name = StringProperty("")
     price = StringProperty("--")
     change = StringProperty("--")
+    stale = BooleanProperty(False)
     bank_color = ObjectProperty([1, 1, 1, 1])
     
-    def __init__(self, bank_name, **kwargs):
+    def __init__(self, bank_name="", glyphs=True, **kwargs):
         super().__init__(**kwargs)
-        self.bank_name = bank_name
-        self.bank_color = BANKS[bank_name]["color"]
         self.orientation = 'horizontal'
         self.size_hint_y = None
         self.height = dp(50)
         self.padding = [dp(10), dp(5)]
         
         # 银行名称
-        name_label = Label(
-            text=self.bank_name,
+        self.name_label = Label(
             font_size=dp(16),
-            color=self.bank_color,
             size_hint_x=0.2,
             bold=True
         )
         
         # 价格
-        self.price_label = Label(
+        text_class = GlyphText if glyphs else Label
+        self.price_label = text_class(
             text="¥--",
             font_size=dp(24),
             color=[1, 0.843, 0, 1],
@@ -156,37 +290,115 @@ class PriceDisplay(BoxLayout):
         )
         
         # 涨跌
-        self.change_label = Label(
+        self.change_label = text_class(
             text="--",
             font_size=dp(14),
             color=[0.88, 0.88, 0.88, 1],
             size_hint_x=0.3
         )
         
-        self.add_widget(name_label)
+        self.add_widget(self.name_label)
         self.add_widget(self.price_label)
         self.add_widget(self.change_label)
+        self.set_bank(bank_name)
+    
+    def set_bank(self, bank_name):
+        """切换显示的数据源（卡片列表复用控件时调用），之后的第一次 update_price 一定会刷新"""
+        self.bank_name = bank_name
+        self.bank_color = BANKS.get(bank_name, {}).get("color", [1, 1, 1, 1])
+        self.name_label.text = bank_name
+        self.name_label.color = self.bank_color
+        self.price = self.change = ""
     
-    def update_price(self, price, change):
-        self.price = str(price)
-        self.change = str(change)
+    def update_price(self, price, change, stale=False, trend=None):
+        """stale=True 表示上次保存的旧数据，价格显示为灰色
+        
+        price、change 为轮询服务推送的字符串，trend 为服务解析好的涨跌方向（1 / -1 / 0）；
+        没有 trend 时（如上次保存的价格）才从 change 解析
+        """
+        # 数值没变就不动控件，避免重新生成文字纹理
+        if price == self.price and change == self.change and stale == self.stale:
+            return
+        self.price = price
+        self.change = change
         self.price_label.text = f"¥{price}"
+        if stale != self.stale:
+            self.stale = stale
+            self.price_label.color = [0.6, 0.6, 0.6, 1] if stale else [1, 0.843, 0, 1]
         
         # 更新涨跌颜色和符号
-        try:
-            change_val = float(change)
-            if change_val > 0:
-                self.change_label.color = [1, 0.42, 0.42, 1]  # 红色
-                self.change_label.text = f"+{change}"
-            elif change_val < 0:
-                self.change_label.color = [0.31, 0.8, 0.77, 1]  # 绿色
-                self.change_label.text = str(change)
-            else:
-                self.change_label.color = [0.88, 0.88, 0.88, 1]
-                self.change_label.text = change
-        except:
+        if trend is None:
+            trend = change_trend(change)
+        if trend and trend > 0:
+            self.change_label.color = [1, 0.42, 0.42, 1]  # 红色
+            self.change_label.text = f"+{change}"
+        elif trend and trend < 0:
+            self.change_label.color = [0.31, 0.8, 0.77, 1]  # 绿色
             self.change_label.text = change
+        else:
             self.change_label.color = [0.88, 0.88, 0.88, 1]
+            self.change_label.text = change
+
+class PriceCard(RecycleDataViewBehavior, StyledCard):
+    """卡片列表中的一张卡片：标题 + PriceDisplay，滚动时被复用来显示别的数据源"""
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.index = None
+        self.title_label = Label(
+            markup=True,
+            font_size=dp(18),
+            size_hint_y=None,
+            height=dp(30)
+        )
+        self.add_widget(self.title_label)
+        self.display = PriceDisplay()
+        self.add_widget(self.display)
+    
+    def refresh_view_attrs(self, rv, index, data):
+        """data: {"bank_name", "title", "price", "change", "trend", "stale"}"""
+        self.index = index
+        if data["bank_name"] != self.display.bank_name:
+            self.display.set_bank(data["bank_name"])
+            self.title_label.text = f"[b]{data['title']}[/b]"
+            self.title_label.color = self.display.bank_color
+        self.display.update_price(data["price"], data["change"], data["stale"], data["trend"])
+
+class PriceCardList(RecycleView):
+    """按 BANKS 生成的价格卡片列表
+    
+    只为可见区域创建卡片控件，数据源再多，控件数量和每帧开销也不变；
+    update_price 只改对应的数据项，卡片在屏幕上时直接刷新那一张。
+    """
+    def __init__(self, banks=BANKS, **kwargs):
+        super().__init__(**kwargs)
+        self.viewclass = PriceCard
+        layout = RecycleBoxLayout(
+            orientation='vertical',
+            default_size=(None, dp(120)),
+            default_size_hint=(1, None),
+            size_hint_y=None,
+            spacing=dp(15),
+            padding=[dp(5), dp(10)]
+        )
+        layout.bind(minimum_height=layout.setter('height'))
+        self.add_widget(layout)
+        self._index = {name: i for i, name in enumerate(banks)}
+        self.data = [
+            {"bank_name": name, "title": config.get("title", name),
+             "price": "--", "change": "--", "trend": None, "stale": False}
+            for name, config in banks.items()
+        ]
+    
+    def update_price(self, bank_name, price, change, stale=False, trend=None):
+        index = self._index.get(bank_name)
+        if index is None:
+            return
+        item = self.data[index]
+        # 直接改数据项不会触发整个列表刷新；卡片滚回来时按这里的值显示
+        item.update(price=price, change=change, trend=trend, stale=stale)
+        view = self.view_adapter.get_visible_view(index)
+        if view is not None:
+            view.refresh_view_attrs(self, index, item)
 
 class AlertSettingsPopup(Popup):
     """提醒设置弹窗"""
@@ -282,11 +494,21 @@ class AlertSettingsPopup(Popup):
         self.content = layout
     
     def fill_current_price(self, instance):
-        current = self.app.get_current_zs_price()
-        if current:
-            self.base_input.text = str(current)
-        else:
-            self.app.show_toast("当前金价获取失败")
+        self.app.request_quote("浙商", self.apply_current_price)
+    
+    def apply_current_price(self, quote):
+        if quote is None:
+            self.app.show_toast("未连接到轮询服务，无法获取当前金价")
+            return
+        try:
+            current = float(quote["price"])
+        except (TypeError, ValueError, KeyError):
+            # 服务没有报价时已安排一次请求
+            self.app.show_toast("暂无当前金价，请稍后再试")
+            return
+        self.base_input.text = str(current)
+        if quote.get("stale"):
+            self.app.show_toast(f"价格已 {quote['age']:.0f} 秒未更新，正在刷新")
     
     def save_settings(self, instance):
         enabled = self.enabled_switch.active
@@ -305,10 +527,11 @@ class AlertSettingsPopup(Popup):
                 self.app.alert_up_amount = up
                 self.app.alert_down_amount = down
                 self.app.alert_enabled = True
+                self.app.apply_alert_settings()
                 
                 self.app.show_toast(f"提醒已设置: 基准{base} 涨{up} 跌{down}")
                 self.dismiss()
-                
+            
             except ValueError:
                 self.app.show_toast("请输入有效的数字")
         else:
@@ -316,9 +539,83 @@ class AlertSettingsPopup(Popup):
             self.app.alert_base_price = None
             self.app.alert_up_amount = None
             self.app.alert_down_amount = None
+            self.app.apply_alert_settings()
             self.app.show_toast("提醒已关闭")
             self.dismiss()
 
+class DiagnosticsPopup(Popup):
+    """诊断面板：各数据源耗时、成功/失败次数、流量和数据新鲜度"""
+    def __init__(self, app, **kwargs):
+        super().__init__(**kwargs)
+        self.app = app
+        self.title = "诊断信息"
+        self.size_hint = (0.95, 0.8)
+        
+        layout = BoxLayout(orientation='vertical', padding=dp(10), spacing=dp(10))
+        
+        self.report_label = Label(
+            text="",
+            font_size=dp(12),
+            color=[0.9, 0.9, 0.9, 1],
+            halign='left',
+            valign='top'
+        )
+        self.report_label.bind(size=lambda label, size: setattr(label, 'text_size', size))
+        layout.add_widget(self.report_label)
+        
+        btn_layout = BoxLayout(orientation='horizontal', size_hint_y=None, height=dp(50), spacing=dp(10))
+        
+        export_btn = Button(
+            text="导出",
+            background_color=[0.2, 0.5, 0.8, 1],
+            color=[1, 1, 1, 1]
+        )
+        export_btn.bind(on_press=self.export)
+        
+        ticks_btn = Button(
+            text="导出行情",
+            background_color=[0.2, 0.6, 0.4, 1],
+            color=[1, 1, 1, 1]
+        )
+        ticks_btn.bind(on_press=self.export_ticks)
+        
+        close_btn = Button(
+            text="关闭",
+            background_color=[0.6, 0.2, 0.2, 1],
+            color=[1, 1, 1, 1]
+        )
+        close_btn.bind(on_press=self.dismiss)
+        
+        btn_layout.add_widget(export_btn)
+        btn_layout.add_widget(ticks_btn)
+        btn_layout.add_widget(close_btn)
+        layout.add_widget(btn_layout)
+        
+        self.content = layout
+        self.refresh()
+        # 打开期间每秒刷新
+        self._refresh_event = Clock.schedule_interval(self.refresh, 1)
+    
+    def refresh(self, *args):
+        # 指标和 K 线在轮询服务中，请求后下一次刷新时显示
+        self.app.service.send({"cmd": "metrics"})
+        self.app.service.send({"cmd": "candles", "source": SETTINGS_SOURCE, "resolution": 60, "count": 1})
+        self.report_label.text = self.app.diagnostics_report()
+    
+    def export(self, instance):
+        try:
+            path = self.app.export_metrics()
+            self.app.show_toast(f"已导出: {path}")
+        except Exception as e:
+            self.app.show_toast(f"导出失败: {e}")
+    
+    def export_ticks(self, instance):
+        self.app.show_toast("正在导出行情...")
+        self.app.export_ticks()
+    
+    def on_dismiss(self):
+        self._refresh_event.cancel()
+
 class GoldPriceApp(App):
     alert_enabled = BooleanProperty(False)
     alert_base_price = ObjectProperty(None)
@@ -329,14 +626,76 @@ class GoldPriceApp(App):
         super().__init__(**kwargs)
         self.prices = {name: {"price": "--", "change": "--"} for name in BANKS}
         self.running = True
-        self.price_displays = {}
         
-        # 语音相关
+        # 需在创建 Clock 触发器之前包装回调
+        self.profiler = None
+        self.profile_path = os.environ.get('GOLDPRICE_PROFILE')
+        if self.profile_path:
+            self.enable_profiler()
+        
+        # 轮询服务（抓取、提醒判断、行情历史）：Android 上在独立的后台服务进程中运行，
+        # 电脑上默认在本进程内运行，设置 GOLDPRICE_SERVICE=subprocess 可用子进程模拟；
+        # 设置了行情网关（GATEWAY_URL 或 GOLDPRICE_GATEWAY）时从网关读取行情，不直接请求接口
+        self.service_mode = os.environ.get('GOLDPRICE_SERVICE', 'android' if IS_ANDROID else 'thread')
+        self.gateway_url = os.environ.get('GOLDPRICE_GATEWAY') or GATEWAY_URL
+        self.service_process = None
+        self.service_metrics = {}
+        self.latest_candle = None  # 诊断面板查询到的当前 1 分钟 K 线
+        self.service_status = ""
+        self.keep_service = False  # 关闭界面后服务是否继续运行
+        if self.service_mode == 'thread':
+            self.service = PriceService(BANKS, data_dir=self.user_data_dir, gateway_url=self.gateway_url)
+        else:
+            self.service = ServiceClient()
+        
+        # 待发出的通知/语音，界面线程每帧取一次
+        self.alert_queue = AlertQueue()
+        self._alert_trigger = Clock.create_trigger(self.flush_alerts)
+        
+        # 上次的价格和提醒设置（由轮询服务写入，这里只读），启动时立即显示
+        self.state = AppState(os.path.join(self.user_data_dir, STATE_FILE))
+        self.restore_alert_settings(self.state.alert)
+        
+        # 轮询线程只登记最新值，界面线程每帧最多刷新一次
+        self._ui_lock = threading.Lock()
+        self._pending_prices = {}
+        self._pending_stats = {}
+        self._pending_status = None
+        self.spread_texts = {}
+        self._ui_trigger = Clock.create_trigger(self.flush_ui)
+        self._quote_callbacks = {}  # 数据源 -> 等待轮询服务回复报价的回调
+        
+        # 语音相关：片段音频缓存 + 按顺序播放
         self.tts_engine = None
         self.init_tts()
+        self.speech = None
+        self.init_speech()
+        self._speech_queue = []
+        self._speech_sound = None
+        self._sounds = {}
+        self.speech_latency = LatencyHistogram()  # 提醒产生到开始出声
         
-        # 后台运行
-        self.background_thread = None
+        self.service.subscribe(self.handle_service_message)
+    
+    def enable_profiler(self):
+        """开启帧耗时分析：包装界面回调，并统计控件重建和弹窗打开/关闭的次数与耗时"""
+        from goldcore.profiler import FrameProfiler
+        self.profiler = FrameProfiler()
+        for name in PROFILED_METHODS:
+            setattr(self, name, self.profiler.wrap(name, getattr(self, name)))
+        for cls, attr in ((GlyphText, 'layout_glyphs'), (PriceCard, 'refresh_view_attrs'),
+                          (AlertSettingsPopup, '__init__'), (DiagnosticsPopup, 'refresh'),
+                          (Popup, 'open'), (Popup, 'dismiss')):
+            self.profiler.patch(cls, attr)
+    
+    def dump_profile(self):
+        """导出帧耗时 trace，返回文件路径"""
+        path = self.profile_path
+        if path in ('1', 'true'):
+            path = os.path.join(self.user_data_dir, f"profile_{time.strftime('%Y%m%d_%H%M%S')}.json")
+        self.profiler.dump(path)
+        print(self.profiler.format_summary())
+        return path
     
     def init_tts(self):
         """初始化语音引擎"""
@@ -346,7 +705,24 @@ class GoldPriceApp(App):
             except Exception as e:
                 print(f"TTS初始化失败: {e}")
     
+    def init_speech(self):
+        """选择合成后端并建立片段缓存，常用片段在后台预先合成"""
+        try:
+            if self.tts_engine:
+                backend = AndroidTtsBackend(self.tts_engine)
+            else:
+                backend = ToneBackend()
+            self.speech = SpeechCache(os.path.join(self.user_data_dir, SPEECH_CACHE_DIR), backend)
+        except Exception as e:
+            print(f"语音缓存初始化失败: {e}")
+            return
+        # TextToSpeech 初始化是异步的，稍等再合成
+        Clock.schedule_once(lambda dt: threading.Thread(target=self.speech.prewarm, daemon=True).start(), 3)
+    
     def build(self):
+        build_start = time.perf_counter()
+        self.font_path = register_chinese_font()
+        
         # 设置窗口背景色（深色主题）
         Window.clearcolor = (0.1, 0.1, 0.1, 1)
         
@@ -365,46 +741,19 @@ class GoldPriceApp(App):
         title_box.add_widget(title_label)
         root.add_widget(title_box)
         
-        # 价格卡片区域
-        cards_layout = BoxLayout(orientation='vertical', spacing=dp(15), padding=[dp(5), dp(10)])
-        
-        # 浙商银行卡片
-        zs_card = StyledCard()
-        zs_title = Label(
-            text='[b]浙商银行[/b]',
-            markup=True,
-            font_size=dp(18),
-            color=BANKS["浙商"]["color"],
-            size_hint_y=None,
-            height=dp(30)
-        )
-        zs_card.add_widget(zs_title)
-        
-        self.zs_display = PriceDisplay("浙商")
-        zs_card.add_widget(self.zs_display)
-        self.price_displays["浙商"] = self.zs_display
-        
-        cards_layout.add_widget(zs_card)
+        # 价格卡片区域（按 BANKS 生成，只创建可见的卡片）
+        self.card_list = PriceCardList()
+        root.add_widget(self.card_list)
         
-        # 民生银行卡片
-        ms_card = StyledCard()
-        ms_title = Label(
-            text='[b]民生银行[/b]',
-            markup=True,
-            font_size=dp(18),
-            color=BANKS["民生"]["color"],
+        # 价差及滚动统计
+        self.spread_label = Label(
+            text='价差 --',
+            font_size=dp(13),
+            color=[0.8, 0.8, 0.8, 1],
             size_hint_y=None,
-            height=dp(30)
+            height=dp(24)
         )
-        ms_card.add_widget(ms_title)
-        
-        self.ms_display = PriceDisplay("民生")
-        ms_card.add_widget(self.ms_display)
-        self.price_displays["民生"] = self.ms_display
-        
-        cards_layout.add_widget(ms_card)
-        
-        root.add_widget(cards_layout)
+        root.add_widget(self.spread_label)
         
         # 按钮区域
         btn_layout = GridLayout(cols=2, size_hint_y=None, height=dp(120), spacing=dp(10), padding=[dp(10), dp(20)])
@@ -453,92 +802,167 @@ class GoldPriceApp(App):
         
         root.add_widget(btn_layout)
         
-        # 状态栏
+        # 状态栏 + 诊断按钮
+        status_layout = BoxLayout(orientation='horizontal', size_hint_y=None, height=dp(30))
         self.status_label = Label(
             text='正在连接...',
             font_size=dp(12),
-            color=[0.6, 0.6, 0.6, 1],
-            size_hint_y=None,
-            height=dp(30)
+            color=[0.6, 0.6, 0.6, 1]
+        )
+        status_layout.add_widget(self.status_label)
+        
+        diag_btn = Button(
+            text='诊断',
+            font_size=dp(12),
+            size_hint_x=None,
+            width=dp(60),
+            background_color=[0.3, 0.3, 0.3, 1],
+            color=[0.9, 0.9, 0.9, 1]
         )
-        root.add_widget(self.status_label)
+        diag_btn.bind(on_press=self.show_diagnostics)
+        status_layout.add_widget(diag_btn)
+        root.add_widget(status_layout)
+        
+        # 先显示上次保存的价格，等第一轮请求返回后替换
+        self.show_saved_prices()
         
         # 启动数据获取线程
         self.start_data_thread()
         
+        # 第一帧画出后记录启动耗时
+        self.startup = {"import_ms": (build_start - APP_START) * 1000,
+                        "build_ms": (time.perf_counter() - build_start) * 1000}
+        Window.bind(on_flip=self.on_first_frame)
+        if self.profiler:
+            Window.bind(on_flip=lambda window: self.profiler.flip())
         return root
     
+    def on_first_frame(self, window):
+        """首帧耗时 = 进程启动到第一次 flip；设置 GOLDPRICE_EXIT_AFTER_FIRST_FRAME 时随即退出（启动基准用）"""
+        Window.unbind(on_flip=self.on_first_frame)
+        self.startup["first_frame_ms"] = (time.perf_counter() - APP_START) * 1000
+        self.startup["font"] = self.font_path
+        print(f"startup {json.dumps(self.startup, ensure_ascii=False)}", flush=True)
+        if os.environ.get('GOLDPRICE_EXIT_AFTER_FIRST_FRAME'):
+            Clock.schedule_once(lambda dt: self.stop(), 0)
+    
+    def show_saved_prices(self):
+        """显示快照中的价格（标记为旧数据）"""
+        saved_times = []
+        for bank_name, saved in self.state.prices.items():
+            if bank_name in BANKS:
+                self.card_list.update_price(bank_name, saved["price"], saved["change"], stale=True)
+                saved_times.append(saved.get("time") or 0)
+        if saved_times:
+            saved_at = time.strftime('%m-%d %H:%M:%S', time.localtime(max(saved_times)))
+            self.status_label.text = f"上次数据 {saved_at}，正在连接..."
+    
     def start_data_thread(self):
-        """启动后台数据获取线程"""
-        thread = threading.Thread(target=self.fetch_data_loop, daemon=True)
-        thread.start()
-    
-    def fetch_data_loop(self):
-        """数据获取循环"""
-        while self.running:
-            self.update_prices()
-            time.sleep(3)  # 每3秒更新一次
-    
-    def update_prices(self):
-        """更新价格数据"""
-        for bank_name, config in BANKS.items():
-            try:
-                headers = {
-                    'User-Agent': 'Mozilla/5.0 (Linux; Android 10; Mobile) AppleWebKit/537.36',
-                    'Accept': 'application/json',
-                    'Referer': 'https://jdjygold.com/'
-                }
-                
-                if config.get('method') == 'product_id':
-                    req_data = json.dumps(config['params'])
-                    encoded_data = urllib.parse.quote(req_data)
-                    full_url = f"{config['url']}?reqData={encoded_data}"
-                    
-                    req = urllib.request.Request(full_url, headers=headers)
-                    with urllib.request.urlopen(req, timeout=10) as response:
-                        data = json.loads(response.read().decode('utf-8'))
-                    
-                    result_data = data.get('resultData', {})
-                    data_obj = result_data.get('data', {})
-                    
-                    price = data_obj.get(config['price_key'], '--')
-                    change = data_obj.get(config['change_key'], '--')
-                    
-                else:
-                    req = urllib.request.Request(config["url"], headers=headers)
-                    with urllib.request.urlopen(req, timeout=10) as response:
-                        data = json.loads(response.read().decode('utf-8'))
-                    
-                    result_data = data.get('resultData', {})
-                    if result_data.get('status') == 'FAIL':
-                        continue
-                    
-                    datas = result_data.get('datas', {})
-                    price = datas.get(config['price_key'], '--')
-                    change = datas.get(config['change_key'], '--')
-                
-                # 更新数据
-                self.prices[bank_name]["price"] = str(price)
-                self.prices[bank_name]["change"] = str(change)
-                
-                # 更新UI
-                Clock.schedule_once(lambda dt, bn=bank_name, p=price, c=change: 
-                    self.update_ui(bn, p, c), 0)
-                
-                # 检查提醒（仅浙商银行）
-                if bank_name == "浙商":
-                    self.check_alert(price)
-                
-            except Exception as e:
-                print(f"{bank_name} 获取失败: {e}")
-                Clock.schedule_once(lambda dt, msg=f"{bank_name}连接失败": 
-                    self.update_status(msg), 0)
-    
-    def update_ui(self, bank_name, price, change):
-        """更新UI"""
-        if bank_name in self.price_displays:
-            self.price_displays[bank_name].update_price(price, change)
-        self.status_label.text = f"最后更新: {time.strftime('%H:%M:%S')}"
+        """启动轮询服务，或启动独立进程中的服务并连接"""
+        if self.service_mode == 'android':
+            self.start_android_service()
+        elif self.service_mode == 'subprocess':
+            self.service_process = spawn_service(self.user_data_dir, gateway_url=self.gateway_url)
+        self.service.start()
+    
+    def start_android_service(self):
+        """启动 buildozer.spec 中声明的 Poller 服务，失败时退回到进程内轮询"""
+        try:
+            service = autoclass('org.goldmonitor.goldprice.ServicePoller')
+            argument = json.dumps({"data_dir": self.user_data_dir, "port": SERVICE_PORT,
+                                   "gateway": self.gateway_url})
+            service.start(AndroidActivity.mActivity, argument)
+        except Exception as e:
+            print(f"后台服务启动失败，改为在界面进程内轮询: {e}")
+            self.service_mode = 'thread'
+            self.service = PriceService(BANKS, data_dir=self.user_data_dir, gateway_url=self.gateway_url)
+            self.service.subscribe(self.handle_service_message)
+    
+    def handle_service_message(self, message):
+        """处理轮询服务推送的消息（在轮询线程或连接线程中调用）"""
+        kind = message.get("type")
+        if kind == "tick":
+            self.service_status = message.get("latency", "")
+            self.publish_price(message["source"], message["price"], message["change"], message.get("trend"))
+        elif kind == "stats":
+            with self._ui_lock:
+                self._pending_stats.update(message["series"])
+            self._ui_trigger()
+        elif kind == "alert":
+            speech = (f"{message['name']}{message['direction']}", message["price_text"], message.get("unit", "元"))
+            self.alert_queue.put(message["rule_id"], (message["message"], speech, time.monotonic()))
+            self._alert_trigger()
+        elif kind == "error":
+            self.report_fetch_error(message.get("source"), message["message"], None)
+        elif kind == "alert_settings":
+            # 触发后的新基准等，回到界面线程更新属性
+            Clock.schedule_once(lambda dt, alert=message: self.restore_alert_settings(alert), 0)
+        elif kind == "quote":
+            for callback in self._quote_callbacks.pop(message["source"], []):
+                Clock.schedule_once(lambda dt, callback=callback: callback(message), 0)
+        elif kind == "metrics":
+            self.service_metrics = message
+        elif kind == "candles":
+            if message["candles"]:
+                self.latest_candle = (message["source"], message["candles"][-1])
+        elif kind == "connection" and not message["connected"]:
+            self.report_fetch_error(None, "与轮询服务的连接已断开，正在重连...", None)
+    
+    def report_fetch_error(self, bank_name, message, error):
+        """数据源请求失败（在轮询线程中调用）"""
+        with self._ui_lock:
+            self._pending_status = message
+        self._ui_trigger()
+    
+    def publish_price(self, bank_name, price, change, trend=None):
+        """保存价格并登记界面刷新（price、change 为服务推送的字符串）"""
+        saved = self.prices.get(bank_name)
+        if saved is None:
+            return  # 服务端配置了、界面没有的数据源
+        saved["price"] = price
+        saved["change"] = change
+        
+        # 登记待刷新的价格，同一数据源只保留最新一条，界面跟不上时中间值直接丢弃
+        with self._ui_lock:
+            self._pending_prices[bank_name] = (price, change, trend)
+            self._pending_status = None
+        self._ui_trigger()
+    
+    def flush_ui(self, dt=None):
+        """把上一帧以来登记的价格和状态一次性刷新到界面（界面线程）"""
+        with self._ui_lock:
+            prices, self._pending_prices = self._pending_prices, {}
+            stats, self._pending_stats = self._pending_stats, {}
+            message, self._pending_status = self._pending_status, None
+        if stats:
+            self.update_spread(stats)
+        if prices:
+            for bank_name, (price, change, trend) in prices.items():
+                self.card_list.update_price(bank_name, price, change, trend=trend)
+            self.update_ui()
+        # 价格之后又出错时显示错误信息
+        if message is not None:
+            self.update_status(message)
+    
+    def update_spread(self, series):
+        """显示价差及其滚动统计（界面线程）"""
+        for key, stats in series.items():
+            if key in BANKS:
+                continue
+            text = f"价差 {key} {stats['value']:+.2f}"
+            window = stats["windows"].get(str(STATS_DISPLAY_WINDOW))
+            if window and window["count"] > 1:
+                text += (f"  {STATS_DISPLAY_WINDOW // 60}分钟均值 {window['mean']:+.2f} σ{window['std']:.2f}"
+                         f" z{window['z']:+.1f}  区间 {window['min']:+.2f}~{window['max']:+.2f}")
+            self.spread_texts[key] = text
+        text = "\n".join(self.spread_texts.values())
+        if text != self.spread_label.text:
+            self.spread_label.text = text
+    
+    def update_ui(self):
+        """更新状态栏"""
+        latency = self.service_status
+        self.status_label.text = f"最后更新: {time.strftime('%H:%M:%S')}  {latency}"
         self.status_label.color = [0.4, 0.8, 0.4, 1]
     
     def update_status(self, message):
@@ -546,55 +970,45 @@ class GoldPriceApp(App):
         self.status_label.text = message
         self.status_label.color = [0.8, 0.4, 0.4, 1]
     
-    def get_current_zs_price(self):
-        """获取当前浙商银行价格"""
-        try:
-            price = self.prices["浙商"]["price"]
-            if price and price != "--" and price != "失败":
-                return float(price)
-        except:
-            pass
-        return None
+    def request_quote(self, source, callback):
+        """向轮询服务读取缓存的报价，回复到达后在界面线程调用 callback(quote)
+        
+        报价过期时服务先回复旧值并顺带刷新；与服务断开时立即以 None 回调
+        """
+        self._quote_callbacks.setdefault(source, []).append(callback)
+        if not self.service.send({"cmd": "quote", "source": source}):
+            # 只撤回这一次登记的回调，之前已发出的请求仍在等回复
+            callbacks = self._quote_callbacks.get(source, [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+            if not callbacks:
+                self._quote_callbacks.pop(source, None)
+            callback(None)
     
-    def check_alert(self, current_price):
-        """检查价格提醒"""
-        if not self.alert_enabled or not self.alert_base_price:
+    def restore_alert_settings(self, alert):
+        """显示轮询服务（或快照）中的基准/涨跌提醒设置"""
+        if not alert:
             return
-        
-        try:
-            current = float(current_price)
-            base = float(self.alert_base_price)
-            up_limit = float(self.alert_up_amount) if self.alert_up_amount else 0
-            down_limit = float(self.alert_down_amount) if self.alert_down_amount else 0
-            
-            upper_limit = base + up_limit
-            lower_limit = base - down_limit
-            
-            triggered = False
-            direction = ""
-            
-            if current >= upper_limit:
-                direction = "涨了"
-                triggered = True
-                self.alert_base_price = current
-            
-            elif current <= lower_limit:
-                direction = "跌了"
-                triggered = True
-                self.alert_base_price = current
-            
-            if triggered:
-                price_str = str(current_price)
-                message = f"{direction}，现在{price_str}元"
-                
-                # 显示通知
-                Clock.schedule_once(lambda dt: self.show_notification("金价提醒", message), 0)
-                
-                # 语音播报
-                self.speak_price(direction, price_str)
-                
-        except (ValueError, TypeError):
-            pass
+        self.alert_enabled = bool(alert.get('alert_enabled'))
+        self.alert_base_price = alert.get('alert_base_price')
+        self.alert_up_amount = alert.get('alert_up_amount')
+        self.alert_down_amount = alert.get('alert_down_amount')
+    
+    def apply_alert_settings(self):
+        """把设置界面的基准/涨跌提醒发给轮询服务（由服务保存到快照）"""
+        self.service.send({"cmd": "set_alert",
+                           "alert_enabled": bool(self.alert_enabled),
+                           "alert_base_price": self.alert_base_price,
+                           "alert_up_amount": self.alert_up_amount,
+                           "alert_down_amount": self.alert_down_amount})
+    
+    def flush_alerts(self, dt=None):
+        """发出队列中的提醒（界面线程）：通知逐条显示，语音只保留本批"""
+        items = self.alert_queue.drain()
+        for i, (message, speech, queued) in enumerate(items):
+            self.show_notification("金价提醒", message)
+            # 本批第一条清空语音引擎里上一批还没读完的内容
+            self.speak_price(*speech, flush=(i == 0), since=queued)
     
     def show_notification(self, title, message):
         """显示通知（Android原生通知或弹窗）"""
@@ -647,20 +1061,26 @@ class GoldPriceApp(App):
         # 3秒后自动关闭
         Clock.schedule_once(lambda dt: popup.dismiss(), 3)
     
-    def speak_price(self, direction, price_str):
-        """语音播报价格"""
-        # 将数字转换为中文读法
-        number_map = {
-            '0': '零', '1': '一', '2': '二', '3': '三', '4': '四',
-            '5': '五', '6': '六', '7': '七', '8': '八', '9': '九', '.': '点'
-        }
-        price_chinese = ''.join([number_map.get(c, c) for c in price_str])
-        
-        text = f"{direction}，现在{price_chinese}元"
+    def speak_price(self, direction, price_str, unit="元", flush=False, since=None):
+        """语音播报价格，flush=True 时打断并丢弃尚未播完的语音
         
-        if IS_ANDROID and ANDROID_AVAILABLE and self.tts_engine:
+        片段音频都已缓存时直接播放；否则本次交给语音引擎整句朗读，缺少的片段在后台补合成。
+        """
+        if since is None:
+            since = time.monotonic()
+        fragments = speech_fragments(direction, price_str, unit)
+        paths = self.speech.lookup(fragments) if self.speech else None
+        text = speech_text(direction, price_str, unit)
+        if paths:
+            self.play_fragments(paths, flush)
+            self.speech_latency.add(time.monotonic() - since)
+            if not IS_ANDROID:
+                # 电脑上播放的只是占位提示音，同时显示文字
+                self.show_toast(text)
+        elif IS_ANDROID and ANDROID_AVAILABLE and self.tts_engine:
             try:
-                self.tts_engine.speak(text, None, None)
+                self.tts_engine.speak(text, TTS_QUEUE_FLUSH if flush else TTS_QUEUE_ADD, None)
+                self.speech_latency.add(time.monotonic() - since)
             except Exception as e:
                 print(f"TTS失败: {e}")
                 self.show_toast(text)
@@ -668,6 +1088,35 @@ class GoldPriceApp(App):
             # 非Android平台显示Toast或弹窗
             self.show_toast(text)
     
+    def play_fragments(self, paths, flush=False):
+        """按顺序播放片段音频（界面线程）"""
+        if flush:
+            self._speech_queue.clear()
+            if self._speech_sound:
+                self._speech_sound.unbind(on_stop=self._play_next_fragment)
+                self._speech_sound.stop()
+                self._speech_sound = None
+        self._speech_queue.extend(paths)
+        if self._speech_sound is None:
+            self._play_next_fragment()
+    
+    def _play_next_fragment(self, *args):
+        if self._speech_sound:
+            self._speech_sound.unbind(on_stop=self._play_next_fragment)
+            self._speech_sound = None
+        while self._speech_queue:
+            path = self._speech_queue.pop(0)
+            sound = self._sounds.get(path)
+            if sound is None:
+                sound = SoundLoader.load(path)
+                if sound is None:
+                    continue
+                self._sounds[path] = sound
+            self._speech_sound = sound
+            sound.bind(on_stop=self._play_next_fragment)
+            sound.play()
+            return
+    
     def show_toast(self, message):
         """显示Toast消息"""
         if IS_ANDROID and ANDROID_AVAILABLE:
@@ -683,11 +1132,67 @@ class GoldPriceApp(App):
         """显示提醒设置"""
         popup = AlertSettingsPopup(self)
         popup.open()
+        return popup
+    
+    def show_diagnostics(self, instance):
+        """显示诊断面板"""
+        DiagnosticsPopup(self).open()
+    
+    def diagnostics_report(self):
+        """轮询服务的指标 + 界面进程的统计"""
+        lines = [self.service_metrics.get("report", "等待轮询服务响应...")]
+        for key, value in self.diagnostics_extra().items():
+            lines.append(f"{key}: {value}")
+        return "\n".join(lines)
+    
+    def diagnostics_extra(self):
+        """诊断面板/导出文件中附加的界面进程统计"""
+        extra = {
+            "轮询服务": f"{self.service_mode}  网关 {self.gateway_url}" if self.gateway_url else self.service_mode,
+            "提醒队列": f"合并 {self.alert_queue.collapsed} 条，丢弃 {self.alert_queue.dropped} 条",
+            "启动": f"首帧 {self.startup.get('first_frame_ms', 0):.0f}ms（导入 {self.startup['import_ms']:.0f}ms"
+                    f"  构建 {self.startup['build_ms']:.0f}ms）  字体 {self.font_path}",
+            "语音延迟": f"p50 {self.speech_latency.percentile(50):.0f}ms  p95 {self.speech_latency.percentile(95):.0f}ms"
+                        f"  共 {self.speech_latency.count} 次",
+        }
+        if self.latest_candle:
+            source, (start, open_, high, low, close, count) = self.latest_candle
+            extra["1分钟K线"] = (f"{source} {time.strftime('%H:%M', time.localtime(start))}  开 {open_:.2f}"
+                               f"  高 {high:.2f}  低 {low:.2f}  收 {close:.2f}  {count} 笔")
+        if self.profiler:
+            summary = self.profiler.summary(worst=0)
+            frame = summary["frame_ms"]
+            extra["帧耗时"] = (f"p50 {frame['p50']:.1f}ms  p95 {frame['p95']:.1f}ms  最长 {frame['max']:.1f}ms"
+                             f"  卡顿 {summary['janky']}/{summary['frames']} 帧")
+        return extra
+    
+    def export_metrics(self):
+        """把运行指标导出到用户数据目录，返回文件路径"""
+        path = os.path.join(self.user_data_dir, f"metrics_{time.strftime('%Y%m%d_%H%M%S')}.json")
+        data = dict(self.service_metrics.get("snapshot", {}))
+        data["app"] = self.diagnostics_extra()
+        return dump_json(path, data)
+    
+    def export_ticks(self):
+        """把行情历史按列压缩导出到用户数据目录（后台线程，完成后提示）"""
+        path = os.path.join(self.user_data_dir, f"ticks_{time.strftime('%Y%m%d_%H%M%S')}.ticks")
+        
+        def run():
+            # 导出模块只在这里用到，不在启动时导入
+            from goldcore.export import export_ticks
+            try:
+                result = export_ticks(os.path.join(self.user_data_dir, 'ticks'), path)
+                message = f"已导出 {sum(result['rows'].values())} 条行情: {path}"
+            except Exception as e:
+                message = f"导出失败: {e}"
+            Clock.schedule_once(lambda dt: self.show_toast(message), 0)
+        
+        threading.Thread(target=run, daemon=True).start()
     
     def manual_refresh(self, instance):
         """手动刷新"""
         self.status_label.text = "正在刷新..."
-        threading.Thread(target=self.update_prices, daemon=True).start()
+        self.service.send({"cmd": "refresh"})
     
     def test_voice(self, instance):
         """测试语音"""
@@ -695,33 +1200,43 @@ class GoldPriceApp(App):
         self.show_toast("语音测试")
     
     def toggle_background(self, instance, value):
-        """切换后台运行"""
+        """切换后台运行：开启后关闭界面时轮询服务继续运行"""
+        self.keep_service = value
         if value:
-            self.show_toast("后台运行已开启（应用保持运行）")
-            # 防止屏幕关闭
-            if IS_ANDROID:
-                try:
-                    from android import AndroidService
-                    service = AndroidService('GoldPriceService', '金价监控运行中...')
-                    service.start('服务正在运行')
-                except:
-                    pass
+            if self.service_mode == 'android':
+                self.show_toast("后台运行已开启（关闭界面后继续监控）")
+            else:
+                self.show_toast("后台运行已开启（应用保持运行）")
         else:
             self.show_toast("后台运行已关闭")
     
     def on_pause(self):
         """应用暂停时（后台运行）"""
+        self.service.send({"cmd": "pause", "value": True})
         if self.alert_enabled:
             return True  # 保持运行
         return False
     
     def on_resume(self):
         """应用恢复时"""
-        pass
+        self.service.send({"cmd": "pause", "value": False})
     
     def on_stop(self):
         """应用停止时"""
         self.running = False
+        if self.profiler:
+            try:
+                print(f"帧耗时 trace 已导出: {self.dump_profile()}")
+            except Exception as e:
+                print(f"帧耗时 trace 导出失败: {e}")
+        if self.service_mode != 'thread' and not self.keep_service:
+            self.service.send({"cmd": "shutdown"})
+        self.service.stop()
+        if self.service_process is not None and not self.keep_service:
+            try:
+                self.service_process.wait(timeout=3)
+            except Exception:
+                self.service_process.terminate()
         if self.tts_engine:
             try:
                 self.tts_engine.stop()
@@ -0,0 +1,37 @@
+'''
+    Android 后台服务入口（buildozer.spec 中的 services = Poller:service/main.py:foreground）
+
+    在独立进程中运行 goldcore.service，界面被系统回收后仍继续轮询；
+    没有界面连接时由这里直接发系统通知。
+'''
+
+import json
+import os
+
+from goldcore.config import SERVICE_PORT
+from goldcore.service import run_service
+
+def send_notification(message):
+    """服务进程内发送Android原生通知"""
+    try:
+        from jnius import autoclass
+        service = autoclass('org.kivy.android.PythonService').mService
+        context = service.getApplicationContext()
+        Context = autoclass('android.content.Context')
+        NotificationBuilder = autoclass('android.app.Notification$Builder')
+        notification_manager = context.getSystemService(Context.NOTIFICATION_SERVICE)
+        
+        builder = NotificationBuilder(context)
+        builder.setContentTitle("金价提醒")
+        builder.setContentText(message["message"])
+        builder.setSmallIcon(context.getApplicationInfo().icon)
+        builder.setAutoCancel(True)
+        notification_manager.notify(1, builder.build())
+    except Exception as e:
+        print(f"发送通知错误: {e}")
+
+if __name__ == '__main__':
+    # 界面启动服务时传入 {"data_dir": ..., "port": ..., "gateway": ...}
+    argument = json.loads(os.environ.get('PYTHON_SERVICE_ARGUMENT') or '{}')
+    run_service(argument.get('data_dir'), port=argument.get('port', SERVICE_PORT),
+                on_alert=send_notification, gateway_url=argument.get('gateway'))